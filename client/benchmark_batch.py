@@ -0,0 +1,116 @@
+import time
+import random
+import subprocess
+import shutil
+import sys
+import os
+
+from client.lbclient import KVClient, generate_value
+import matplotlib.pyplot as plt
+
+BATCH_SIZES = [1, 10, 100, 1000]  # Claves por llamada MultiGet / MultiSet
+OPERATIONS = 10000  # Operaciones por cada tamaño de lote
+KEY_COUNT = 10000
+VALUE_SIZE = 128
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_batch"
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+def start_server():
+    print("\nIniciando el servidor...")
+    # Con durabilidad 'always' cada llamada cuesta un fsync, que es lo que amortizan los lotes
+    return subprocess.Popen([sys.executable, server_script, "--durability", "always", "--data-dir", DATA_DIR])
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+def measure_set(client, batch_size, value):
+    """ Escribe OPERATIONS claves en lotes de batch_size y devuelve las operaciones por segundo """
+    start = time.time()
+    for i in range(0, OPERATIONS, batch_size):
+        keys = [f"key_{random.randrange(KEY_COUNT):05d}" for _ in range(batch_size)]
+        if batch_size == 1:
+            client.set(keys[0], value)
+        else:
+            client.set_many([(key, value) for key in keys])
+    return OPERATIONS / (time.time() - start)
+
+def measure_get(client, batch_size):
+    """ Lee OPERATIONS claves en lotes de batch_size y devuelve las operaciones por segundo """
+    start = time.time()
+    for i in range(0, OPERATIONS, batch_size):
+        keys = [f"key_{random.randrange(KEY_COUNT):05d}" for _ in range(batch_size)]
+        if batch_size == 1:
+            client.get(keys[0])
+        else:
+            values = client.get_many(keys)
+            assert None not in values
+    return OPERATIONS / (time.time() - start)
+
+def main():
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    proc = start_server()
+    if wait_for_server_ready() is None:
+        stop_server(proc)
+        return
+
+    results = []
+    try:
+        client = KVClient()
+        value = generate_value(VALUE_SIZE)
+        print(f"Poblando el almacén con {KEY_COUNT} claves...")
+        client.set_many([(f"key_{i:05d}", value) for i in range(KEY_COUNT)])
+
+        for batch_size in BATCH_SIZES:
+            set_ops = measure_set(client, batch_size, value)
+            get_ops = measure_get(client, batch_size)
+            print(f"[Lote {batch_size}] Set: {set_ops:.0f} ops/s | Get: {get_ops:.0f} ops/s")
+            results.append((batch_size, set_ops, get_ops))
+        client.close()
+    finally:
+        stop_server(proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    print("\nResultados por tamaño de lote:")
+    print(f"{'Lote':>6} | {'Set (ops/s)':>12} | {'Get (ops/s)':>12}")
+    print("-" * 36)
+    for batch_size, set_ops, get_ops in results:
+        print(f"{batch_size:>6} | {set_ops:12.0f} | {get_ops:12.0f}")
+
+    sizes, set_results, get_results = zip(*results)
+    plt.figure(figsize=(10, 6))
+    plt.plot(sizes, set_results, marker='o', label="Set / MultiSet")
+    plt.plot(sizes, get_results, marker='s', label="Get / MultiGet")
+    plt.xscale("log")
+    plt.yscale("log")
+    plt.title("Operaciones por segundo vs Tamaño de lote")
+    plt.xlabel("Claves por llamada")
+    plt.ylabel("Operaciones por segundo")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig("benchmark_batch.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import threading
+import time
+import random
+import shutil
+import subprocess
+import sys
+import os
+
+import grpc
+
+from client.lbclient import KVClient, generate_value
+from client.key_value_store_service_pb2 import GetValue
+from client.key_value_store_service_pb2_grpc import KeyValueStoreStub
+import matplotlib.pyplot as plt
+
+SERVER_ADDRESS = "localhost:50051"
+VALUE_SIZE = 1024  # Tamaño valor en bytes (1 KB)
+NUM_KEYS = 10000  # Claves existentes
+MISS_RATIO = 0.9  # Fracción de lecturas de claves que no existen
+NUM_CLIENTS = 8  # Hilos cliente
+DURATION = 10  # Duración de cada medición en segundos
+LOOKUPS = 200000  # Búsquedas de la medición dentro del proceso
+STORAGE = "disk"  # El filtro solo se usa en modo 'disk'
+
+# Configuraciones medidas: bits por clave del filtro de Bloom (0 = sin filtro)
+CONFIGS = [("Sin filtro", 0), ("Filtro 10 bits/clave", 10)]
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_bloom"
+
+server_dir = os.path.abspath("./server")
+server_script = os.path.join(server_dir, "lbserver.py")
+
+test_keys = [f"key_{i}" for i in range(NUM_KEYS)]
+
+def start_server(bits_per_key):
+    print(f"\nIniciando el servidor (almacenamiento = {STORAGE}, filtro de Bloom = {bits_per_key} bits/clave)...")
+    return subprocess.Popen([sys.executable, server_script, "--storage", STORAGE,
+                             "--bloom-bits-per-key", str(bits_per_key), "--data-dir", DATA_DIR])
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+def random_key(rng):
+    """ Clave existente o, con probabilidad MISS_RATIO, una que nunca se ha escrito """
+    if rng.random() < MISS_RATIO:
+        return f"missing_{rng.randrange(NUM_KEYS * 100)}"
+    return rng.choice(test_keys)
+
+# Hilo cliente que solo lee, la mayoría de las veces claves que no existen
+def worker(seed, latencies, stop_event):
+    rng = random.Random(seed)
+    with grpc.insecure_channel(SERVER_ADDRESS) as channel:
+        stub = KeyValueStoreStub(channel)
+        while not stop_event.is_set():
+            key = random_key(rng)
+            start = time.time()
+            try:
+                stub.Get(GetValue(key=key))
+            except grpc.RpcError as e:
+                if e.code() != grpc.StatusCode.NOT_FOUND:
+                    raise
+            latencies.append((time.time() - start) * 1000)
+
+def percentile(latencies, p):
+    if not latencies:
+        return 0.0
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+def run_config(bits_per_key, value):
+    """ Puebla el almacén y ejecuta la carga durante DURATION segundos; devuelve rendimiento, latencias y el filtro """
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    proc = start_server(bits_per_key)
+    try:
+        if wait_for_server_ready() is None:
+            return None
+        client = KVClient()
+        client.set_many([(key, value) for key in test_keys])
+
+        latencies = []
+        stop_event = threading.Event()
+        threads = [threading.Thread(target=worker, args=(seed, latencies, stop_event)) for seed in range(NUM_CLIENTS)]
+        for thread in threads:
+            thread.start()
+        time.sleep(DURATION)
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+
+        stats = client.stat()
+        client.close()
+    finally:
+        stop_server(proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    checked = stats.bloom_negatives + stats.bloom_false_positives
+    observed_fpr = stats.bloom_false_positives / checked if checked else 0.0
+    return len(latencies) / DURATION, percentile(latencies, 0.5), percentile(latencies, 0.99), stats.bloom_fpr, observed_fpr, stats.bloom_bytes
+
+def measure_lookups(bits_per_key, value):
+    """ Coste de cada lectura dentro del servidor, sin gRPC: microsegundos por read_value con la misma mezcla de claves """
+    sys.path.insert(0, server_dir)
+    from lbserver import KeyValueServer
+
+    data_dir = os.path.join(DATA_DIR, "lookups")
+    shutil.rmtree(data_dir, ignore_errors=True)
+    kv_server = KeyValueServer(durability="none", data_dir=data_dir, use_snapshots=False, legacy_path=None,
+                               storage=STORAGE, bloom_bits_per_key=bits_per_key)
+    try:
+        encoded = value.encode("utf-8")
+        kv_server.apply_multi_set([(key, encoded) for key in test_keys])
+        rng = random.Random(0)
+        keys = [random_key(rng) for _ in range(LOOKUPS)]
+        start = time.perf_counter()
+        for key in keys:
+            kv_server.read_value(key)
+        elapsed = time.perf_counter() - start
+    finally:
+        kv_server.shutdown()
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+    return elapsed / LOOKUPS * 1e6
+
+def main():
+    value = generate_value(VALUE_SIZE)
+    results = []
+    for name, bits_per_key in CONFIGS:
+        print(f"{name} ({NUM_CLIENTS} clientes, {MISS_RATIO:.0%} de claves inexistentes, {DURATION} s)...")
+        result = run_config(bits_per_key, value)
+        if result is None:
+            return
+        print("Midiendo el coste de las lecturas dentro del proceso...")
+        results.append((name, *result, measure_lookups(bits_per_key, value)))
+
+    print(f"\nLecturas con {MISS_RATIO:.0%} de claves inexistentes ({NUM_CLIENTS} clientes, almacenamiento = {STORAGE}):")
+    print(f"{'Configuración':>20} | {'Rendimiento (ops/s)':>19} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'FPR estimada':>12} | {'FPR observada':>13} | {'Filtro (KB)':>11} | {'read_value (µs)':>15}")
+    print("-" * 131)
+    for name, throughput, p50, p99, estimated_fpr, observed_fpr, bloom_bytes, lookup_us in results:
+        print(f"{name:>20} | {throughput:19.2f} | {p50:9.3f} | {p99:9.3f} | {estimated_fpr:11.4%} | {observed_fpr:12.4%} | {bloom_bytes / 1024:11.1f} | {lookup_us:15.3f}")
+
+    names = [r[0] for r in results]
+    x = range(len(names))
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    ax1.bar(list(x), [r[1] for r in results])
+    ax1.set_xticks(list(x))
+    ax1.set_xticklabels(names)
+    ax1.set_ylabel("Rendimiento (ops/s)")
+    ax1.set_title("Rendimiento con lecturas de claves inexistentes")
+    ax1.grid(True, axis="y")
+    ax2.bar(list(x), [r[7] for r in results])
+    ax2.set_xticks(list(x))
+    ax2.set_xticklabels(names)
+    ax2.set_ylabel("Tiempo por lectura en el servidor (µs)")
+    ax2.set_title("Coste de read_value sin gRPC")
+    ax2.grid(True, axis="y")
+    plt.tight_layout()
+    plt.savefig("benchmark_bloom.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import time
+import shutil
+import subprocess
+import sys
+import os
+import tracemalloc
+
+from client.lbclient import KVClient, generate_value
+import matplotlib.pyplot as plt
+
+VALUE_SIZES = [512 * 1024, 1024 * 1024, 2 * 1024 * 1024, 4 * 1024 * 1024]  # Tamaños de valor (bytes)
+REPETITIONS = 20  # Operaciones de cada tipo por tamaño
+DURABILITY = "none"  # Sin fsync, para que las copias del valor no queden ocultas tras el disco
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_bytes"
+
+server_dir = os.path.abspath("./server")
+server_script = os.path.join(server_dir, "lbserver.py")
+
+def start_server():
+    print(f"\nIniciando el servidor (durabilidad = {DURABILITY})...")
+    return subprocess.Popen([sys.executable, server_script, "--durability", DURABILITY, "--data-dir", DATA_DIR])
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+def percentile(latencies, p):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+def measure(operation):
+    latencies = []
+    for _ in range(REPETITIONS):
+        start = time.time()
+        operation()
+        latencies.append((time.time() - start) * 1000)
+    return percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+class _Context:
+    """ Contexto mínimo para llamar a los métodos del servidor sin pasar por gRPC """
+
+    def set_code(self, code):
+        pass
+
+    def abort(self, code, details):
+        raise RuntimeError(details)
+
+def measure_allocations():
+    """ Memoria de Python que reserva el servidor en cada Set y Get, sin gRPC de por medio.
+
+    Crea un KeyValueServer dentro de este proceso y llama directamente a sus métodos con
+    tracemalloc activo; el pico de memoria de cada llamada, dividido por el tamaño del valor,
+    indica cuántas copias del valor hace el servidor.
+    """
+    sys.path.insert(0, server_dir)
+    import key_value_store_service_pb2 as server_pb2
+    from lbserver import KeyValueServer
+    from bytes_service import BytesKeyValueServicer
+
+    data_dir = os.path.join(DATA_DIR, "allocations")
+    kv_server = KeyValueServer(durability=DURABILITY, data_dir=data_dir, use_snapshots=False, legacy_path=None)
+    bytes_servicer = BytesKeyValueServicer(kv_server)
+    context = _Context()
+
+    results = {}
+    try:
+        for size in VALUE_SIZES:
+            text = generate_value(size)
+            data = text.encode("utf-8")
+            calls = {
+                "Set string": lambda: kv_server.Set(server_pb2.SetKeyValue(key="key_text", value=text), context),
+                "Get string": lambda: kv_server.Get(server_pb2.GetValue(key="key_text"), context),
+                "Set bytes": lambda: bytes_servicer.Set(server_pb2.SetKeyBytes(key="key_bytes", value=data), context),
+                "Get bytes": lambda: bytes_servicer.Get(server_pb2.GetValue(key="key_bytes"), context),
+            }
+            for name, call in calls.items():
+                call()  # La primera llamada crea la clave; medimos las siguientes
+                tracemalloc.start()
+                call()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results[(name, size)] = peak / size
+    finally:
+        kv_server.shutdown()
+    return results
+
+def main():
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    latencies = {}
+    server_proc = start_server()
+    try:
+        if wait_for_server_ready() is None:
+            return
+
+        client = KVClient()
+        for size in VALUE_SIZES:
+            print(f"Midiendo valores de {size // 1024} KB...")
+            text = generate_value(size)
+            data = text.encode("utf-8")
+            latencies[("Set string", size)] = measure(lambda: client.set("key_text", text))
+            latencies[("Get string", size)] = measure(lambda: client.get("key_text"))
+            latencies[("Set bytes", size)] = measure(lambda: client.set_bytes("key_bytes", data))
+            latencies[("Get bytes", size)] = measure(lambda: client.get_bytes("key_bytes"))
+        client.close()
+    finally:
+        stop_server(server_proc)
+
+    print("\nMidiendo las reservas de memoria del servidor con tracemalloc...")
+    allocations = measure_allocations()
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    operations = ["Set string", "Set bytes", "Get string", "Get bytes"]
+    print(f"\nServicio string vs servicio bytes (durabilidad = {DURABILITY}, {REPETITIONS} operaciones por tamaño):")
+    print(f"{'Operación':>10} | {'Tamaño (KB)':>11} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'Memoria / valor':>15}")
+    print("-" * 67)
+    for operation in operations:
+        for size in VALUE_SIZES:
+            p50, p99 = latencies[(operation, size)]
+            print(f"{operation:>10} | {size // 1024:>11} | {p50:9.3f} | {p99:9.3f} | {allocations[(operation, size)]:14.2f}x")
+
+    sizes_kb = [size // 1024 for size in VALUE_SIZES]
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    for operation in operations:
+        ax1.plot(sizes_kb, [latencies[(operation, size)][0] for size in VALUE_SIZES], marker="o", label=operation)
+        ax2.plot(sizes_kb, [allocations[(operation, size)] for size in VALUE_SIZES], marker="o", label=operation)
+    ax1.set_xlabel("Tamaño del valor (KB)")
+    ax1.set_ylabel("Latencia p50 (ms)")
+    ax1.set_title("Latencia por operación")
+    ax1.legend()
+    ax1.grid(True)
+    ax2.set_xlabel("Tamaño del valor (KB)")
+    ax2.set_ylabel("Memoria reservada / tamaño del valor")
+    ax2.set_title("Copias del valor en el servidor")
+    ax2.legend()
+    ax2.grid(True)
+    plt.tight_layout()
+    plt.savefig("benchmark_bytes.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import multiprocessing
+import time
+import random
+import shutil
+import subprocess
+import sys
+import os
+
+from client.lbclient import KVClient, generate_value
+from client.cluster import ClusterKVClient
+import matplotlib.pyplot as plt
+
+NODE_PORTS = [50061, 50062, 50063, 50064]  # Un servidor lbserver independiente por puerto
+NUM_CLIENTS = 16  # Procesos cliente
+DURATION = 5  # Duración de cada prueba en segundos
+NUM_KEYS = 10000
+VALUE_SIZE = 1024
+
+# Directorio de datos propio de cada nodo para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_cluster"
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+test_keys = [f"key_{i}" for i in range(NUM_KEYS)]
+
+def start_node(port):
+    print(f"\nIniciando el nodo localhost:{port}...")
+    return subprocess.Popen([sys.executable, server_script, "--port", str(port), "--data-dir", os.path.join(DATA_DIR, str(port))])
+
+def stop_node(proc):
+    proc.terminate()
+    proc.wait()
+
+def wait_for_server_ready(address, timeout=120):
+    print(f"Esperando que {address} esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient(address)
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+# Proceso cliente con carga 50% lectura / 50% escritura repartida por el anillo
+def worker(nodes, duration, value):
+    client = ClusterKVClient(nodes)
+    ops = 0
+    total_latency = 0.0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        key = random.choice(test_keys)
+        start = time.time()
+        if random.random() < 0.5:
+            client.get(key)
+        else:
+            client.set(key, value)
+        total_latency += time.time() - start
+        ops += 1
+    client.close()
+    return ops, total_latency
+
+def run_test(pool, nodes, value):
+    results = pool.starmap(worker, [(nodes, DURATION, value)] * NUM_CLIENTS)
+    ops = sum(r[0] for r in results)
+    avg_latency = sum(r[1] for r in results) / ops * 1000 if ops else 0
+    return avg_latency, ops / DURATION
+
+def main():
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    nodes = [f"localhost:{port}" for port in NODE_PORTS]
+    procs = [start_node(port) for port in NODE_PORTS]
+
+    results = []
+    try:
+        for node in nodes:
+            if wait_for_server_ready(node) is None:
+                return
+
+        value = generate_value(VALUE_SIZE)
+        cluster = ClusterKVClient(nodes[:1])
+        print(f"Poblando el cluster con {NUM_KEYS} claves...")
+        cluster.set_many([(key, value) for key in test_keys])
+
+        # Los clientes son procesos para que el GIL del propio benchmark no limite el rendimiento
+        with multiprocessing.get_context("spawn").Pool(NUM_CLIENTS) as pool:
+            for count in range(1, len(nodes) + 1):
+                moved = 0
+                if count > 1:
+                    start = time.time()
+                    moved = cluster.add_node(nodes[count - 1])
+                    print(f"Nodo {nodes[count - 1]} añadido: {moved} claves movidas ({moved / NUM_KEYS:.1%}) en {time.time() - start:.2f} s")
+                latency, throughput = run_test(pool, nodes[:count], value)
+                print(f"[{count} nodo(s)] Latencia promedio: {latency:.3f} ms | Rendimiento: {throughput:.2f} ops/s")
+                results.append((count, moved, latency, throughput))
+        cluster.close()
+    finally:
+        for proc in procs:
+            stop_node(proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    print(f"\nResultados ({NUM_CLIENTS} clientes, 50% Lectura / 50% Escritura):")
+    print(f"{'Nodos':>6} | {'Claves movidas':>15} | {'Latencia (ms)':>14} | {'Rendimiento (ops/s)':>20}")
+    print("-" * 65)
+    for count, moved, latency, throughput in results:
+        print(f"{count:>6} | {moved:>15} | {latency:14.3f} | {throughput:20.2f}")
+
+    counts = [r[0] for r in results]
+    plt.figure(figsize=(10, 6))
+    plt.plot(counts, [r[3] for r in results], marker='o', label="Rendimiento agregado")
+    plt.xticks(counts)
+    plt.xlabel("Número de nodos")
+    plt.ylabel("Rendimiento (ops/s)")
+    plt.title(f"Rendimiento del cluster con hashing consistente ({NUM_CLIENTS} clientes)")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig("benchmark_cluster.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import threading
+import time
+import random
+import shutil
+import subprocess
+import sys
+import os
+
+from client.lbclient import KVClient, generate_value
+import matplotlib.pyplot as plt
+
+ENGINES = ["sync", "aio"]  # Motores del servidor a comparar
+CLIENT_COUNTS = [1, 2, 4, 8, 16, 32]  # Diferentes números de clientes
+DURATION = 5  # Duración de cada prueba en segundos
+NUM_KEYS = 1000
+VALUE_SIZE = 1024
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_engines"
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+test_keys = [f"key_{i}" for i in range(NUM_KEYS)]
+
+def start_server(engine):
+    print(f"\nIniciando el servidor (motor = {engine})...")
+    return subprocess.Popen([sys.executable, server_script, "--engine", engine, "--data-dir", DATA_DIR])
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+# Hilo cliente con carga 50% lectura / 50% escritura
+def worker(value, latencies, latencies_lock, stop_event):
+    client = KVClient()
+    local = []
+    while not stop_event.is_set():
+        key = random.choice(test_keys)
+        start = time.time()
+        if random.random() < 0.5:
+            client.get(key)
+        else:
+            client.set(key, value)
+        local.append((time.time() - start) * 1000)
+    client.close()
+    with latencies_lock:
+        latencies.extend(local)
+
+def run_test(num_clients, value):
+    latencies = []
+    latencies_lock = threading.Lock()
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=worker, args=(value, latencies, latencies_lock, stop_event)) for _ in range(num_clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    avg_latency = sum(latencies) / len(latencies) if latencies else 0
+    p99_latency = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    return avg_latency, p99_latency, len(latencies) / DURATION
+
+def run_engine(engine):
+    """ Ejecuta la carga para todos los números de clientes con un motor del servidor """
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    proc = start_server(engine)
+    if wait_for_server_ready() is None:
+        stop_server(proc)
+        return None
+
+    results = []
+    try:
+        value = generate_value(VALUE_SIZE)
+        client = KVClient()
+        client.set_many([(key, value) for key in test_keys])
+        client.close()
+
+        for clients in CLIENT_COUNTS:
+            avg, p99, throughput = run_test(clients, value)
+            print(f"[{engine}] {clients} cliente(s) | Latencia promedio: {avg:.3f} ms | p99: {p99:.3f} ms | Rendimiento: {throughput:.2f} ops/s")
+            results.append((avg, p99, throughput))
+    finally:
+        stop_server(proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+    return results
+
+def main():
+    results = {}
+    for engine in ENGINES:
+        engine_results = run_engine(engine)
+        if engine_results is not None:
+            results[engine] = engine_results
+
+    if not results:
+        return
+
+    for engine, engine_results in results.items():
+        print(f"\n[{engine}] Resultados 50% Lectura / 50% Escritura:")
+        print(f"{'Clientes':>8} | {'Promedio (ms)':>14} | {'p99 (ms)':>10} | {'Rendimiento (ops/s)':>20}")
+        print("-" * 62)
+        for clients, (avg, p99, throughput) in zip(CLIENT_COUNTS, engine_results):
+            print(f"{clients:>8} | {avg:14.3f} | {p99:10.3f} | {throughput:20.2f}")
+
+    fig, (ax_thr, ax_lat) = plt.subplots(1, 2, figsize=(14, 6))
+    for engine, engine_results in results.items():
+        avgs, p99s, throughputs = zip(*engine_results)
+        ax_thr.plot(CLIENT_COUNTS, throughputs, marker='o', label=engine)
+        ax_lat.plot(CLIENT_COUNTS, p99s, marker='s', label=f"p99 ({engine})")
+        ax_lat.plot(CLIENT_COUNTS, avgs, marker='o', linestyle='--', label=f"Promedio ({engine})")
+    ax_thr.set_title("Rendimiento por motor del servidor")
+    ax_thr.set_xlabel("Número de clientes")
+    ax_thr.set_ylabel("Rendimiento (ops/s)")
+    ax_lat.set_title("Latencia por motor del servidor")
+    ax_lat.set_xlabel("Número de clientes")
+    ax_lat.set_ylabel("Latencia (ms)")
+    for ax in (ax_thr, ax_lat):
+        ax.set_xscale("log", base=2)
+        ax.legend()
+        ax.grid(True)
+    plt.tight_layout()
+    plt.savefig("benchmark_engines.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
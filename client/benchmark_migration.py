@@ -0,0 +1,166 @@
+import multiprocessing
+import time
+import random
+import shutil
+import subprocess
+import sys
+import os
+import zlib
+
+import grpc
+
+from client.lbclient import KVClient, generate_value
+from client.migration import migrate
+import matplotlib.pyplot as plt
+
+SOURCE_PORT = 50061
+TARGET_PORT = 50062
+NUM_KEYS = 50000
+VALUE_SIZE = 1024
+NUM_CLIENTS = 4  # Procesos cliente con carga de primer plano
+PHASE_SECONDS = 3  # Duración de la carga antes y después de la migración
+
+# Se migran las claves del bucket hash 1 de 2 (la mitad del keyspace)
+HASH_MODULUS = 2
+HASH_BUCKETS = [1]
+
+# Directorio de datos propio de cada servidor para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_migration"
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+def start_node(port):
+    print(f"\nIniciando el servidor localhost:{port}...")
+    return subprocess.Popen([sys.executable, server_script, "--port", str(port), "--data-dir", os.path.join(DATA_DIR, str(port))])
+
+def stop_node(proc):
+    proc.terminate()
+    proc.wait()
+
+def wait_for_server_ready(address, timeout=120):
+    print(f"Esperando que {address} esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient(address)
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+def is_moved(key):
+    return zlib.crc32(key.encode("utf-8")) % HASH_MODULUS in HASH_BUCKETS
+
+# Proceso cliente 50% lectura / 50% escritura; tras el corte envía las claves migradas al destino
+def worker(cutover, stop, value, results):
+    source = KVClient(f"localhost:{SOURCE_PORT}")
+    target = KVClient(f"localhost:{TARGET_PORT}")
+    samples = []
+    while not stop.is_set():
+        key = f"key_{random.randrange(NUM_KEYS)}"
+        start = time.time()
+        while True:
+            client = target if cutover.is_set() and is_moved(key) else source
+            try:
+                if random.random() < 0.5:
+                    client.get(key)
+                else:
+                    client.set(key, value)
+                break
+            except grpc.RpcError as e:
+                # Durante el corte el origen rechaza las escrituras de la partición: reintentamos
+                if e.code() != grpc.StatusCode.UNAVAILABLE:
+                    raise
+                time.sleep(0.001)
+        samples.append((start, (time.time() - start) * 1000))
+    source.close()
+    target.close()
+    results.put(samples)
+
+def percentiles(latencies):
+    if not latencies:
+        return 0.0, 0.0
+    latencies = sorted(latencies)
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+def main():
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    procs = [start_node(SOURCE_PORT), start_node(TARGET_PORT)]
+    try:
+        for port in (SOURCE_PORT, TARGET_PORT):
+            if wait_for_server_ready(f"localhost:{port}") is None:
+                return
+
+        value = generate_value(VALUE_SIZE)
+        source = KVClient(f"localhost:{SOURCE_PORT}")
+        target = KVClient(f"localhost:{TARGET_PORT}")
+        print(f"Poblando el origen con {NUM_KEYS} claves de {VALUE_SIZE} bytes...")
+        source.set_many([(f"key_{i}", value) for i in range(NUM_KEYS)])
+
+        # Los eventos se heredan al crear los procesos (un Pool no puede recibirlos como argumento)
+        context = multiprocessing.get_context("spawn")
+        cutover = context.Event()
+        stop = context.Event()
+        results = context.Queue()
+        workers = [context.Process(target=worker, args=(cutover, stop, value, results)) for _ in range(NUM_CLIENTS)]
+        for process in workers:
+            process.start()
+        time.sleep(PHASE_SECONDS)
+
+        print("Migrando la mitad del keyspace al destino...")
+        migration_start = time.time()
+        report = migrate(source, target, hash_modulus=HASH_MODULUS, hash_buckets=HASH_BUCKETS, on_cutover=cutover.set)
+        migration_end = time.time()
+
+        time.sleep(PHASE_SECONDS)
+        stop.set()
+        samples = [sample for _ in workers for sample in results.get()]
+        for process in workers:
+            process.join()
+        source.close()
+        target.close()
+    finally:
+        for proc in procs:
+            stop_node(proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    phases = {
+        "Antes": [lat for t, lat in samples if t < migration_start],
+        "Durante": [lat for t, lat in samples if migration_start <= t < migration_end],
+        "Después": [lat for t, lat in samples if t >= migration_end],
+    }
+
+    print("\nTransferencia:")
+    print(f"  Claves copiadas: {report['keys']} (+{report['catchup_keys']} en {report['catchup_rounds']} ronda(s) de puesta al día)")
+    print(f"  Datos: {report['bytes'] / (1024 * 1024):.1f} MB en {report['seconds']:.2f} s ({report['mb_per_sec']:.1f} MB/s, {report['copy_keys_per_sec']:.0f} claves/s)")
+    print(f"  Corte: {report['cutover_ms']:.1f} ms")
+
+    print(f"\nLatencia de primer plano ({NUM_CLIENTS} clientes, 50% Lectura / 50% Escritura):")
+    print(f"{'Fase':>8} | {'Operaciones':>11} | {'p50 (ms)':>9} | {'p99 (ms)':>9}")
+    print("-" * 46)
+    results = []
+    for phase, latencies in phases.items():
+        p50, p99 = percentiles(latencies)
+        results.append((phase, p50, p99))
+        print(f"{phase:>8} | {len(latencies):>11} | {p50:9.3f} | {p99:9.3f}")
+
+    names = [r[0] for r in results]
+    x = range(len(names))
+    plt.figure(figsize=(10, 6))
+    plt.bar([i - 0.2 for i in x], [r[1] for r in results], width=0.4, label="p50")
+    plt.bar([i + 0.2 for i in x], [r[2] for r in results], width=0.4, label="p99")
+    plt.xticks(list(x), names)
+    plt.ylabel("Latencia (ms)")
+    plt.title(f"Latencia de primer plano durante la migración ({report['mb_per_sec']:.1f} MB/s, corte {report['cutover_ms']:.0f} ms)")
+    plt.legend()
+    plt.grid(True, axis="y")
+    plt.tight_layout()
+    plt.savefig("benchmark_migration.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
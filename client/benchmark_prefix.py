@@ -0,0 +1,109 @@
+import time
+import random
+import statistics
+import subprocess
+import shutil
+import sys
+import os
+
+from client.lbclient import KVClient, generate_value
+import matplotlib.pyplot as plt
+
+STORE_SIZES = [1000, 10000, 100000]  # Número de claves en el almacén
+VALUE_SIZE = 128
+QUERIES = 200  # Consultas por prefijo por cada tamaño
+MATCHES_PER_PREFIX = 10  # Cada prefijo coincide con 10 claves
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_prefix"
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+def start_server():
+    print("\nIniciando el servidor...")
+    # Sin fsync para poblar el almacén rápidamente; no afecta a la latencia de las lecturas
+    return subprocess.Popen([sys.executable, server_script, "--durability", "none", "--data-dir", DATA_DIR])
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+def populate_until(client, current, target, value):
+    print(f"Poblando el almacén de {current} a {target} claves...")
+    for i in range(current, target):
+        client.set(f"key_{i:07d}", value)
+
+def measure_prefix_latency(client, store_size):
+    """ Mide la latencia de consultas por prefijo que coinciden con MATCHES_PER_PREFIX claves """
+    latencies = []
+    for _ in range(QUERIES):
+        prefix = f"key_{random.randint(0, store_size // MATCHES_PER_PREFIX - 1):06d}"
+        start = time.time()
+        response = client.get_prefix(prefix)
+        latencies.append((time.time() - start) * 1000)
+        assert len(response.keys) == MATCHES_PER_PREFIX
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+def main():
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    proc = start_server()
+    if wait_for_server_ready() is None:
+        stop_server(proc)
+        return
+
+    results = []
+    try:
+        client = KVClient()
+        value = generate_value(VALUE_SIZE)
+        current = 0
+        for size in STORE_SIZES:
+            populate_until(client, current, size, value)
+            current = size
+            avg, p99 = measure_prefix_latency(client, size)
+            print(f"[{size} claves] Latencia GetPrefix promedio: {avg:.3f} ms | p99: {p99:.3f} ms")
+            results.append((size, avg, p99))
+        client.close()
+    finally:
+        stop_server(proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    print("\nResultados GetPrefix:")
+    print(f"{'Claves':>10} | {'Promedio (ms)':>15} | {'p99 (ms)':>10}")
+    print("-" * 42)
+    for size, avg, p99 in results:
+        print(f"{size:>10} | {avg:15.3f} | {p99:10.3f}")
+
+    sizes, avgs, p99s = zip(*results)
+    plt.figure(figsize=(10, 6))
+    plt.plot(sizes, avgs, marker='o', label="Promedio")
+    plt.plot(sizes, p99s, marker='s', label="p99")
+    plt.xscale("log")
+    plt.title(f"Latencia de GetPrefix ({MATCHES_PER_PREFIX} coincidencias) vs Tamaño del almacén")
+    plt.xlabel("Número de claves")
+    plt.ylabel("Latencia (ms)")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig("benchmark_prefix.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
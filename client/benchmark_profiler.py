@@ -0,0 +1,156 @@
+import threading
+import time
+import random
+import shutil
+import subprocess
+import sys
+import os
+
+import grpc
+
+from client.lbclient import KVClient, generate_value
+from client.key_value_store_service_pb2 import SetKeyValue, GetValue
+from client.key_value_store_service_pb2_grpc import KeyValueStoreStub
+import matplotlib.pyplot as plt
+
+SERVER_ADDRESS = "localhost:50051"
+VALUE_SIZE = 1024  # Tamaño valor en bytes (1 KB)
+NUM_KEYS = 1000  # Número de claves de prueba
+NUM_CLIENTS = 8  # Hilos cliente con la carga del experimento 3 (50% lectura / 50% escritura)
+DURATION = 10  # Duración de cada medición en segundos
+DURABILITY = "group"
+
+# Configuraciones medidas: intervalo de muestreo del perfilador (None = sin perfilar)
+CONFIGS = [("Sin perfilar", None), ("Perfilando cada 10 ms", 10.0), ("Perfilando cada 1 ms", 1.0)]
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_profiler"
+STACKS_FILE = "benchmark_profiler_stacks.txt"
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+test_keys = [f"key_{i}" for i in range(NUM_KEYS)]
+
+def start_server():
+    print(f"\nIniciando el servidor (durabilidad = {DURABILITY})...")
+    return subprocess.Popen([sys.executable, server_script, "--durability", DURABILITY, "--data-dir", DATA_DIR])
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+# Hilo cliente 50% lectura / 50% escritura, como el experimento 3
+def worker(value, latencies, stop_event):
+    with grpc.insecure_channel(SERVER_ADDRESS) as channel:
+        stub = KeyValueStoreStub(channel)
+        while not stop_event.is_set():
+            key = random.choice(test_keys)
+            start = time.time()
+            if random.random() < 0.5:
+                stub.Get(GetValue(key=key))
+            else:
+                stub.Set(SetKeyValue(key=key, value=value))
+            latencies.append((time.time() - start) * 1000)
+
+def percentile(latencies, p):
+    if not latencies:
+        return 0.0
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+def run_config(value, interval_ms):
+    """ Ejecuta la carga durante DURATION segundos, perfilando el servidor a la vez si interval_ms no es None """
+    latencies = []
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=worker, args=(value, latencies, stop_event)) for _ in range(NUM_CLIENTS)]
+    for thread in threads:
+        thread.start()
+
+    profile = None
+    if interval_ms is None:
+        time.sleep(DURATION)
+    else:
+        client = KVClient()
+        profile = client.profile(DURATION, interval_ms=interval_ms)
+        client.close()
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+
+    return len(latencies) / DURATION, percentile(latencies, 0.5), percentile(latencies, 0.99), profile
+
+def main():
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    server_proc = start_server()
+    results = []
+    try:
+        if wait_for_server_ready() is None:
+            return
+
+        value = generate_value(VALUE_SIZE)
+        client = KVClient()
+        client.set_many([(key, value) for key in test_keys])
+        client.close()
+
+        for name, interval_ms in CONFIGS:
+            print(f"{name} ({NUM_CLIENTS} clientes, {DURATION} s)...")
+            throughput, p50, p99, profile = run_config(value, interval_ms)
+            results.append((name, throughput, p50, p99, profile))
+            # Se guardan las pilas del intervalo por defecto para abrirlas con flamegraph.pl o speedscope
+            if interval_ms == 10.0:
+                with open(STACKS_FILE, "w") as f:
+                    f.write(profile.collapsed_stacks + "\n")
+    finally:
+        stop_server(server_proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    base_throughput = results[0][1]
+    print(f"\nCoste del perfilador ({NUM_CLIENTS} clientes, 50% Lectura / 50% Escritura, durabilidad = {DURABILITY}):")
+    print(f"{'Configuración':>22} | {'Muestras':>8} | {'Rendimiento (ops/s)':>19} | {'Coste':>7} | {'p50 (ms)':>9} | {'p99 (ms)':>9}")
+    print("-" * 89)
+    for name, throughput, p50, p99, profile in results:
+        samples = profile.samples if profile is not None else 0
+        overhead = (1 - throughput / base_throughput) * 100 if base_throughput else 0.0
+        print(f"{name:>22} | {samples:>8} | {throughput:19.2f} | {overhead:6.1f}% | {p50:9.3f} | {p99:9.3f}")
+    print(f"\nPilas colapsadas del perfilado cada 10 ms guardadas en {STACKS_FILE}")
+
+    names = [r[0] for r in results]
+    x = range(len(names))
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    ax1.bar(list(x), [r[1] for r in results])
+    ax1.set_xticks(list(x))
+    ax1.set_xticklabels(names)
+    ax1.set_ylabel("Rendimiento (ops/s)")
+    ax1.set_title("Rendimiento con y sin perfilador")
+    ax1.grid(True, axis="y")
+    ax2.bar([i - 0.2 for i in x], [r[2] for r in results], width=0.4, label="p50")
+    ax2.bar([i + 0.2 for i in x], [r[3] for r in results], width=0.4, label="p99")
+    ax2.set_xticks(list(x))
+    ax2.set_xticklabels(names)
+    ax2.set_ylabel("Latencia (ms)")
+    ax2.set_title("Latencia con y sin perfilador")
+    ax2.legend()
+    ax2.grid(True, axis="y")
+    plt.tight_layout()
+    plt.savefig("benchmark_profiler.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import multiprocessing
+import time
+import random
+import shutil
+import subprocess
+import sys
+import os
+
+from client.lbclient import KVClient, ShardedKVClient, generate_value
+import matplotlib.pyplot as plt
+
+SHARD_COUNTS = [1, 2, 4]  # Procesos shard del servidor
+CLIENT_COUNTS = [1, 4, 16, 32]  # Procesos cliente
+DURATION = 5  # Duración de cada prueba en segundos
+NUM_KEYS = 1000
+VALUE_SIZE = 1024
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_shards"
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+test_keys = [f"key_{i}" for i in range(NUM_KEYS)]
+
+def start_server(shards):
+    print(f"\nIniciando el servidor ({shards} shard(s))...")
+    return subprocess.Popen([sys.executable, server_script, "--shards", str(shards), "--data-dir", DATA_DIR])
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+# Proceso cliente de solo lectura (como experiment3) que envía cada Get directamente a su shard
+def worker_read_only(duration):
+    client = ShardedKVClient()
+    ops = 0
+    total_latency = 0.0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        start = time.time()
+        client.get(random.choice(test_keys))
+        total_latency += time.time() - start
+        ops += 1
+    client.close()
+    return ops, total_latency
+
+def run_test(pool, num_clients):
+    results = pool.map(worker_read_only, [DURATION] * num_clients)
+    ops = sum(r[0] for r in results)
+    avg_latency = sum(r[1] for r in results) / ops * 1000 if ops else 0
+    return avg_latency, ops / DURATION
+
+def run_shards(shards):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    proc = start_server(shards)
+    if wait_for_server_ready() is None:
+        stop_server(proc)
+        return None
+
+    results = []
+    try:
+        client = KVClient()
+        value = generate_value(VALUE_SIZE)
+        client.set_many([(key, value) for key in test_keys])
+        client.close()
+
+        # Los clientes son procesos para que el GIL del propio benchmark no limite el rendimiento
+        with multiprocessing.get_context("spawn").Pool(max(CLIENT_COUNTS)) as pool:
+            for clients in CLIENT_COUNTS:
+                latency, throughput = run_test(pool, clients)
+                print(f"[{shards} shard(s)] {clients} cliente(s) | Latencia promedio: {latency:.3f} ms | Rendimiento: {throughput:.2f} ops/s")
+                results.append((latency, throughput))
+    finally:
+        stop_server(proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+    return results
+
+def main():
+    print(f"Núcleos disponibles: {os.cpu_count()}")
+    results = {}
+    for shards in SHARD_COUNTS:
+        shard_results = run_shards(shards)
+        if shard_results is not None:
+            results[shards] = shard_results
+
+    if not results:
+        return
+
+    print("\nResultados Solo Lectura (ops/s):")
+    print(f"{'Clientes':>8} | " + " | ".join(f"{f'{shards} shard(s)':>12}" for shards in results))
+    print("-" * (11 + 15 * len(results)))
+    for i, clients in enumerate(CLIENT_COUNTS):
+        print(f"{clients:>8} | " + " | ".join(f"{shard_results[i][1]:12.2f}" for shard_results in results.values()))
+
+    plt.figure(figsize=(10, 6))
+    for shards, shard_results in results.items():
+        plt.plot(CLIENT_COUNTS, [thr for _, thr in shard_results], marker='o', label=f"{shards} shard(s)")
+    plt.xscale("log", base=2)
+    plt.xlabel("Número de clientes")
+    plt.ylabel("Rendimiento (ops/s)")
+    plt.title("Rendimiento de solo lectura por número de shards")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig("benchmark_shards.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
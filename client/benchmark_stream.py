@@ -0,0 +1,133 @@
+import threading
+import time
+import shutil
+import subprocess
+import sys
+import os
+
+from client.lbclient import KVClient
+import matplotlib.pyplot as plt
+
+VALUE_SIZES_MB = [8, 32, 64]  # Tamaños de valor (MB), por encima del límite de 6 MB por mensaje
+CHUNK_SIZE = 1024 * 1024  # Tamaño de cada bloque del stream (1 MB)
+STORAGE_MODES = ["memory", "disk"]
+DURABILITY = "group"
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_benchmark_stream"
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+def start_server(storage):
+    print(f"\nIniciando el servidor (almacenamiento = {storage}, durabilidad = {DURABILITY})...")
+    return subprocess.Popen([sys.executable, server_script, "--storage", storage, "--durability", DURABILITY, "--data-dir", DATA_DIR])
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+def rss_mb(pid):
+    """ Memoria residente (VmRSS) del proceso en MB, leída de /proc """
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def peak_rss_growth(pid, operation):
+    """ Ejecuta operation y devuelve (segundos, crecimiento máximo de la memoria del servidor en MB) """
+    baseline = rss_mb(pid)
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], rss_mb(pid))
+            time.sleep(0.01)
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    start = time.time()
+    operation()
+    elapsed = time.time() - start
+    done.set()
+    sampler.join()
+    return elapsed, max(peak[0], rss_mb(pid)) - baseline
+
+def run_mode(storage):
+    """ Sube y descarga por bloques un valor de cada tamaño; devuelve tamaño -> (MB/s subida, MB/s descarga, MB de memoria) """
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    server_proc = start_server(storage)
+    results = {}
+    try:
+        if wait_for_server_ready() is None:
+            return results
+
+        client = KVClient()
+        for size_mb in VALUE_SIZES_MB:
+            print(f"Midiendo valores de {size_mb} MB...")
+            value = os.urandom(size_mb * 1024 * 1024)
+            upload, memory = peak_rss_growth(server_proc.pid, lambda: client.set_stream(f"key_{size_mb}", value, chunk_size=CHUNK_SIZE))
+
+            def download():
+                _, chunks = client.get_stream(f"key_{size_mb}", CHUNK_SIZE)
+                received = sum(len(chunk) for chunk in chunks)
+                assert received == len(value)
+
+            download_time, _ = peak_rss_growth(server_proc.pid, download)
+            results[size_mb] = (size_mb / upload, size_mb / download_time, memory)
+        client.close()
+    finally:
+        stop_server(server_proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+    return results
+
+def main():
+    results = {storage: run_mode(storage) for storage in STORAGE_MODES}
+
+    print(f"\nSetStream / GetStream (bloques de {CHUNK_SIZE // 1024} KB, durabilidad = {DURABILITY}):")
+    print(f"{'Almacenamiento':>14} | {'Tamaño (MB)':>11} | {'Subida (MB/s)':>13} | {'Descarga (MB/s)':>15} | {'Memoria servidor (MB)':>21}")
+    print("-" * 88)
+    for storage in STORAGE_MODES:
+        for size_mb, (upload, download, memory) in results[storage].items():
+            print(f"{storage:>14} | {size_mb:>11} | {upload:13.2f} | {download:15.2f} | {memory:21.1f}")
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    for storage in STORAGE_MODES:
+        sizes = list(results[storage])
+        ax1.plot(sizes, [results[storage][s][0] for s in sizes], marker="o", label=f"Subida ({storage})")
+        ax1.plot(sizes, [results[storage][s][1] for s in sizes], marker="s", linestyle="--", label=f"Descarga ({storage})")
+        ax2.plot(sizes, [results[storage][s][2] for s in sizes], marker="o", label=storage)
+    ax1.set_xlabel("Tamaño del valor (MB)")
+    ax1.set_ylabel("Rendimiento (MB/s)")
+    ax1.set_title("Rendimiento de SetStream y GetStream")
+    ax1.legend()
+    ax1.grid(True)
+    ax2.set_xlabel("Tamaño del valor (MB)")
+    ax2.set_ylabel("Crecimiento de la memoria del servidor (MB)")
+    ax2.set_title("Memoria del servidor durante la subida")
+    ax2.legend()
+    ax2.grid(True)
+    plt.tight_layout()
+    plt.savefig("benchmark_stream.png")
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import bisect
+import hashlib
+import heapq
+import threading
+
+from client import key_value_store_service_pb2 as pb2
+from client.lbclient import KVClient
+
+# Metricas de StatResponse que no se suman al combinar los nodos (las mismas que en server/shard_router.py;
+# el cliente no puede importar ese modulo porque usa las clases protobuf del servidor)
+MAX_FIELDS = ("commit_max_batch_records", "commit_max_latency_ms", "recovery_seconds", "uptime_seconds", "bloom_fpr")
+AVG_FIELDS = ("commit_avg_batch_records", "commit_avg_fsync_ms", "commit_avg_latency_ms")
+
+
+def ring_hash(value):
+    """ Posicion en el anillo (64 bits) de una clave o de un nodo virtual """
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """ Anillo de hashing consistente con nodos virtuales.
+
+    Cada nodo ocupa vnodes posiciones del anillo y una clave pertenece al primer nodo virtual que
+    encuentra en sentido horario. Al añadir o quitar un nodo solo cambian de dueño las claves de
+    los tramos que gana o pierde (aproximadamente 1/N del total).
+    """
+
+    def __init__(self, nodes=(), vnodes=128):
+        self.vnodes = vnodes
+        self._points = []
+        self._owners = []
+        self.nodes = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.vnodes):
+            point = ring_hash(f"{node}#{i}")
+            position = bisect.bisect(self._points, point)
+            self._points.insert(position, point)
+            self._owners.insert(position, node)
+
+    def remove(self, node):
+        self.nodes.remove(node)
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, key):
+        if not self._points:
+            raise ValueError("El anillo no tiene nodos")
+        position = bisect.bisect(self._points, ring_hash(key)) % len(self._points)
+        return self._owners[position]
+
+
+class ClusterKVClient:
+    """ Cliente para varios servidores lbserver independientes repartidos con hashing consistente.
+
+    Las operaciones sobre una clave van al nodo propietario; get_prefix, count_prefix, scan y stat
+    se envian a todos los nodos y se combinan. add_node y remove_node mueven solo las claves que
+    cambian de dueño. Como el servidor no tiene borrado, el nodo de origen conserva una copia
+    obsoleta de las claves movidas; las consultas a todos los nodos la descartan porque solo
+    aceptan de cada nodo las claves que le pertenecen segun el anillo. Los movimientos solo tienen
+    en cuenta las escrituras hechas con este mismo cliente (ver _move_keys).
+    """
+
+    def __init__(self, nodes, vnodes=128):
+        self.ring = HashRing(nodes, vnodes)
+        self.clients = {node: KVClient(node) for node in nodes}
+
+        # Durante add_node y remove_node: anillo al que se cambiara y claves que cambian de dueño
+        # escritas desde que empezo la copia. Las escrituras de esas claves toman move_lock
+        self._moving = None
+        self._dirty = set()
+        self._move_lock = threading.Lock()
+        # Movimientos empezados: una escritura sin move_lock durante la que empieza uno se anota al terminar
+        self._moves = 0
+
+    def _client(self, key):
+        return self.clients[self.ring.node_for(key)]
+
+    def _group_by_node(self, keys, ring=None):
+        """ Devuelve nodo -> posiciones de las claves que le corresponden (en el anillo actual o en ring) """
+        ring = ring or self.ring
+        groups = {}
+        for position, key in enumerate(keys):
+            groups.setdefault(ring.node_for(key), []).append(position)
+        return groups
+
+    def _moving_keys(self, keys):
+        """ Claves que cambian de dueño en el movimiento en curso (ninguna si no hay movimiento) """
+        moving = self._moving
+        if moving is None:
+            return []
+        return [key for key in keys if moving.node_for(key) != self.ring.node_for(key)]
+
+    def _mark_dirty(self, keys):
+        """ Anota las claves escritas durante el movimiento en curso para volver a copiarlas antes del cambio de anillo """
+        with self._move_lock:
+            self._dirty.update(self._moving_keys(keys))
+
+    def get(self, key):
+        return self._client(key).get(key)
+
+    def set(self, key, value):
+        moves = self._moves
+        if not self._moving_keys([key]):
+            response = self._client(key).set(key, value)
+            if self._moves != moves:
+                # Empezo un movimiento mientras tanto: la copia pudo leer la clave antes de esta escritura
+                self._mark_dirty([key])
+            return response
+        with self._move_lock:
+            self._dirty.update(self._moving_keys([key]))
+            return self._client(key).set(key, value)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        values = [None] * len(keys)
+        for node, positions in self._group_by_node(keys).items():
+            for position, value in zip(positions, self.clients[node].get_many([keys[i] for i in positions])):
+                values[position] = value
+        return values
+
+    def set_many(self, items, max_batch_bytes=4 * 1024 * 1024):
+        if isinstance(items, dict):
+            items = items.items()
+        items = list(items)
+        keys = [key for key, _ in items]
+        moves = self._moves
+        if not self._moving_keys(keys):
+            status = self._set_many(items, max_batch_bytes)
+            if self._moves != moves:
+                self._mark_dirty(keys)
+            return status
+        with self._move_lock:
+            self._dirty.update(self._moving_keys(keys))
+            return self._set_many(items, max_batch_bytes)
+
+    def _set_many(self, items, max_batch_bytes):
+        status = [False] * len(items)
+        for node, positions in self._group_by_node([key for key, _ in items]).items():
+            node_status = self.clients[node].set_many([items[i] for i in positions], max_batch_bytes)
+            for position, ok in zip(positions, node_status):
+                status[position] = ok
+        return status
+
+    def _owned(self, node, items):
+        """ Filtra los pares (clave, valor) de un nodo dejando solo las claves que le pertenecen """
+        return ((key, value) for key, value in items if self.ring.node_for(key) == node)
+
+    def get_prefix(self, prefix):
+        """ Consulta el prefijo en todos los nodos y devuelve una GetPrefixResponse con los resultados en orden """
+        calls = {node: client.stub.GetPrefixKey.future(pb2.GetPrefix(prefixKey=prefix)) for node, client in self.clients.items()}
+        items = heapq.merge(*(self._owned(node, zip(call.result().keys, call.result().values)) for node, call in calls.items()))
+        keys = []
+        values = []
+        for key, value in items:
+            keys.append(key)
+            values.append(value)
+        return pb2.GetPrefixResponse(keys=keys, values=values, count=len(keys))
+
+    def count_prefix(self, prefix):
+        """ Cuenta las claves con el prefijo (recorriendo solo las claves para descartar copias obsoletas) """
+        return sum(
+            sum(1 for key in client.get_prefix_keys(prefix) if self.ring.node_for(key) == node)
+            for node, client in self.clients.items()
+        )
+
+    def scan(self, start_key="", end_key="", limit=0, reverse=False, keys_only=False):
+        """ Itera en orden sobre los pares del intervalo [start_key, end_key) de todos los nodos """
+        streams = [
+            self._owned(node, client.scan(start_key, end_key, 0, reverse, keys_only))
+            for node, client in self.clients.items()
+        ]
+        for returned, item in enumerate(heapq.merge(*streams, reverse=reverse)):
+            if limit and returned == limit:
+                return
+            yield item
+
+    def stat(self):
+        """ Combina las estadisticas de todos los nodos (contadores sumados, maximos y medias ponderadas).
+
+        keys incluye las copias obsoletas que quedan en los nodos de origen tras mover claves.
+        """
+        responses = [call.result() for call in [client.stub.Stat.future(pb2.StatRequest()) for client in self.clients.values()]]
+        merged = pb2.StatResponse()
+        records = sum(r.commit_records for r in responses) or 1
+        for field in pb2.StatResponse.DESCRIPTOR.fields:
+            name = field.name
+            values = [getattr(r, name) for r in responses]
+            if field.message_type is not None and field.message_type.GetOptions().map_entry:
+                # Mapas de contadores (errores por RPC): se suma cada entrada
+                for counts in values:
+                    for key, count in counts.items():
+                        getattr(merged, name)[key] += count
+                continue
+            if name in MAX_FIELDS:
+                value = max(values)
+            elif name in AVG_FIELDS:
+                value = sum(getattr(r, name) * r.commit_records for r in responses) / records
+            elif field.type == field.TYPE_BOOL:
+                value = all(values)
+            elif field.type == field.TYPE_STRING:
+                value = max(values) if name in ("last_fsync", "last_snapshot") else values[0]
+            else:
+                value = sum(values)
+            setattr(merged, name, value)
+        return merged
+
+    def _copy_batch(self, batch, ring):
+        """ Escribe cada par (clave, valor) en su dueño segun el anillo dado """
+        for node, positions in self._group_by_node([key for key, _ in batch], ring).items():
+            self.clients[node].set_many([batch[i] for i in positions])
+
+    def _move_keys(self, sources, updated, batch_size=500):
+        """ Copia a su dueño en updated las claves de cada nodo de sources que cambian de dueño y pasa al anillo updated.
+
+        La copia se hace con el anillo actual en uso: las lecturas y escrituras siguen yendo al
+        dueño anterior y nadie mas escribe en los nuevos dueños, asi que la copia no puede pisar un
+        valor mas reciente. Las claves que este cliente escribe mientras tanto (o que estaba
+        escribiendo al empezar) se anotan y, con move_lock tomado (sin escrituras de claves que se
+        mueven en curso), se vuelven a copiar desde el dueño anterior justo antes de cambiar de
+        anillo. Las copias obsoletas que ya tenia el nodo (de movimientos anteriores) no se tocan.
+        Devuelve cuantas claves se movieron.
+        """
+        previous = self.ring
+        with self._move_lock:
+            self._moving = updated
+            self._dirty = set()
+            self._moves += 1
+        moved = 0
+        for node in sources:
+            batch = []
+            for key, value in self.clients[node].scan():
+                if previous.node_for(key) == node and updated.node_for(key) != node:
+                    batch.append((key, value))
+                if len(batch) == batch_size:
+                    self._copy_batch(batch, updated)
+                    moved += len(batch)
+                    batch = []
+            if batch:
+                self._copy_batch(batch, updated)
+                moved += len(batch)
+
+        with self._move_lock:
+            dirty = list(self._dirty)
+            for node, positions in self._group_by_node(dirty, previous).items():
+                keys = [dirty[i] for i in positions]
+                values = self.clients[node].get_many(keys)
+                self._copy_batch([(key, value) for key, value in zip(keys, values) if value is not None], updated)
+            self.ring = updated
+            self._moving = None
+        return moved
+
+    def add_node(self, node):
+        """ Añade un nodo al anillo y le copia las claves que pasa a poseer; devuelve cuantas claves se movieron """
+        updated = HashRing(self.ring.nodes, self.ring.vnodes)
+        updated.add(node)
+        self.clients[node] = KVClient(node)
+        return self._move_keys(list(self.ring.nodes), updated)
+
+    def remove_node(self, node):
+        """ Quita un nodo del anillo y reparte sus claves entre los demas; devuelve cuantas claves se movieron """
+        updated = HashRing(self.ring.nodes, self.ring.vnodes)
+        updated.remove(node)
+        moved = self._move_keys([node], updated)
+        self.clients.pop(node).close()
+        return moved
+
+    def close(self):
+        for client in self.clients.values():
+            client.close()
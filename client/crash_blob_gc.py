@@ -0,0 +1,103 @@
+import os
+import shutil
+import sys
+
+from client.lbclient import generate_value
+
+NUM_KEYS = 20
+VALUE_SIZE = 100 * 1024  # Por encima del umbral de blobs: todos los valores van al log de blobs
+SEGMENT_MAX_BYTES = 512 * 1024  # Segmentos pequeños para tener varios sellados con pocas claves
+STORAGES = ["memory", "disk"]
+
+# Directorio de datos propio y copias del directorio en cada punto de fallo simulado
+DATA_DIR = "./server/data_crash_blob_gc"
+CRASH_DIR = "./server/data_crash_blob_gc_copy"
+
+server_dir = os.path.abspath("./server")
+
+test_keys = [f"key_{i}" for i in range(NUM_KEYS)]
+
+# Puntos de la recoleccion de basura del log de blobs en los que se simula la caida del proceso
+CRASH_POINTS = ["antes del renombrado", "despues del renombrado"]
+
+def open_server(data_dir, storage):
+    from lbserver import KeyValueServer
+    kv_server = KeyValueServer(durability="always", data_dir=data_dir, use_snapshots=False, legacy_path=None,
+                               storage=storage, segment_max_bytes=SEGMENT_MAX_BYTES, compaction_rate_bytes=0)
+    # Los compactadores de fondo se detienen: la prueba lanza la compactacion del log de blobs
+    kv_server.compactor.stop()
+    kv_server.blob_compactor.stop()
+    return kv_server
+
+def crash_copy():
+    """ Copia el directorio de datos tal como lo encontraria el servidor si el proceso muriera ahora """
+    shutil.rmtree(CRASH_DIR, ignore_errors=True)
+    shutil.copytree(DATA_DIR, CRASH_DIR)
+
+def hook_crash(compactor, point):
+    """ Envuelve las funciones del compactador para copiar el directorio de datos en el punto de fallo """
+    if point == "antes del renombrado":
+        # Los punteros nuevos ya son durables, pero la nueva generacion aun no existe
+        before_install = compactor.before_install
+        def hooked(moved):
+            before_install(moved)
+            crash_copy()
+        compactor.before_install = hooked
+    else:
+        # relocate se llama justo despues de renombrar la nueva generacion
+        relocate = compactor.relocate
+        copied = []
+        def hooked(key, old_blob, new_blob):
+            if not copied:
+                crash_copy()
+                copied.append(True)
+            return relocate(key, old_blob, new_blob)
+        compactor.relocate = hooked
+
+def run(storage, point):
+    """ Compacta un segmento de blobs simulando la caida en el punto dado; devuelve las claves perdidas o dañadas """
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    shutil.rmtree(CRASH_DIR, ignore_errors=True)
+    expected = {}
+    kv_server = open_server(DATA_DIR, storage)
+    try:
+        for key in test_keys:
+            expected[key] = generate_value(VALUE_SIZE).encode("utf-8")
+            kv_server.apply_set(key, expected[key])
+        # Sobrescribimos la mitad de las claves para que los segmentos sellados tengan bytes muertos
+        for key in test_keys[::2]:
+            expected[key] = generate_value(VALUE_SIZE).encode("utf-8")
+            kv_server.apply_set(key, expected[key])
+        compactor = kv_server.blob_compactor
+        segment = next(s for s in kv_server.blob_log.compactable_segments() if 0 < kv_server.blob_log.dead_ratio(s) < 1)
+        hook_crash(compactor, point)
+        compactor.compact_segment(segment)
+        # El servidor que sigue en marcha tambien debe leer los valores desde la nueva generacion
+        lost = [key for key in test_keys if kv_server.read_value(key) != expected[key]]
+    finally:
+        kv_server.shutdown()
+
+    recovered = open_server(CRASH_DIR, storage)
+    try:
+        return lost + [key for key in test_keys if recovered.read_value(key) != expected[key] and key not in lost]
+    finally:
+        recovered.shutdown()
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+        shutil.rmtree(CRASH_DIR, ignore_errors=True)
+
+def main():
+    sys.path.insert(0, server_dir)
+    failed = False
+    for storage in STORAGES:
+        for point in CRASH_POINTS:
+            lost = run(storage, point)
+            print(f"Almacenamiento = {storage}, caida {point}: {len(lost)} de {NUM_KEYS} claves perdidas o dañadas")
+            if lost:
+                print(f"  {', '.join(lost)}")
+                failed = True
+    if failed:
+        sys.exit(1)
+    print("\nLa recuperacion conserva todas las claves en todos los puntos de fallo.")
+
+if __name__ == "__main__":
+    main()
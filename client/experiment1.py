@@ -1,27 +1,38 @@
 import time
 import random
 import statistics
-from client.lbclient import KVClient, generate_value
+from client.lbclient import KVClient, generate_value, summarize_traces
 import matplotlib.pyplot as plt
 
+import shutil
 import subprocess
 import sys
 import os
 
 from concurrent.futures import ThreadPoolExecutor # Necesario para gestionar los hilos
 
+# Fases del servidor que se muestran en el desglose de los Set (el fsync va incluido en log_append
+# y el tiempo que no se mide en el servidor es 'transport')
+SET_PHASES = ["decode", "lock_wait", "encode", "log_append", "response_build", "transport"]
+
 KEY_COUNT = 1000
 ITERATIONS = 100
 
 VALUE_SIZES = [512, 4096, 524288, 1048576, 4194304]  # bytes
+DURABILITY_MODES = ["always", "group", "interval", "none"]  # Modos de durabilidad del servidor
+
+# Directorio de datos propio: cada modo empieza con el almacén vacío, sin reproducir el log de los anteriores
+DATA_DIR = "./server/data_experiment1"
 
 server_script = os.path.abspath("./server/lbserver.py")
 
 
-def start_server():
-    print("\nIniciando el servidor...")
+def start_server(durability="group"):
+    print(f"\nIniciando el servidor (durabilidad = {durability})...")
     # sys.executable asegura que se use el mismo intérprete Python
-    return subprocess.Popen([sys.executable, server_script])
+    data_dir = os.path.join(DATA_DIR, durability)
+    shutil.rmtree(data_dir, ignore_errors=True)
+    return subprocess.Popen([sys.executable, server_script, "--durability", durability, "--data-dir", data_dir])
 
 def stop_server(proc):
     print("\nDeteniendo el servidor...")
@@ -82,35 +93,36 @@ def benchmark_mixed(client, keys, value):
             print(f"[MIXED] {i + 1}/{ITERATIONS} | OPERACION = {operation_type} | Key = {key} | Latencia = {(end - start):.6f}s")
     return latencies
 
-def run_experiment():
+def run_mode(durability):
+    """ Ejecuta las dos cargas de trabajo para todos los tamaños de valor con un modo de durabilidad """
     # Inicia el servidor
-    proc = start_server()
+    proc = start_server(durability)
         
         # Espera a que el servidor esté listo
     wait_time = wait_for_server_ready()
     if wait_time is None:
             print("No se pudo iniciar el servidor. Abortando.")
-            return
+            stop_server(proc)
+            return None
     try: 
-        client = KVClient()
+        # Con trace=True el servidor devuelve la duracion de cada fase de las peticiones
+        client = KVClient(trace=True)
         keys = [f"key{i}" for i in range(KEY_COUNT)]
 
         print("Inicializando claves...")
-        for i, key in enumerate(keys):
-            client.set(key, "init")
-            if (i + 1) % 100 == 0:
-                print(f" - {i + 1} claves inicializadas")
+        client.set_many([(key, "init") for key in keys])
+        print(f" - {len(keys)} claves inicializadas")
 
         read_only_results = []
         mixed_results = []
+        set_phase_results = []
 
         for size in VALUE_SIZES:
-            print(f"\n== Tamaño de valor: {size // 1024} KB ==")
+            print(f"\n== [{durability}] Tamaño de valor: {size // 1024} KB ==")
             value = generate_value(size)
 
             print("Sobrescribiendo claves con el nuevo valor...")
-            for i, key in enumerate(keys):
-                client.set(key, value)
+            client.set_many([(key, value) for key in keys])
             print(" - Claves actualizadas.")
 
             print(">> Cargando solo lectura...")
@@ -120,33 +132,78 @@ def run_experiment():
             print(f"[READ ONLY] Latencia promedio: {read_avg:.6f}s")
 
             print(">> Carga 50% lectura / 50% escritura...")
+            client.traces.clear()
             mixed_latencies = benchmark_mixed(client, keys, value)
             mixed_avg = statistics.mean(mixed_latencies)
             mixed_results.append(mixed_avg)
             print(f"[MIXED] Latencia promedio: {mixed_avg:.6f}s")
 
-        client.close()
+            # Desglose de los Set de la carga mixta segun las trazas del servidor
+            set_phases = summarize_traces(client.traces, "Set")
+            set_phase_results.append(set_phases)
+            breakdown = " | ".join(f"{phase} = {set_phases.get(phase, 0.0):.3f}" for phase in SET_PHASES)
+            print(f"[MIXED] Fases de Set (ms): {breakdown} | total = {set_phases.get('client', 0.0):.3f}")
 
-        # Graficar resultados
-        sizes_kb = [s // 1024 for s in VALUE_SIZES]
-        plt.figure(figsize=(10, 6))
-        plt.plot(sizes_kb, read_only_results, marker='o', label="Solo lectura")
-        plt.plot(sizes_kb, mixed_results, marker='s', label="Lectura/Escritura 50/50")
-
-        plt.title("Latencia promedio vs Tamaño del valor")
-        plt.xlabel("Tamaño del valor (KB)")
-        plt.ylabel("Latencia promedio (segundos)")
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
-        plt.savefig("experimento1_latencias.png")
-        plt.show()
+        stats = client.stat()
+        print(f"[{durability}] Ultimo fsync: {stats.last_fsync or '-'} | Registros por lote: {stats.commit_avg_batch_records:.2f}")
+
+        client.close()
+        return read_only_results, mixed_results, set_phase_results
     except Exception as e:
         print(f"{e}")
+        return None
 
     finally:
         # Detener el servidor al finalizar
         stop_server(proc)
 
+def run_experiment():
+    results = {}
+    for durability in DURABILITY_MODES:
+        mode_results = run_mode(durability)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+        if mode_results is not None:
+            results[durability] = mode_results
+
+    if not results:
+        return
+
+    # Graficar resultados: una curva por modo de durabilidad y carga de trabajo
+    sizes_kb = [s // 1024 for s in VALUE_SIZES]
+    plt.figure(figsize=(10, 6))
+    for durability, (read_only_results, mixed_results, _) in results.items():
+        plt.plot(sizes_kb, read_only_results, marker='o', linestyle='--', label=f"Solo lectura ({durability})")
+        plt.plot(sizes_kb, mixed_results, marker='s', label=f"Lectura/Escritura 50/50 ({durability})")
+
+    plt.title("Latencia promedio vs Tamaño del valor por modo de durabilidad")
+    plt.xlabel("Tamaño del valor (KB)")
+    plt.ylabel("Latencia promedio (segundos)")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig("experimento1_latencias.png")
+    plt.show()
+
+    # Desglose por fases de la latencia media de Set: una grafica por modo de durabilidad
+    fig, axes = plt.subplots(1, len(results), figsize=(5 * len(results), 5), sharey=True, squeeze=False)
+    positions = range(len(VALUE_SIZES))
+    for ax, (durability, (_, _, set_phase_results)) in zip(axes[0], results.items()):
+        bottom = [0.0] * len(VALUE_SIZES)
+        for phase in SET_PHASES:
+            heights = [phases.get(phase, 0.0) for phases in set_phase_results]
+            ax.bar(positions, heights, bottom=bottom, label=phase)
+            bottom = [b + h for b, h in zip(bottom, heights)]
+        ax.set_xticks(list(positions))
+        ax.set_xticklabels([f"{kb} KB" for kb in sizes_kb])
+        ax.set_title(f"Set ({durability})")
+        ax.set_xlabel("Tamaño del valor")
+        ax.grid(True, axis="y")
+    axes[0][0].set_ylabel("Latencia media (ms)")
+    axes[0][-1].legend()
+    fig.suptitle("Fases de la latencia de Set medidas por el servidor")
+    fig.tight_layout()
+    fig.savefig("experimento1_fases_set.png")
+    plt.show()
+
 if __name__ == "__main__":
     run_experiment()
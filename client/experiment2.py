@@ -1,4 +1,5 @@
 import time
+import shutil
 import subprocess
 import os
 import random
@@ -8,51 +9,83 @@ import matplotlib.pyplot as plt
 
 NUM_KEYS = 10000
 VALUE_SIZE = 4096
+LARGE_VALUE_SIZE = 1024 * 1024  # Tamaño de los valores grandes (1 MB)
+LARGE_EVERY = 100  # Una de cada LARGE_EVERY claves tiene un valor grande
 HOT_READS = 1000
+SNAPSHOT_INTERVAL = 5  # Segundos entre snapshots del servidor
+# En modo 'disk' los valores se leen del log y solo los del cache de valores del servidor están en
+# memoria: la lectura en caliente repite claves ya leídas y la lectura en frío las lee tras reiniciar
+STORAGE = "disk"
+CACHE_MB = 64  # Presupuesto del cache de valores del servidor
+
+# Umbral del log de blobs en KB: 0 guarda los valores grandes en el log principal
+BLOB_THRESHOLDS_KB = [0, 64]
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_experiment2"
 
 server_script = os.path.abspath("./server/lbserver.py")
 
+def value_size(i):
+    return LARGE_VALUE_SIZE if i % LARGE_EVERY == 0 else VALUE_SIZE
+
 def populate_store(client):
-    print(f"Ingresando {NUM_KEYS} claves de {VALUE_SIZE} bytes...")
+    print(f"Ingresando {NUM_KEYS} claves de {VALUE_SIZE} bytes (una de cada {LARGE_EVERY} de {LARGE_VALUE_SIZE // 1024} KB)...")
     for i in range(NUM_KEYS):
         key = f"key_{i}"
-        value = generate_value(VALUE_SIZE)
+        value = generate_value(value_size(i))
         client.set(key, value)
         if (i + 1) % 1000 == 0:
             print(f" - {i + 1}/{NUM_KEYS} claves insertadas")
     print("Población del almacén completada.")
 
-def measure_latency(client, description):
+def warm_cache(client, keys):
+    print(f"\nCalentando el cache del servidor con {len(keys)} lecturas...")
+    for key in keys:
+        client.get(key)
+
+def cache_counters(client):
+    stats = client.stat()
+    return stats.cache_hits, stats.cache_misses
+
+def measure_latency(client, description, keys):
     print(f"\n=== Mediciones de {description} ===")
-    print(f"Midendo latencia con {HOT_READS} lecturas aleatorias...")
+    print(f"Midendo latencia con {len(keys)} lecturas aleatorias...")
+    hits_before, misses_before = cache_counters(client)
     total_time = 0
-    for i in range(HOT_READS):
-        key = f"key_{random.randint(0, NUM_KEYS - 1)}"
+    for i, key in enumerate(keys):
         start = time.time()
         client.get(key)
         latency = time.time() - start
         total_time += latency
         if (i + 1) % 100 == 0:
             print(f"[{description}] {i + 1}/{HOT_READS} | Key = {key} | Latencia = {latency * 1000:.3f} ms")
-    avg_latency = (total_time / HOT_READS) * 1000
-    print(f"Latencia promedio: {avg_latency:.3f} ms")
-    return avg_latency
+    avg_latency = (total_time / len(keys)) * 1000
+    hits, misses = (after - before for after, before in zip(cache_counters(client), (hits_before, misses_before)))
+    hit_rate = hits / (hits + misses) * 100 if hits + misses else 0.0
+    print(f"Latencia promedio: {avg_latency:.3f} ms | Aciertos del cache: {hit_rate:.1f}%")
+    return avg_latency, hit_rate
 
-def plot_latency_results(hot_latency, cold_latency, restart_duration):
-    labels = ['Latencia en caliente (ms)', 'Latencia en frío (ms)', 'Reinicio del servidor (s)']
-    values = [hot_latency, cold_latency, restart_duration]
-    colors = ['#4caf50', '#2196f3', '#f44336']
+def plot_latency_results(results):
+    labels = ['Latencia en caliente (ms)', 'Latencia en frío (ms)', 'Reinicio reproduciendo el log (s)', 'Reinicio desde snapshot (s)']
+    width = 0.8 / len(results)
 
     fig, ax = plt.subplots()
-    bars = ax.bar(labels, values, color=colors)
-
-    for bar in bars:
-        height = bar.get_height()
-        ax.annotate(f'{height:.2f}',
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3),
-                    textcoords="offset points",
-                    ha='center', va='bottom')
+    for n, (threshold_kb, values) in enumerate(results.items()):
+        name = f"Blobs desde {threshold_kb} KB" if threshold_kb else "Sin log de blobs"
+        positions = [i + (n - (len(results) - 1) / 2) * width for i in range(len(labels))]
+        bars = ax.bar(positions, values, width=width, label=name)
+
+        for bar in bars:
+            height = bar.get_height()
+            ax.annotate(f'{height:.2f}',
+                        xy=(bar.get_x() + bar.get_width() / 2, height),
+                        xytext=(0, 3),
+                        textcoords="offset points",
+                        ha='center', va='bottom')
+    ax.set_xticks(range(len(labels)))
+    ax.set_xticklabels(labels)
+    ax.legend()
 
     ax.set_ylabel('Tiempo (ms / s)')
     ax.set_title('Comparación de latencia y tiempo de reinicio')
@@ -63,9 +96,12 @@ def plot_latency_results(hot_latency, cold_latency, restart_duration):
     plt.savefig("experimento2_resultados.png")
     plt.show()
 
-def start_server():
-    print("\nIniciando el servidor...")
-    return subprocess.Popen([sys.executable, server_script])
+def start_server(blob_threshold_kb, recovery="snapshot"):
+    print(f"\nIniciando el servidor (recuperación = {recovery}, umbral de blobs = {blob_threshold_kb} KB)...")
+    return subprocess.Popen([sys.executable, server_script, "--recovery", recovery,
+                             "--snapshot-interval", str(SNAPSHOT_INTERVAL), "--storage", STORAGE,
+                             "--blob-threshold-kb", str(blob_threshold_kb), "--cache-mb", str(CACHE_MB),
+                             "--data-dir", DATA_DIR])
 
 def stop_server(proc):
     print("\nDeteniendo el servidor...")
@@ -88,44 +124,101 @@ def wait_for_server_ready(timeout=120):
     print("El servidor no respondió a tiempo.")
     return None
 
-def run_experiment():
-    proc = start_server()
+def wait_for_snapshot(client, previous_snapshots, timeout=300):
+    """ Espera a que el servidor cree un snapshot posterior a las escrituras realizadas """
+    print("Esperando a que el servidor cree un snapshot...")
+    start = time.time()
+    while time.time() - start < timeout:
+        if client.stat().snapshots > previous_snapshots:
+            print("Snapshot creado.")
+            return True
+        time.sleep(0.5)
+    print("El servidor no creó el snapshot a tiempo.")
+    return False
+
+def measure_restart(blob_threshold_kb, recovery):
+    """ Reinicia el servidor con el modo de recuperación dado y mide el tiempo hasta atender peticiones """
+    start_restart = time.time()
+    proc = start_server(blob_threshold_kb, recovery)
+    restart_time = wait_for_server_ready()
+    if restart_time is None:
+        stop_server(proc)
+        return proc, None, None
+    restart_duration = time.time() - start_restart
+
+    client = KVClient()
+    stats = client.stat()
+    client.close()
+    print(f"\nEl servidor tardó {restart_duration:.3f} segundos en reiniciarse y responder "
+          f"(recuperación interna: {stats.recovery_seconds:.3f} s, desde snapshot: {stats.recovered_from_snapshot}).")
+    return proc, restart_duration, stats.recovery_seconds
+
+def run_experiment(blob_threshold_kb):
+    """ Mide latencias, aciertos del cache y tiempos de reinicio con el umbral de blobs dado; devuelve los valores o None """
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    proc = start_server(blob_threshold_kb)
     time.sleep(2)
 
     if wait_for_server_ready() is None:
         stop_server(proc)
-        return
+        return None
 
     client = KVClient()
+    snapshots_before = client.stat().snapshots
     populate_store(client)
 
-    hot_latency = measure_latency(client, "lectura en caliente")
+    # Las mismas claves se leen en caliente (ya en el cache) y en frío (tras reiniciar, con el cache vacío)
+    keys = [f"key_{random.randint(0, NUM_KEYS - 1)}" for _ in range(HOT_READS)]
+    warm_cache(client, keys)
+    hot_latency, hot_hit_rate = measure_latency(client, "lectura en caliente", keys)
+
+    # Nos aseguramos de que exista un snapshot que cubra la población del almacén
+    wait_for_snapshot(client, snapshots_before)
     client.close()
 
     stop_server(proc)
 
-    print("\nReiniciando servidor para medir latencias en frío...")
-    start_restart = time.time()
-    proc = start_server()
-    restart_time = wait_for_server_ready()
-    if restart_time is None:
-        stop_server(proc)
-        return
-    restart_duration = time.time() - start_restart
-    print(f"\nEl servidor tardó {restart_duration:.3f} segundos en reiniciarse y responder.")
+    print("\nReiniciando servidor reproduciendo todo el log...")
+    proc, restart_replay, recovery_replay = measure_restart(blob_threshold_kb, "replay")
+    if restart_replay is None:
+        return None
+    stop_server(proc)
+
+    print("\nReiniciando servidor desde el último snapshot para medir latencias en frío...")
+    proc, restart_snapshot, recovery_snapshot = measure_restart(blob_threshold_kb, "snapshot")
+    if restart_snapshot is None:
+        return None
 
     client = KVClient()
-    cold_latency = measure_latency(client, "lectura en frío")
+    cold_latency, cold_hit_rate = measure_latency(client, "lectura en frío", keys)
     client.close()
 
     stop_server(proc)
-
-    print("\n===== COMPARACIÓN FINAL =====")
-    print(f"Lectura en caliente: {hot_latency:.3f} ms")
-    print(f"Lectura en frío:    {cold_latency:.3f} ms")
-    print(f"Tiempo de reinicio: {restart_duration:.3f} segundos")
-
-    plot_latency_results(hot_latency, cold_latency, restart_duration)
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    print(f"\n===== RESULTADOS (umbral de blobs = {blob_threshold_kb} KB) =====")
+    print(f"Lectura en caliente: {hot_latency:.3f} ms (aciertos del cache {hot_hit_rate:.1f}%)")
+    print(f"Lectura en frío:    {cold_latency:.3f} ms (aciertos del cache {cold_hit_rate:.1f}%)")
+    print(f"Reinicio reproduciendo el log: {restart_replay:.3f} segundos (recuperación {recovery_replay:.3f} s)")
+    print(f"Reinicio desde snapshot:       {restart_snapshot:.3f} segundos (recuperación {recovery_snapshot:.3f} s)")
+    return hot_latency, cold_latency, restart_replay, restart_snapshot, recovery_replay, recovery_snapshot, hot_hit_rate, cold_hit_rate
+
+def main():
+    results = {}
+    for blob_threshold_kb in BLOB_THRESHOLDS_KB:
+        result = run_experiment(blob_threshold_kb)
+        if result is None:
+            return
+        results[blob_threshold_kb] = result
+
+    print(f"\n===== COMPARACIÓN FINAL (almacenamiento = {STORAGE}, cache = {CACHE_MB} MB) =====")
+    print(f"{'Configuración':>20} | {'Caliente (ms)':>13} | {'Frío (ms)':>9} | {'Aciertos caliente / frío':>24} | {'Reinicio replay (s)':>19} | {'Reinicio snapshot (s)':>21} | {'Recuperación replay / snapshot (s)':>34}")
+    print("-" * 160)
+    for blob_threshold_kb, (hot, cold, replay, snapshot, recovery_replay, recovery_snapshot, hot_hits, cold_hits) in results.items():
+        name = f"Blobs desde {blob_threshold_kb} KB" if blob_threshold_kb else "Sin log de blobs"
+        print(f"{name:>20} | {hot:13.3f} | {cold:9.3f} | {hot_hits:10.1f}% / {cold_hits:10.1f}% | {replay:19.3f} | {snapshot:21.3f} | {recovery_replay:16.3f} / {recovery_snapshot:15.3f}")
+
+    plot_latency_results({threshold: values[:4] for threshold, values in results.items()})
 
 if __name__ == "__main__":
-    run_experiment()
+    main()
@@ -5,6 +5,7 @@ import random
 import string
 import matplotlib.pyplot as plt
 
+import shutil
 import subprocess
 import sys
 import os
@@ -21,15 +22,21 @@ VALUE_SIZE = 1024  # Tamaño valor en bytes (1 KB)
 NUM_KEYS = 1000  # Número de claves de prueba
 DURATION = 10  # Duración del test en segundos
 CLIENT_COUNTS = [1, 2, 4, 8, 16, 32]  # Diferentes números de clientes
+DURABILITY_MODES = ["always", "group", "interval", "none"]  # Modos de durabilidad del servidor
+
+# Directorio de datos propio: cada modo empieza con el almacén vacío, sin reproducir el log de los anteriores
+DATA_DIR = "./server/data_experiment3"
 
 # Generar claves y valores de prueba aleatorios
 test_keys = [f"key_{i}" for i in range(NUM_KEYS)]
 test_values = [''.join(random.choices(string.ascii_letters, k=VALUE_SIZE)) for _ in range(NUM_KEYS)]
 
-def start_server():
-    print("\nIniciando el servidor...")
+def start_server(durability="group"):
+    print(f"\nIniciando el servidor (durabilidad = {durability})...")
     # sys.executable asegura que se use el mismo intérprete Python
-    return subprocess.Popen([sys.executable, server_script])
+    data_dir = os.path.join(DATA_DIR, durability)
+    shutil.rmtree(data_dir, ignore_errors=True)
+    return subprocess.Popen([sys.executable, server_script, "--durability", durability, "--data-dir", data_dir])
 
 def stop_server(proc):
     print("\nDeteniendo el servidor...")
@@ -161,27 +168,38 @@ def run_test(num_clients, read_only=True):
     return avg_latency, throughput
 
 
-def main():
+def print_results(title, results):
+    print(f"\n{title}:")
+    print(f"{'Clientes':>8} | {'Latencia (ms)':>15} | {'Rendimiento (ops/s)':>20}")
+    print("-" * 50)
+    for i, clients in enumerate(CLIENT_COUNTS):
+        lat, thr = results[i]
+        print(f"{clients:>8} | {lat:15.3f} | {thr:20.2f}")
+
+
+def run_mode(durability):
+    """ Ejecuta ambas cargas para todos los números de clientes con un modo de durabilidad """
     results_read = []
     results_mixed = []
     
     # Inicia el servidor
-    proc = start_server()
+    proc = start_server(durability)
         
     # Espera a que el servidor esté listo
     wait_time = wait_for_server_ready()
     if wait_time is None:
         print("No se pudo iniciar el servidor. Abortando.")
-        return
+        stop_server(proc)
+        return None
 
-    print("== Experimento Solo Lectura ==")
+    print(f"== [{durability}] Experimento Solo Lectura ==")
     for clients in CLIENT_COUNTS:
         print(f"{clients} cliente(s)...")
         latency, throughput = run_test(clients, read_only=True)
         print(f"Latencia promedio: {latency:.3f} ms | Rendimiento: {throughput:.2f} ops/s")
         results_read.append((latency, throughput))
 
-    print("\n== Experimento 50% Lectura / 50% Escritura ==")
+    print(f"\n== [{durability}] Experimento 50% Lectura / 50% Escritura ==")
     for clients in CLIENT_COUNTS:
         print(f"{clients} cliente(s)...")
         latency, throughput = run_test(clients, read_only=False)
@@ -189,33 +207,35 @@ def main():
         results_mixed.append((latency, throughput))
 
     stop_server(proc)
+    return results_read, results_mixed
 
-    # Imprimir tabla de resultados Solo Lectura
-    print("\nResultados Solo Lectura:")
-    print(f"{'Clientes':>8} | {'Latencia (ms)':>15} | {'Rendimiento (ops/s)':>20}")
-    print("-" * 50)
-    for i, clients in enumerate(CLIENT_COUNTS):
-        lat_r, thr_r = results_read[i]
-        print(f"{clients:>8} | {lat_r:15.3f} | {thr_r:20.2f}")
 
-    # Imprimir tabla de resultados Mixtos
-    print("\nResultados 50% Lectura / 50% Escritura:")
-    print(f"{'Clientes':>8} | {'Latencia (ms)':>15} | {'Rendimiento (ops/s)':>20}")
-    print("-" * 50)
-    for i, clients in enumerate(CLIENT_COUNTS):
-        lat_m, thr_m = results_mixed[i]
-        print(f"{clients:>8} | {lat_m:15.3f} | {thr_m:20.2f}")
+def main():
+    results = {}
+    for durability in DURABILITY_MODES:
+        mode_results = run_mode(durability)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+        if mode_results is not None:
+            results[durability] = mode_results
+
+    if not results:
+        return
 
-    # Graficar resultados
-    lat_read, thr_read = zip(*results_read)
-    lat_mix, thr_mix = zip(*results_mixed)
+    # Imprimir tablas de resultados por modo
+    for durability, (results_read, results_mixed) in results.items():
+        print_results(f"[{durability}] Resultados Solo Lectura", results_read)
+        print_results(f"[{durability}] Resultados 50% Lectura / 50% Escritura", results_mixed)
 
+    # Graficar resultados: una curva por modo de durabilidad y carga de trabajo
     plt.figure(figsize=(10, 6))
-    plt.plot(thr_read, lat_read, marker='o', label='Solo Lectura')
-    plt.plot(thr_mix, lat_mix, marker='s', label='50% Lectura / 50% Escritura')
+    for durability, (results_read, results_mixed) in results.items():
+        lat_read, thr_read = zip(*results_read)
+        lat_mix, thr_mix = zip(*results_mixed)
+        plt.plot(thr_read, lat_read, marker='o', linestyle='--', label=f'Solo Lectura ({durability})')
+        plt.plot(thr_mix, lat_mix, marker='s', label=f'50% Lectura / 50% Escritura ({durability})')
     plt.xlabel("Rendimiento (ops/s)")
     plt.ylabel("Latencia promedio (ms)")
-    plt.title("Latencia vs Rendimiento")
+    plt.title("Latencia vs Rendimiento por modo de durabilidad")
     plt.legend()
     plt.grid(True)
     plt.tight_layout()
@@ -0,0 +1,172 @@
+import threading
+import time
+import random
+import string
+import matplotlib.pyplot as plt
+
+import subprocess
+import sys
+import os
+
+from client.lbclient import KVClient
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+VALUE_SIZE = 1024  # Tamaño valor en bytes (1 KB)
+NUM_KEYS = 1000  # Número de claves de prueba
+DURATION = 10  # Duración del test en segundos
+CLIENT_COUNTS = [1, 2, 4, 8, 16, 32]  # Diferentes números de clientes
+PIPELINE_WINDOW = 32  # Operaciones en curso por cliente en modo pipeline
+DURABILITY = "group"
+
+# Generar claves y valores de prueba aleatorios
+test_keys = [f"key_{i}" for i in range(NUM_KEYS)]
+test_values = [''.join(random.choices(string.ascii_letters, k=VALUE_SIZE)) for _ in range(NUM_KEYS)]
+
+def start_server():
+    print(f"\nIniciando el servidor (durabilidad = {DURABILITY})...")
+    return subprocess.Popen([sys.executable, server_script, "--durability", DURABILITY])
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+
+# Cliente unario: espera la respuesta de cada operación antes de enviar la siguiente (50% lectura / 50% escritura)
+def worker_unary(latencies, latencies_lock, stop_event):
+    client = KVClient()
+    local = []
+    while not stop_event.is_set():
+        key = random.choice(test_keys)
+        start = time.time()
+        if random.random() < 0.5:
+            client.get(key)
+        else:
+            client.set(key, random.choice(test_values))
+        local.append((time.time() - start) * 1000)
+    client.close()
+    with latencies_lock:
+        latencies.extend(local)
+
+
+# Cliente pipeline: mantiene hasta PIPELINE_WINDOW operaciones en curso en un solo stream
+def worker_pipeline(latencies, latencies_lock, stop_event):
+    client = KVClient()
+    local = []
+
+    def record(start):
+        return lambda future: local.append((time.time() - start) * 1000)
+
+    with client.pipeline(window=PIPELINE_WINDOW) as pipeline:
+        while not stop_event.is_set():
+            key = random.choice(test_keys)
+            start = time.time()
+            if random.random() < 0.5:
+                future = pipeline.get(key)
+            else:
+                future = pipeline.set(key, random.choice(test_values))
+            future.add_done_callback(record(start))
+    client.close()
+    with latencies_lock:
+        latencies.extend(local)
+
+
+# Ejecuta el test con el número de clientes y tipo de cliente (unario o pipeline)
+def run_test(num_clients, pipelined):
+    latencies = []
+    latencies_lock = threading.Lock()
+    stop_event = threading.Event()
+    worker_func = worker_pipeline if pipelined else worker_unary
+
+    threads = [threading.Thread(target=worker_func, args=(latencies, latencies_lock, stop_event)) for _ in range(num_clients)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    # Las operaciones en curso al parar se completan antes de cerrar el stream y cuentan en el total
+    avg_latency = sum(latencies) / len(latencies) if latencies else 0
+    throughput = len(latencies) / elapsed
+    return avg_latency, throughput
+
+
+def print_results(title, results):
+    print(f"\n{title}:")
+    print(f"{'Clientes':>8} | {'Latencia (ms)':>15} | {'Rendimiento (ops/s)':>20}")
+    print("-" * 50)
+    for i, clients in enumerate(CLIENT_COUNTS):
+        lat, thr = results[i]
+        print(f"{clients:>8} | {lat:15.3f} | {thr:20.2f}")
+
+
+def main():
+    proc = start_server()
+    if wait_for_server_ready() is None:
+        print("No se pudo iniciar el servidor. Abortando.")
+        stop_server(proc)
+        return
+
+    results_unary = []
+    results_pipeline = []
+    try:
+        client = KVClient()
+        client.set_many([(key, random.choice(test_values)) for key in test_keys])
+        client.close()
+
+        print("== Clientes unarios (50% Lectura / 50% Escritura) ==")
+        for clients in CLIENT_COUNTS:
+            print(f"{clients} cliente(s)...")
+            latency, throughput = run_test(clients, pipelined=False)
+            print(f"Latencia promedio: {latency:.3f} ms | Rendimiento: {throughput:.2f} ops/s")
+            results_unary.append((latency, throughput))
+
+        print(f"\n== Clientes pipeline, ventana {PIPELINE_WINDOW} (50% Lectura / 50% Escritura) ==")
+        for clients in CLIENT_COUNTS:
+            print(f"{clients} cliente(s)...")
+            latency, throughput = run_test(clients, pipelined=True)
+            print(f"Latencia promedio: {latency:.3f} ms | Rendimiento: {throughput:.2f} ops/s")
+            results_pipeline.append((latency, throughput))
+    finally:
+        stop_server(proc)
+
+    print_results("Resultados clientes unarios", results_unary)
+    print_results(f"Resultados clientes pipeline (ventana {PIPELINE_WINDOW})", results_pipeline)
+
+    # Graficar el rendimiento de ambos tipos de cliente según el número de clientes
+    plt.figure(figsize=(10, 6))
+    plt.plot(CLIENT_COUNTS, [thr for _, thr in results_unary], marker='o', label='Unario')
+    plt.plot(CLIENT_COUNTS, [thr for _, thr in results_pipeline], marker='s', label=f'Pipeline (ventana {PIPELINE_WINDOW})')
+    plt.xscale("log", base=2)
+    plt.xlabel("Número de clientes")
+    plt.ylabel("Rendimiento (ops/s)")
+    plt.title("Rendimiento unario vs pipeline (50% Lectura / 50% Escritura)")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig("experiment3_pipeline_results.png")
+    plt.show()
+
+
+if __name__ == "__main__":
+    main()
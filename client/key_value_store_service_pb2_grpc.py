@@ -44,16 +44,71 @@ class KeyValueStoreStub(object):
                 request_serializer=key__value__store__service__pb2.GetValue.SerializeToString,
                 response_deserializer=key__value__store__service__pb2.GetValueResponse.FromString,
                 _registered_method=True)
+        self.MultiGet = channel.unary_unary(
+                '/key_value_store.KeyValueStore/MultiGet',
+                request_serializer=key__value__store__service__pb2.MultiGetRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.MultiGetResponse.FromString,
+                _registered_method=True)
+        self.MultiSet = channel.unary_unary(
+                '/key_value_store.KeyValueStore/MultiSet',
+                request_serializer=key__value__store__service__pb2.MultiSetRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.MultiSetResponse.FromString,
+                _registered_method=True)
+        self.Pipeline = channel.stream_stream(
+                '/key_value_store.KeyValueStore/Pipeline',
+                request_serializer=key__value__store__service__pb2.PipelineRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.PipelineResponse.FromString,
+                _registered_method=True)
         self.GetPrefixKey = channel.unary_unary(
                 '/key_value_store.KeyValueStore/GetPrefixKey',
                 request_serializer=key__value__store__service__pb2.GetPrefix.SerializeToString,
                 response_deserializer=key__value__store__service__pb2.GetPrefixResponse.FromString,
                 _registered_method=True)
+        self.GetPrefixKeyStream = channel.unary_stream(
+                '/key_value_store.KeyValueStore/GetPrefixKeyStream',
+                request_serializer=key__value__store__service__pb2.GetPrefix.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.GetPrefixResponse.FromString,
+                _registered_method=True)
+        self.Scan = channel.unary_stream(
+                '/key_value_store.KeyValueStore/Scan',
+                request_serializer=key__value__store__service__pb2.ScanRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.ScanResponse.FromString,
+                _registered_method=True)
         self.Stat = channel.unary_unary(
                 '/key_value_store.KeyValueStore/Stat',
                 request_serializer=key__value__store__service__pb2.StatRequest.SerializeToString,
                 response_deserializer=key__value__store__service__pb2.StatResponse.FromString,
                 _registered_method=True)
+        self.LatencyStats = channel.unary_unary(
+                '/key_value_store.KeyValueStore/LatencyStats',
+                request_serializer=key__value__store__service__pb2.LatencyStatsRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.LatencyStatsResponse.FromString,
+                _registered_method=True)
+        self.Profile = channel.unary_unary(
+                '/key_value_store.KeyValueStore/Profile',
+                request_serializer=key__value__store__service__pb2.ProfileRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.ProfileResponse.FromString,
+                _registered_method=True)
+        self.Export = channel.unary_stream(
+                '/key_value_store.KeyValueStore/Export',
+                request_serializer=key__value__store__service__pb2.ExportRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.ExportBatch.FromString,
+                _registered_method=True)
+        self.Ingest = channel.stream_unary(
+                '/key_value_store.KeyValueStore/Ingest',
+                request_serializer=key__value__store__service__pb2.ExportBatch.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.IngestResponse.FromString,
+                _registered_method=True)
+        self.EndMigration = channel.unary_unary(
+                '/key_value_store.KeyValueStore/EndMigration',
+                request_serializer=key__value__store__service__pb2.EndMigrationRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.EndMigrationResponse.FromString,
+                _registered_method=True)
+        self.Shards = channel.unary_unary(
+                '/key_value_store.KeyValueStore/Shards',
+                request_serializer=key__value__store__service__pb2.ShardsRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.ShardsResponse.FromString,
+                _registered_method=True)
 
 
 class KeyValueStoreServicer(object):
@@ -73,6 +128,28 @@ class KeyValueStoreServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def MultiGet(self, request, context):
+        """Devuelve el valor de varias claves en una sola llamada, con un estado por clave
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def MultiSet(self, request, context):
+        """Establece el valor de varias claves con una sola escritura y un solo fsync del log
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Pipeline(self, request_iterator, context):
+        """Stream bidireccional de operaciones Get/Set con numero de secuencia; las respuestas se
+        envian en cuanto termina cada operacion, sin respetar el orden de las peticiones
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetPrefixKey(self, request, context):
         """Devuelve una lista de valores cuyas claves empiezan por prefixKey.
         """
@@ -80,12 +157,68 @@ class KeyValueStoreServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetPrefixKeyStream(self, request, context):
+        """Igual que GetPrefixKey pero devuelve los resultados en lotes de tamaño acotado
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Scan(self, request, context):
+        """Devuelve en orden, y en lotes de tamaño acotado, las claves del intervalo [start_key, end_key)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Stat(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def LatencyStats(self, request, context):
+        """Histogramas de latencia del servidor por RPC y por fase interna desde el ultimo reset
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Profile(self, request, context):
+        """Muestrea las pilas de los hilos del servidor durante unos segundos y las devuelve colapsadas
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Export(self, request, context):
+        """Exporta en lotes una particion (intervalo de claves y/o buckets hash) para migrarla a otro servidor
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Ingest(self, request_iterator, context):
+        """Escribe en bloque los lotes exportados por otro servidor
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def EndMigration(self, request, context):
+        """Termina una migracion en el servidor de origen y levanta su corte
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Shards(self, request, context):
+        """Direcciones de los shards en el modo multiproceso (vacia si el servidor no esta particionado)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_KeyValueStoreServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -99,16 +232,71 @@ def add_KeyValueStoreServicer_to_server(servicer, server):
                     request_deserializer=key__value__store__service__pb2.GetValue.FromString,
                     response_serializer=key__value__store__service__pb2.GetValueResponse.SerializeToString,
             ),
+            'MultiGet': grpc.unary_unary_rpc_method_handler(
+                    servicer.MultiGet,
+                    request_deserializer=key__value__store__service__pb2.MultiGetRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.MultiGetResponse.SerializeToString,
+            ),
+            'MultiSet': grpc.unary_unary_rpc_method_handler(
+                    servicer.MultiSet,
+                    request_deserializer=key__value__store__service__pb2.MultiSetRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.MultiSetResponse.SerializeToString,
+            ),
+            'Pipeline': grpc.stream_stream_rpc_method_handler(
+                    servicer.Pipeline,
+                    request_deserializer=key__value__store__service__pb2.PipelineRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.PipelineResponse.SerializeToString,
+            ),
             'GetPrefixKey': grpc.unary_unary_rpc_method_handler(
                     servicer.GetPrefixKey,
                     request_deserializer=key__value__store__service__pb2.GetPrefix.FromString,
                     response_serializer=key__value__store__service__pb2.GetPrefixResponse.SerializeToString,
             ),
+            'GetPrefixKeyStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetPrefixKeyStream,
+                    request_deserializer=key__value__store__service__pb2.GetPrefix.FromString,
+                    response_serializer=key__value__store__service__pb2.GetPrefixResponse.SerializeToString,
+            ),
+            'Scan': grpc.unary_stream_rpc_method_handler(
+                    servicer.Scan,
+                    request_deserializer=key__value__store__service__pb2.ScanRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.ScanResponse.SerializeToString,
+            ),
             'Stat': grpc.unary_unary_rpc_method_handler(
                     servicer.Stat,
                     request_deserializer=key__value__store__service__pb2.StatRequest.FromString,
                     response_serializer=key__value__store__service__pb2.StatResponse.SerializeToString,
             ),
+            'LatencyStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.LatencyStats,
+                    request_deserializer=key__value__store__service__pb2.LatencyStatsRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.LatencyStatsResponse.SerializeToString,
+            ),
+            'Profile': grpc.unary_unary_rpc_method_handler(
+                    servicer.Profile,
+                    request_deserializer=key__value__store__service__pb2.ProfileRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.ProfileResponse.SerializeToString,
+            ),
+            'Export': grpc.unary_stream_rpc_method_handler(
+                    servicer.Export,
+                    request_deserializer=key__value__store__service__pb2.ExportRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.ExportBatch.SerializeToString,
+            ),
+            'Ingest': grpc.stream_unary_rpc_method_handler(
+                    servicer.Ingest,
+                    request_deserializer=key__value__store__service__pb2.ExportBatch.FromString,
+                    response_serializer=key__value__store__service__pb2.IngestResponse.SerializeToString,
+            ),
+            'EndMigration': grpc.unary_unary_rpc_method_handler(
+                    servicer.EndMigration,
+                    request_deserializer=key__value__store__service__pb2.EndMigrationRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.EndMigrationResponse.SerializeToString,
+            ),
+            'Shards': grpc.unary_unary_rpc_method_handler(
+                    servicer.Shards,
+                    request_deserializer=key__value__store__service__pb2.ShardsRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.ShardsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'key_value_store.KeyValueStore', rpc_method_handlers)
@@ -174,6 +362,87 @@ class KeyValueStore(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def MultiGet(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStore/MultiGet',
+            key__value__store__service__pb2.MultiGetRequest.SerializeToString,
+            key__value__store__service__pb2.MultiGetResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def MultiSet(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStore/MultiSet',
+            key__value__store__service__pb2.MultiSetRequest.SerializeToString,
+            key__value__store__service__pb2.MultiSetResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Pipeline(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/key_value_store.KeyValueStore/Pipeline',
+            key__value__store__service__pb2.PipelineRequest.SerializeToString,
+            key__value__store__service__pb2.PipelineResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetPrefixKey(request,
             target,
@@ -201,6 +470,60 @@ class KeyValueStore(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetPrefixKeyStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/key_value_store.KeyValueStore/GetPrefixKeyStream',
+            key__value__store__service__pb2.GetPrefix.SerializeToString,
+            key__value__store__service__pb2.GetPrefixResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Scan(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/key_value_store.KeyValueStore/Scan',
+            key__value__store__service__pb2.ScanRequest.SerializeToString,
+            key__value__store__service__pb2.ScanResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def Stat(request,
             target,
@@ -227,3 +550,462 @@ class KeyValueStore(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def LatencyStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStore/LatencyStats',
+            key__value__store__service__pb2.LatencyStatsRequest.SerializeToString,
+            key__value__store__service__pb2.LatencyStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Profile(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStore/Profile',
+            key__value__store__service__pb2.ProfileRequest.SerializeToString,
+            key__value__store__service__pb2.ProfileResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Export(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/key_value_store.KeyValueStore/Export',
+            key__value__store__service__pb2.ExportRequest.SerializeToString,
+            key__value__store__service__pb2.ExportBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Ingest(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/key_value_store.KeyValueStore/Ingest',
+            key__value__store__service__pb2.ExportBatch.SerializeToString,
+            key__value__store__service__pb2.IngestResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def EndMigration(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStore/EndMigration',
+            key__value__store__service__pb2.EndMigrationRequest.SerializeToString,
+            key__value__store__service__pb2.EndMigrationResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Shards(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStore/Shards',
+            key__value__store__service__pb2.ShardsRequest.SerializeToString,
+            key__value__store__service__pb2.ShardsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+
+class KeyValueStoreBytesStub(object):
+    """Version del servicio con los valores en bytes: el servidor los guarda y los devuelve tal cual,
+    sin validar ni convertir UTF-8, y Set no devuelve el valor en la respuesta
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Set = channel.unary_unary(
+                '/key_value_store.KeyValueStoreBytes/Set',
+                request_serializer=key__value__store__service__pb2.SetKeyBytes.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.SetKeyBytesResponse.FromString,
+                _registered_method=True)
+        self.Get = channel.unary_unary(
+                '/key_value_store.KeyValueStoreBytes/Get',
+                request_serializer=key__value__store__service__pb2.GetValue.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.GetBytesResponse.FromString,
+                _registered_method=True)
+        self.MultiGet = channel.unary_unary(
+                '/key_value_store.KeyValueStoreBytes/MultiGet',
+                request_serializer=key__value__store__service__pb2.MultiGetRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.MultiGetBytesResponse.FromString,
+                _registered_method=True)
+        self.MultiSet = channel.unary_unary(
+                '/key_value_store.KeyValueStoreBytes/MultiSet',
+                request_serializer=key__value__store__service__pb2.MultiSetBytesRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.MultiSetResponse.FromString,
+                _registered_method=True)
+        self.SetStream = channel.stream_unary(
+                '/key_value_store.KeyValueStoreBytes/SetStream',
+                request_serializer=key__value__store__service__pb2.ValueChunk.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.SetKeyBytesResponse.FromString,
+                _registered_method=True)
+        self.GetStream = channel.unary_stream(
+                '/key_value_store.KeyValueStoreBytes/GetStream',
+                request_serializer=key__value__store__service__pb2.GetStreamRequest.SerializeToString,
+                response_deserializer=key__value__store__service__pb2.ValueChunk.FromString,
+                _registered_method=True)
+
+
+class KeyValueStoreBytesServicer(object):
+    """Version del servicio con los valores en bytes: el servidor los guarda y los devuelve tal cual,
+    sin validar ni convertir UTF-8, y Set no devuelve el valor en la respuesta
+    """
+
+    def Set(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Get(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def MultiGet(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def MultiSet(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SetStream(self, request_iterator, context):
+        """Sube un valor por bloques, sin el limite de tamaño de mensaje: el primer mensaje lleva la
+        clave y el tamaño total, y cada bloque se escribe en el log en cuanto llega. El valor solo
+        es visible (tambien tras una caida del servidor) cuando han llegado todos los bloques
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetStream(self, request, context):
+        """Descarga un valor por bloques; el primer mensaje lleva la clave y el tamaño total
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_KeyValueStoreBytesServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Set': grpc.unary_unary_rpc_method_handler(
+                    servicer.Set,
+                    request_deserializer=key__value__store__service__pb2.SetKeyBytes.FromString,
+                    response_serializer=key__value__store__service__pb2.SetKeyBytesResponse.SerializeToString,
+            ),
+            'Get': grpc.unary_unary_rpc_method_handler(
+                    servicer.Get,
+                    request_deserializer=key__value__store__service__pb2.GetValue.FromString,
+                    response_serializer=key__value__store__service__pb2.GetBytesResponse.SerializeToString,
+            ),
+            'MultiGet': grpc.unary_unary_rpc_method_handler(
+                    servicer.MultiGet,
+                    request_deserializer=key__value__store__service__pb2.MultiGetRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.MultiGetBytesResponse.SerializeToString,
+            ),
+            'MultiSet': grpc.unary_unary_rpc_method_handler(
+                    servicer.MultiSet,
+                    request_deserializer=key__value__store__service__pb2.MultiSetBytesRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.MultiSetResponse.SerializeToString,
+            ),
+            'SetStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.SetStream,
+                    request_deserializer=key__value__store__service__pb2.ValueChunk.FromString,
+                    response_serializer=key__value__store__service__pb2.SetKeyBytesResponse.SerializeToString,
+            ),
+            'GetStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetStream,
+                    request_deserializer=key__value__store__service__pb2.GetStreamRequest.FromString,
+                    response_serializer=key__value__store__service__pb2.ValueChunk.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'key_value_store.KeyValueStoreBytes', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('key_value_store.KeyValueStoreBytes', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class KeyValueStoreBytes(object):
+    """Version del servicio con los valores en bytes: el servidor los guarda y los devuelve tal cual,
+    sin validar ni convertir UTF-8, y Set no devuelve el valor en la respuesta
+    """
+
+    @staticmethod
+    def Set(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStoreBytes/Set',
+            key__value__store__service__pb2.SetKeyBytes.SerializeToString,
+            key__value__store__service__pb2.SetKeyBytesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Get(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStoreBytes/Get',
+            key__value__store__service__pb2.GetValue.SerializeToString,
+            key__value__store__service__pb2.GetBytesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def MultiGet(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStoreBytes/MultiGet',
+            key__value__store__service__pb2.MultiGetRequest.SerializeToString,
+            key__value__store__service__pb2.MultiGetBytesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def MultiSet(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/key_value_store.KeyValueStoreBytes/MultiSet',
+            key__value__store__service__pb2.MultiSetBytesRequest.SerializeToString,
+            key__value__store__service__pb2.MultiSetResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SetStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/key_value_store.KeyValueStoreBytes/SetStream',
+            key__value__store__service__pb2.ValueChunk.SerializeToString,
+            key__value__store__service__pb2.SetKeyBytesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/key_value_store.KeyValueStoreBytes/GetStream',
+            key__value__store__service__pb2.GetStreamRequest.SerializeToString,
+            key__value__store__service__pb2.ValueChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
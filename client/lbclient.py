@@ -1,36 +1,396 @@
 import grpc
 from client import key_value_store_service_pb2 as pb2
 from client import key_value_store_service_pb2_grpc as pb2_grpc
+import queue
 import random
 import string
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+# Tamaño por defecto de cada bloque de set_stream y get_stream (muy por debajo del limite de 6 MB por mensaje)
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+# Metadato con el que se pide al servidor la duracion de cada fase de la peticion; el servidor la
+# devuelve en los metadatos finales con la misma clave ("fase=ms,fase=ms,...")
+TRACE_METADATA_KEY = "x-kv-trace"
 
 class KVClient:
-    def __init__(self, address="localhost:50051"):
+    def __init__(self, address="localhost:50051", trace=False):
         options = [
             ("grpc.max_send_message_length", 6 * 1024 * 1024),      # 6 MB
             ("grpc.max_receive_message_length", 6 * 1024 * 1024)    # 6 MB
         ]
         self.channel = grpc.insecure_channel(address, options=options)
         self.stub = pb2_grpc.KeyValueStoreStub(self.channel)
+        # Servicio con los valores en bytes (get_bytes, set_bytes...)
+        self.bytes_stub = pb2_grpc.KeyValueStoreBytesStub(self.channel)
+
+        # Con trace=True cada llamada unaria pide su traza y la añade a traces (ver summarize_traces)
+        self.trace = trace
+        self.traces = []
+
+    def _call(self, name, request, stub=None):
+        """ Hace la llamada unaria name (del stub dado o de KeyValueStore); si la traza esta activada la pide y la guarda en traces """
+        method = getattr(stub or self.stub, name)
+        if not self.trace:
+            return method(request)
+        start = time.perf_counter()
+        try:
+            response, call = method.with_call(request, metadata=((TRACE_METADATA_KEY, "1"),))
+        except grpc.RpcError as e:
+            self._add_trace(name, e.trailing_metadata(), start)
+            raise
+        self._add_trace(name, call.trailing_metadata(), start)
+        return response
+
+    def _add_trace(self, name, trailing_metadata, start):
+        trace = {"rpc": name, "client": (time.perf_counter() - start) * 1000}
+        for key, value in trailing_metadata or ():
+            if key == TRACE_METADATA_KEY and value:
+                for phase in value.split(","):
+                    phase_name, ms = phase.split("=")
+                    trace[phase_name] = float(ms)
+        self.traces.append(trace)
 
     def get(self, key):
         request = pb2.GetValue(key=key)
-        return self.stub.Get(request)
+        return self._call("Get", request)
 
     def set(self, key, value):
         request = pb2.SetKeyValue(key=key, value=value)
-        return self.stub.Set(request)
+        return self._call("Set", request)
+
+    def get_many(self, keys):
+        """ Devuelve los valores de las claves en una sola llamada (None para las que no existen) """
+        request = pb2.MultiGetRequest(keys=keys)
+        response = self._call("MultiGet", request)
+        return [result.value if result.status else None for result in response.results]
+
+    def get_bytes(self, key):
+        """ Get del servicio de bytes: la respuesta lleva el valor guardado en bytes, sin decodificar """
+        return self._call("Get", pb2.GetValue(key=key), self.bytes_stub)
+
+    def set_bytes(self, key, value):
+        """ Set del servicio de bytes (value en bytes); la respuesta solo lleva el estado """
+        return self._call("Set", pb2.SetKeyBytes(key=key, value=value), self.bytes_stub)
+
+    def get_many_bytes(self, keys):
+        """ Como get_many, con los valores en bytes """
+        response = self._call("MultiGet", pb2.MultiGetRequest(keys=keys), self.bytes_stub)
+        return [result.value if result.status else None for result in response.results]
+
+    def set_many_bytes(self, items, max_batch_bytes=4 * 1024 * 1024):
+        """ Como set_many, con los valores en bytes """
+        return self._set_many(items, max_batch_bytes, self.bytes_stub, pb2.SetKeyBytes, pb2.MultiSetBytesRequest)
+
+    def set_stream(self, key, source, size=None, chunk_size=STREAM_CHUNK_BYTES):
+        """ Sube un valor de cualquier tamaño por bloques de chunk_size bytes.
+
+        source puede ser bytes o un fichero abierto en modo binario; en ese caso size es
+        obligatorio y el fichero se lee bloque a bloque, sin cargarlo entero en memoria.
+        """
+        if size is None:
+            size = len(source)
+
+        def chunks():
+            yield pb2.ValueChunk(key=key, total_size=size)
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                view = memoryview(source)
+                for start in range(0, len(view), chunk_size):
+                    yield pb2.ValueChunk(data=bytes(view[start:start + chunk_size]))
+            else:
+                while True:
+                    data = source.read(chunk_size)
+                    if not data:
+                        break
+                    yield pb2.ValueChunk(data=data)
+
+        return self.bytes_stub.SetStream(chunks())
+
+    def get_stream(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        """ Descarga un valor por bloques: devuelve (tamaño total, iterador de bloques en bytes).
+
+        Lanza grpc.RpcError con NOT_FOUND si la clave no existe.
+        """
+        responses = self.bytes_stub.GetStream(pb2.GetStreamRequest(key=key, chunk_size=chunk_size))
+        first = next(responses)
+        return first.total_size, (chunk.data for chunk in responses)
+
+    def set_many(self, items, max_batch_bytes=4 * 1024 * 1024):
+        """ Establece varios pares (clave, valor) y devuelve el estado de cada uno.
+
+        Los pares se envian en llamadas MultiSet de como maximo max_batch_bytes para no superar
+        el tamaño maximo de mensaje; cada llamada se escribe en el log con un solo fsync.
+        """
+        return self._set_many(items, max_batch_bytes, self.stub, pb2.SetKeyValue, pb2.MultiSetRequest)
+
+    def _set_many(self, items, max_batch_bytes, stub, entry_type, request_type):
+        if isinstance(items, dict):
+            items = items.items()
+        status = []
+        entries = []
+        batch_bytes = 0
+        for key, value in items:
+            size = len(key) + len(value)
+            if entries and batch_bytes + size > max_batch_bytes:
+                status.extend(self._call("MultiSet", request_type(entries=entries), stub).status)
+                entries = []
+                batch_bytes = 0
+            entries.append(entry_type(key=key, value=value))
+            batch_bytes += size
+        if entries:
+            status.extend(self._call("MultiSet", request_type(entries=entries), stub).status)
+        return status
 
     def get_prefix(self, prefix):
         request = pb2.GetPrefix(prefixKey=prefix)
-        return self.stub.GetPrefixKey(request)
+        return self._call("GetPrefixKey", request)
+
+    def get_prefix_page(self, prefix, limit, page_token="", keys_only=False):
+        """ Devuelve una pagina de como maximo limit resultados; next_page_token permite pedir la siguiente """
+        projection = pb2.KEYS_ONLY if keys_only else pb2.KEYS_AND_VALUES
+        request = pb2.GetPrefix(prefixKey=prefix, limit=limit, page_token=page_token, projection=projection)
+        return self._call("GetPrefixKey", request)
+
+    def get_prefix_keys(self, prefix, page_size=1000):
+        """ Itera sobre todas las claves con el prefijo pidiendolas por paginas, sin recibir los valores """
+        page_token = ""
+        while True:
+            response = self.get_prefix_page(prefix, page_size, page_token, keys_only=True)
+            yield from response.keys
+            page_token = response.next_page_token
+            if not page_token:
+                return
+
+    def count_prefix(self, prefix):
+        """ Devuelve cuantas claves empiezan por prefix """
+        request = pb2.GetPrefix(prefixKey=prefix, projection=pb2.COUNT_ONLY)
+        return self._call("GetPrefixKey", request).count
+
+    def iter_prefix(self, prefix, timeout=None):
+        """ Itera sobre los pares (clave, valor) cuyas claves empiezan por prefix, recibidos en lotes.
+
+        Si se deja de iterar antes del final, la llamada se cancela en el servidor.
+        """
+        request = pb2.GetPrefix(prefixKey=prefix)
+        responses = self.stub.GetPrefixKeyStream(request, timeout=timeout)
+        try:
+            for response in responses:
+                yield from zip(response.keys, response.values)
+        finally:
+            responses.cancel()
+
+    def scan(self, start_key="", end_key="", limit=0, reverse=False, keys_only=False, timeout=None):
+        """ Itera en orden sobre los pares (clave, valor) del intervalo [start_key, end_key).
+
+        Con reverse se recorre en orden descendente; con keys_only el valor es None.
+        """
+        request = pb2.ScanRequest(start_key=start_key, end_key=end_key, limit=limit, reverse=reverse,
+                                  keys_only=keys_only)
+        responses = self.stub.Scan(request, timeout=timeout)
+        try:
+            for response in responses:
+                if keys_only:
+                    yield from ((key, None) for key in response.keys)
+                else:
+                    yield from zip(response.keys, response.values)
+        finally:
+            responses.cancel()
+
+    def pipeline(self, window=64):
+        """ Abre un stream Pipeline que mantiene hasta window operaciones en curso (ver KVPipeline) """
+        return KVPipeline(self.stub, window)
 
     def stat(self):
         request = pb2.StatRequest()
         return self.stub.Stat(request)
 
+    def latency_stats(self, reset=False):
+        """ Histogramas de latencia del servidor desde el ultimo reset (reset=True empieza una ventana nueva) """
+        return self.stub.LatencyStats(pb2.LatencyStatsRequest(reset=reset))
+
+    def profile(self, seconds=10.0, interval_ms=10.0, include_idle=False):
+        """ Perfila el servidor durante seconds segundos y devuelve la ProfileResponse (pilas colapsadas) """
+        request = pb2.ProfileRequest(seconds=seconds, interval_ms=interval_ms, include_idle=include_idle)
+        return self.stub.Profile(request, timeout=seconds + 30)
+
     def close(self):
         self.channel.close()
 
+class ShardedKVClient(KVClient):
+    """ Cliente para un servidor lanzado con --shards que envia cada clave directamente a su shard.
+
+    Las direcciones de los shards se piden al proceso frontal con la RPC Shards; Get, Set y sus
+    versiones por lotes van al shard propietario (crc32(clave) % shards) sin pasar por el frontal,
+    y el resto de operaciones (prefijos, scans, Stat...) las reparte y combina el frontal.
+    """
+
+    def __init__(self, address="localhost:50051"):
+        super().__init__(address)
+        addresses = self.stub.Shards(pb2.ShardsRequest()).addresses
+        # Si el servidor no esta particionado todas las claves van a la misma direccion
+        self.shards = [KVClient(shard_address) for shard_address in addresses] or [KVClient(address)]
+
+    def _shard(self, key):
+        return self.shards[zlib.crc32(key.encode("utf-8")) % len(self.shards)]
+
+    def get(self, key):
+        return self._shard(key).get(key)
+
+    def set(self, key, value):
+        return self._shard(key).set(key, value)
+
+    def get_bytes(self, key):
+        return self._shard(key).get_bytes(key)
+
+    def set_bytes(self, key, value):
+        return self._shard(key).set_bytes(key, value)
+
+    def set_stream(self, key, source, size=None, chunk_size=STREAM_CHUNK_BYTES):
+        return self._shard(key).set_stream(key, source, size, chunk_size)
+
+    def get_stream(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        return self._shard(key).get_stream(key, chunk_size)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        groups = {}
+        for position, key in enumerate(keys):
+            groups.setdefault(zlib.crc32(key.encode("utf-8")) % len(self.shards), []).append(position)
+        values = [None] * len(keys)
+        for shard, positions in groups.items():
+            for position, value in zip(positions, self.shards[shard].get_many([keys[i] for i in positions])):
+                values[position] = value
+        return values
+
+    def set_many(self, items, max_batch_bytes=4 * 1024 * 1024):
+        if isinstance(items, dict):
+            items = items.items()
+        items = list(items)
+        groups = {}
+        for position, (key, _) in enumerate(items):
+            groups.setdefault(zlib.crc32(key.encode("utf-8")) % len(self.shards), []).append(position)
+        status = [False] * len(items)
+        for shard, positions in groups.items():
+            shard_status = self.shards[shard].set_many([items[i] for i in positions], max_batch_bytes)
+            for position, ok in zip(positions, shard_status):
+                status[position] = ok
+        return status
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        super().close()
+
+class KVPipeline:
+    """ Operaciones Get/Set enviadas por un unico stream bidireccional sin esperar cada respuesta.
+
+    get y set devuelven un Future en cuanto la peticion se encola; solo se bloquean si ya hay
+    window operaciones sin respuesta. Las respuestas pueden llegar en cualquier orden y se
+    emparejan con su peticion por el numero de secuencia. El resultado de get es el valor (None
+    si la clave no existe) y el de set es el estado de la escritura.
+    """
+
+    def __init__(self, stub, window=64):
+        self.window = window
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._next_seq = 0
+        self._error = None
+
+        self._requests = queue.Queue()
+        self._responses = stub.Pipeline(self._request_iterator())
+        self._receiver = threading.Thread(target=self._receive, name="pipeline-receiver", daemon=True)
+        self._receiver.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request_iterator(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            yield request
+
+    def _submit(self, request, is_get):
+        future = Future()
+        with self._cond:
+            while len(self._pending) >= self.window and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+            request.seq = self._next_seq
+            self._next_seq += 1
+            self._pending[request.seq] = (future, is_get)
+        self._requests.put(request)
+        return future
+
+    def get(self, key):
+        return self._submit(pb2.PipelineRequest(get=pb2.GetValue(key=key)), True)
+
+    def set(self, key, value):
+        return self._submit(pb2.PipelineRequest(set=pb2.SetKeyValue(key=key, value=value)), False)
+
+    def _receive(self):
+        """ Hilo que resuelve los Future a medida que llegan las respuestas """
+        error = RuntimeError("El stream Pipeline esta cerrado")
+        try:
+            for response in self._responses:
+                with self._cond:
+                    future, is_get = self._pending.pop(response.seq)
+                    self._cond.notify()
+                if is_get:
+                    future.set_result(response.value if response.status else None)
+                else:
+                    future.set_result(response.status)
+        except grpc.RpcError as e:
+            error = e
+
+        # Fallamos las operaciones sin respuesta y despertamos a quien espere hueco en la ventana
+        with self._cond:
+            self._error = error
+            pending = self._pending
+            self._pending = {}
+            self._cond.notify_all()
+        for future, _ in pending.values():
+            future.set_exception(error)
+
+    def flush(self):
+        """ Espera a que todas las operaciones enviadas tengan respuesta """
+        with self._cond:
+            while self._pending and self._error is None:
+                self._cond.wait()
+
+    def close(self):
+        """ Termina el stream tras recibir las respuestas pendientes """
+        self._requests.put(None)
+        self._receiver.join()
+
+def summarize_traces(traces, rpc=None):
+    """ Media en ms de cada fase de las trazas (solo las de la RPC rpc si se indica).
+
+    Ademas de las fases del servidor incluye 'client' (latencia vista por el cliente) y 'transport'
+    (lo que no se mide en el servidor: red, serializacion de la respuesta y colas de gRPC). Con un
+    servidor lanzado con --shards las fases son las del shard mas lento y 'router' es el tiempo
+    del proceso frontal, que tampoco se cuenta en 'transport'.
+    """
+    traces = [trace for trace in traces if rpc is None or trace["rpc"] == rpc]
+    if not traces:
+        return {}
+    totals = {}
+    for trace in traces:
+        for phase, ms in trace.items():
+            if phase != "rpc":
+                totals[phase] = totals.get(phase, 0.0) + ms
+        transport = trace["client"] - trace.get("handler", 0.0) - trace.get("decode", 0.0) - trace.get("router", 0.0)
+        totals["transport"] = totals.get("transport", 0.0) + transport
+    return {phase: total / len(traces) for phase, total in totals.items()}
+
 def generate_value(size):
     return ''.join(random.choices(string.ascii_letters + string.digits, k=size))
@@ -0,0 +1,73 @@
+import time
+import uuid
+
+from client import key_value_store_service_pb2 as pb2
+
+
+def _transfer(source, target, request):
+    """ Envia el stream Export del origen directamente como stream Ingest del destino """
+    return target.stub.Ingest(source.stub.Export(request))
+
+
+def migrate(source, target, start_key="", end_key="", hash_modulus=0, hash_buckets=(),
+            catchup_rounds=5, catchup_threshold=100, on_cutover=None):
+    """ Mueve una particion del servidor source al servidor target (dos KVClient) sin detener el servicio.
+
+    La particion son las claves de [start_key, end_key) y, si hash_modulus no es 0, solo las que
+    cumplen crc32(clave) % hash_modulus en hash_buckets. Fases:
+      1. Copia completa: el origen empieza a anotar las escrituras de la particion y la envia entera.
+      2. Puesta al dia: se copian las claves escritas durante la fase anterior, como maximo
+         catchup_rounds veces o hasta que queden catchup_threshold claves o menos.
+      3. Corte: el origen rechaza (UNAVAILABLE) las escrituras de la particion, se copian las
+         ultimas claves escritas y se llama a on_cutover, que debe dirigir los clientes al destino.
+         El origen sigue rechazando esas escrituras despues (los clientes con el enrutado antiguo
+         reciben UNAVAILABLE en lugar de escribir donde ya no estan los datos). Si algo falla
+         antes de terminar, el origen olvida la migracion y levanta el corte.
+
+    Devuelve un diccionario con las claves y bytes copiados, la duracion, el rendimiento de la
+    transferencia y la duracion del corte.
+    """
+    migration_id = uuid.uuid4().hex
+    request = dict(migration_id=migration_id, start_key=start_key, end_key=end_key,
+                   hash_modulus=hash_modulus, hash_buckets=list(hash_buckets))
+
+    start = time.time()
+    completed = False
+    try:
+        copied = _transfer(source, target, pb2.ExportRequest(phase=pb2.EXPORT_ALL, **request))
+        keys = copied.keys
+        total_bytes = copied.bytes
+        copy_seconds = time.time() - start
+
+        rounds = 0
+        catchup_keys = 0
+        while rounds < catchup_rounds:
+            rounds += 1
+            copied = _transfer(source, target, pb2.ExportRequest(phase=pb2.EXPORT_DIRTY, **request))
+            catchup_keys += copied.keys
+            total_bytes += copied.bytes
+            if copied.keys <= catchup_threshold:
+                break
+
+        cutover_start = time.time()
+        copied = _transfer(source, target, pb2.ExportRequest(phase=pb2.EXPORT_FENCED, **request))
+        catchup_keys += copied.keys
+        total_bytes += copied.bytes
+        if on_cutover is not None:
+            on_cutover()
+        completed = True
+    finally:
+        # Tras el corte la particion queda en corte en el origen; si algo fallo, el origen la libera
+        source.stub.EndMigration(pb2.EndMigrationRequest(migration_id=migration_id, completed=completed))
+    end = time.time()
+
+    return {
+        "keys": keys,
+        "catchup_keys": catchup_keys,
+        "catchup_rounds": rounds,
+        "bytes": total_bytes,
+        "seconds": end - start,
+        "copy_keys_per_sec": keys / copy_seconds if copy_seconds else 0.0,
+        "mb_per_sec": total_bytes / (end - start) / (1024 * 1024),
+        "cutover_ms": (end - cutover_start) * 1000,
+    }
@@ -7,6 +7,7 @@ import os
 
 NUM_KEYS = 10000           # Número de claves a insertar
 VALUE_SIZE = 1024          # Tamaño de cada valor (1 KB)
+BATCH_SIZE = 500           # Claves por llamada MultiSet
 
 server_script = os.path.abspath("./server/lbserver.py")
 
@@ -37,14 +38,11 @@ def wait_for_server_ready(timeout=120):
 
 def populate_store(client):
     print(f"Ingresando {NUM_KEYS} claves de {VALUE_SIZE} bytes...")
-    for i in range(NUM_KEYS):
-        key = f"key_{i}"
-        value = generate_value(VALUE_SIZE)
-        client.set(key, value)
-
-        # Reducir el ruido en consola
-        if (i + 1) % 100 == 0 or i == NUM_KEYS - 1:
-            print(f"| {i + 1} / {NUM_KEYS} | OPERACION = SET | Key = {key} |")
+    # Enviamos las claves por lotes: cada lote es una sola llamada y un solo fsync en el servidor
+    for start in range(0, NUM_KEYS, BATCH_SIZE):
+        end = min(start + BATCH_SIZE, NUM_KEYS)
+        client.set_many([(f"key_{i}", generate_value(VALUE_SIZE)) for i in range(start, end)])
+        print(f"| {end} / {NUM_KEYS} | OPERACION = MULTISET | Key = key_{end - 1} |")
     print(" Población completada.")
 
 def main():
@@ -14,6 +14,7 @@ VALUE_SIZE = 512  # Tamaño valor en bytes (512 bytes)
 NUM_KEYS = 1000   # Número de claves a pre-poblar en el almacén
 NUM_CLIENTS = 10   # Número de clientes concurrentes
 OPERATIONS_PER_CLIENT = 1000 # Operaciones objetivo por cada cliente (10K)
+PREFIX_PAGE_SIZE = 20 # Tamaño de pagina de las consultas de solo claves
 
 # Ruta absoluta al script del servidor
 server_script = os.path.abspath("./server/lbserver.py")
@@ -69,10 +70,19 @@ def worker_client_operations(client_id, operations_to_perform, is_mixed_mode):
                 local_client.set(key, value)
                 operation_type = "SET"
             elif op_choice < 0.75: 
-                # Buscar un valor segun el prefijo de una clave
+                # Buscar un valor segun el prefijo de una clave, alternando entre la consulta completa,
+                # una pagina de solo claves y el conteo de coincidencias
                 prefix_key = "key_" + str(random.randint(0, NUM_KEYS // 100)) 
-                local_client.get_prefix(prefix_key)
-                operation_type = "GET_PREFIX"
+                prefix_mode = random.random()
+                if prefix_mode < 1 / 3:
+                    local_client.get_prefix(prefix_key)
+                    operation_type = "GET_PREFIX"
+                elif prefix_mode < 2 / 3:
+                    local_client.get_prefix_page(prefix_key, PREFIX_PAGE_SIZE, keys_only=True)
+                    operation_type = "GET_PREFIX_KEYS"
+                else:
+                    local_client.count_prefix(prefix_key)
+                    operation_type = "COUNT_PREFIX"
             else:
                 # Buscar un valor segun una clave
                 local_client.get(key)
@@ -118,12 +128,16 @@ def main():
 
         print(f"\nServidor iniciado y listo en {wait_time:.2f} segundos.")  
 
+        # Empezamos una ventana nueva de histogramas para medir solo la carga del experimento
+        final_stats_client = KVClient(SERVER_ADDRESS)
+        final_stats_client.latency_stats(reset=True)
+
         # Ejecuta los clientes concurrentes
         run_test_load(NUM_CLIENTS, OPERATIONS_PER_CLIENT, read_only=False)
 
         # Obtener estadísticas finales del servidor
-        final_stats_client = KVClient(SERVER_ADDRESS)
         final_server_stats = final_stats_client.stat()
+        latency_stats = final_stats_client.latency_stats()
         final_stats_client.close()
 
         # Paso 6: Mostrar estadísticas
@@ -133,6 +147,21 @@ def main():
         print(f"Total GETs completados: {final_server_stats.total_get_requests}")
         print(f"Total GET_PREFIXes completados: {final_server_stats.total_get_prefix_requests}")
         print(f"Total de peticiones procesadas por el servidor: {final_server_stats.total_requests}")
+        print(f"Lotes de group commit: {final_server_stats.commit_batches} | Registros por lote (prom/max): {final_server_stats.commit_avg_batch_records:.2f}/{final_server_stats.commit_max_batch_records}")
+        print(f"Bytes vivos / muertos en el log: {final_server_stats.live_bytes} / {final_server_stats.dead_bytes} | Segmentos: {final_server_stats.segments} | Compactaciones: {final_server_stats.compactions}")
+        print(f"Bytes vivos / muertos en el log de blobs: {final_server_stats.blob_live_bytes} / {final_server_stats.blob_dead_bytes} | Segmentos: {final_server_stats.blob_segments} | Compactaciones: {final_server_stats.blob_compactions}")
+        print(f"Cache de valores: {final_server_stats.cache_hits} aciertos / {final_server_stats.cache_misses} fallos | Expulsiones: {final_server_stats.cache_evictions} | Bytes: {final_server_stats.cache_bytes}")
+        print(f"Filtro de Bloom: FPR estimada {final_server_stats.bloom_fpr:.4%} | Claves inexistentes descartadas: {final_server_stats.bloom_negatives} | Falsos positivos: {final_server_stats.bloom_false_positives} | Bytes: {final_server_stats.bloom_bytes}")
+        print(f"Claves: {final_server_stats.keys} | Bytes en memoria: {final_server_stats.resident_bytes} | Tamaño del log: {final_server_stats.log_bytes} bytes")
+        print(f"Tiempo en ejecución: {final_server_stats.uptime_seconds:.1f} s | Peticiones en curso: {final_server_stats.in_flight_requests}")
+        errors = ", ".join(f"{method}={count}" for method, count in sorted(final_server_stats.rpc_errors.items()))
+        print(f"Errores por RPC: {errors or 'ninguno'}")
+        print(f"Latencia de commit (prom/max): {final_server_stats.commit_avg_latency_ms:.3f}/{final_server_stats.commit_max_latency_ms:.3f} ms | fsync promedio: {final_server_stats.commit_avg_fsync_ms:.3f} ms")
+        print(f"\nLatencias medidas en el servidor (ventana de {latency_stats.window_seconds:.2f} s, en ms):")
+        print(f"{'RPC / fase':>16} | {'Muestras':>9} | {'media':>8} | {'p50':>8} | {'p90':>8} | {'p99':>8} | {'p99.9':>8} | {'max':>8}")
+        print("-" * 96)
+        for h in latency_stats.histograms:
+            print(f"{h.name:>16} | {h.count:>9} | {h.mean_ms:8.3f} | {h.p50_ms:8.3f} | {h.p90_ms:8.3f} | {h.p99_ms:8.3f} | {h.p999_ms:8.3f} | {h.max_ms:8.3f}")
         print(f"Tiempo total de ejecución del script: {(time.time() - start_of_experiment_wall_time):.2f} segundos")
 
     except Exception as e:
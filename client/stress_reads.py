@@ -0,0 +1,202 @@
+import time
+import random
+import shutil
+import subprocess
+import sys
+import os
+import threading
+import zlib
+
+from client.lbclient import KVClient, generate_value
+import matplotlib.pyplot as plt
+
+NUM_KEYS = 64  # Pocas claves para que lectores y escritores coincidan en los mismos locks
+NUM_WRITERS = 4
+NUM_READERS = 4
+DURATION = 10  # Duración de la prueba en segundos
+VALUE_SIZES = [1024, 65536, 1048576]  # Tamaños de valor de los Set (bytes)
+DURABILITY = "always"  # Cada Set espera su propio fsync: el peor caso para las lecturas
+STORAGES = ["memory", "disk"]  # En modo 'disk' las lecturas van al log mientras el compactador lo reescribe
+
+# En modo 'disk': segmentos pequeños y compactación sin límite de ritmo para que el compactador y la
+# recolección del log de blobs muevan los valores durante la prueba, y sin cache para leerlos siempre del log
+DISK_OPTIONS = ["--segment-max-mb", "4", "--compaction-rate-mb", "0", "--cache-mb", "0"]
+
+# Directorio de datos propio para empezar siempre con el almacén vacío
+DATA_DIR = "./server/data_stress_reads"
+
+server_script = os.path.abspath("./server/lbserver.py")
+
+test_keys = [f"key_{i}" for i in range(NUM_KEYS)]
+
+def start_server(storage):
+    print(f"\nIniciando el servidor (durabilidad = {DURABILITY}, almacenamiento = {storage})...")
+    options = DISK_OPTIONS if storage == "disk" else []
+    return subprocess.Popen([sys.executable, server_script, "--durability", DURABILITY, "--storage", storage,
+                             "--data-dir", DATA_DIR] + options)
+
+def stop_server(proc):
+    print("\nDeteniendo el servidor...")
+    proc.terminate()
+    proc.wait()
+    print("Servidor detenido.")
+
+def wait_for_server_ready(timeout=120):
+    print("Esperando que el servidor esté listo...")
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = KVClient()
+            client.stat()
+            client.close()
+            print("Servidor listo.")
+            return time.time() - start
+        except:
+            time.sleep(0.5)
+    print("El servidor no respondió a tiempo.")
+    return None
+
+# Cada valor lleva su clave, su version y el crc32 del contenido para detectar lecturas rotas
+def encode_value(key, version, payload):
+    return f"{key}:{version}:{zlib.crc32(payload.encode())}:{payload}"
+
+def decode_value(value):
+    key, version, crc, payload = value.split(":", 3)
+    return key, int(version), int(crc), payload
+
+class StressState:
+    """ Versiones confirmadas por los escritores y errores encontrados por los lectores """
+
+    def __init__(self):
+        self.acked = {key: 0 for key in test_keys}
+        self.errors = []
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+    def error(self, message):
+        with self.lock:
+            self.errors.append(message)
+
+# Cada escritor es el único dueño de sus claves, así que sus versiones crecen de forma estricta
+def writer(state, keys, payloads, latencies):
+    client = KVClient()
+    versions = {key: 0 for key in keys}
+    while not state.stop.is_set():
+        key = random.choice(keys)
+        versions[key] += 1
+        value = encode_value(key, versions[key], random.choice(payloads))
+        start = time.time()
+        client.set(key, value)
+        latencies.append((time.time() - start) * 1000)
+        state.acked[key] = versions[key]
+    client.close()
+
+# Un lector comprueba que el valor está completo, que no es anterior a la última versión
+# confirmada antes de pedirlo y que nunca retrocede respecto a lo que ya leyó
+def reader(state, latencies):
+    client = KVClient()
+    seen = {key: 0 for key in test_keys}
+    while not state.stop.is_set():
+        key = random.choice(test_keys)
+        floor = state.acked[key]
+        start = time.time()
+        value = client.get(key).value
+        latencies.append((time.time() - start) * 1000)
+        try:
+            value_key, version, crc, payload = decode_value(value)
+        except ValueError:
+            state.error(f"{key}: valor con formato inválido ({len(value)} bytes)")
+            continue
+        if value_key != key or zlib.crc32(payload.encode()) != crc:
+            state.error(f"{key}: lectura rota (version {version})")
+        elif version < floor:
+            state.error(f"{key}: lectura obsoleta (version {version} < {floor} confirmada)")
+        elif version < seen[key]:
+            state.error(f"{key}: la version retrocede ({version} < {seen[key]})")
+        seen[key] = max(seen[key], version)
+    client.close()
+
+def percentile(latencies, p):
+    if not latencies:
+        return 0.0
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+def run_storage(storage, payloads):
+    """ Ejecuta escritores y lectores durante DURATION segundos; devuelve las latencias de Get y Set, los errores y las compactaciones """
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    server_proc = start_server(storage)
+    try:
+        if wait_for_server_ready() is None:
+            return None
+
+        client = KVClient()
+        client.set_many([(key, encode_value(key, 0, payloads[0])) for key in test_keys])
+
+        state = StressState()
+        read_latencies = []
+        write_latencies = []
+        threads = [
+            threading.Thread(target=writer, args=(state, test_keys[w::NUM_WRITERS], payloads, write_latencies))
+            for w in range(NUM_WRITERS)
+        ] + [threading.Thread(target=reader, args=(state, read_latencies)) for _ in range(NUM_READERS)]
+        print(f"Ejecutando {NUM_WRITERS} escritores y {NUM_READERS} lectores durante {DURATION} s...")
+        for thread in threads:
+            thread.start()
+        time.sleep(DURATION)
+        state.stop.set()
+        for thread in threads:
+            thread.join()
+
+        stats = client.stat()
+        client.close()
+    finally:
+        stop_server(server_proc)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+    return read_latencies, write_latencies, state.errors, stats.compactions + stats.blob_compactions
+
+def main():
+    payloads = [generate_value(size) for size in VALUE_SIZES]
+    results = {}
+    for storage in STORAGES:
+        result = run_storage(storage, payloads)
+        if result is None:
+            return
+        results[storage] = result
+
+    print(f"\nResultados ({NUM_KEYS} claves, durabilidad = {DURABILITY}, valores de hasta {max(VALUE_SIZES)} bytes):")
+    print(f"{'Almacenamiento':>14} | {'Operación':>9} | {'Operaciones':>11} | {'p50 (ms)':>9} | {'p99 (ms)':>9}")
+    print("-" * 64)
+    for storage, (read_latencies, write_latencies, _, _) in results.items():
+        for name, latencies in (("Get", read_latencies), ("Set", write_latencies)):
+            print(f"{storage:>14} | {name:>9} | {len(latencies):>11} | {percentile(latencies, 0.5):9.3f} | {percentile(latencies, 0.99):9.3f}")
+
+    failed = False
+    for storage, (_, _, errors, compactions) in results.items():
+        print(f"\nAlmacenamiento = {storage} ({compactions} compactaciones durante la prueba):")
+        if errors:
+            failed = True
+            print(f"  ERROR: {len(errors)} lecturas incorrectas. Primeras:")
+            for message in errors[:10]:
+                print(f"    {message}")
+        else:
+            print("  Ninguna lectura rota, obsoleta ni fuera de orden.")
+
+    plt.figure(figsize=(10, 6))
+    for storage, (read_latencies, _, _, _) in results.items():
+        plt.hist(read_latencies, bins=100, range=(0, percentile(read_latencies, 0.999)), alpha=0.5, label=f"Get ({storage})")
+        plt.axvline(percentile(read_latencies, 0.99), linestyle="--", label=f"p99 Get ({storage})")
+    plt.xlabel("Latencia (ms)")
+    plt.ylabel("Peticiones")
+    plt.title(f"Latencia de Get con Set concurrentes (durabilidad = {DURABILITY})")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig("stress_reads.png")
+    plt.show()
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
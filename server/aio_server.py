@@ -0,0 +1,264 @@
+import asyncio
+import contextvars
+from concurrent import futures
+
+import grpc
+
+import key_value_store_service_pb2
+import key_value_store_service_pb2_grpc
+from bytes_service import BytesKeyValueServicer
+from metrics import AioRequestMetricsInterceptor
+from migration import MigrationFenced
+
+# RPCs unarias y de streaming de servidor que se ejecutan con la logica sincrona de KeyValueServer
+UNARY_METHODS = ("Set", "MultiGet", "MultiSet", "GetPrefixKey", "Stat", "LatencyStats", "Profile", "Shards", "EndMigration")
+SERVER_STREAM_METHODS = ("GetPrefixKeyStream", "Scan", "Export")
+
+# RPCs del servicio KeyValueStoreBytes que se ejecutan en el pool de hilos
+BYTES_UNARY_METHODS = ("Set", "MultiGet", "MultiSet")
+BYTES_SERVER_STREAM_METHODS = ("GetStream",)
+
+# Operaciones en curso por stream Pipeline
+PIPELINE_MAX_IN_FLIGHT = 1024
+
+_END = object()
+
+
+class _Aborted(Exception):
+    """ Llamada abortada por la logica sincrona; se traslada al contexto asyncio en el bucle de eventos """
+
+    def __init__(self, code, details):
+        super().__init__(details)
+        self.code = code
+        self.details = details
+
+
+class _ThreadContext:
+    """ Contexto que reciben los metodos sincronos de KeyValueServer cuando se ejecutan en el pool de hilos.
+
+    El contexto de grpc.aio solo debe usarse desde el bucle de eventos, asi que este adaptador
+    guarda el codigo de estado y convierte abort en una excepcion que el bucle aplica despues.
+    """
+
+    def __init__(self, context):
+        self._context = context
+        self._active = True
+        self._code = None
+        self._details = None
+
+    def is_active(self):
+        return self._active
+
+    def abort(self, code, details):
+        raise _Aborted(code, details)
+
+    def set_code(self, code):
+        self._code = code
+
+    def set_details(self, details):
+        self._details = details
+
+    def invocation_metadata(self):
+        return self._context.invocation_metadata()
+
+    def finish(self):
+        """ Marca la llamada como terminada para que los generadores en curso dejen de producir lotes """
+        self._active = False
+
+    def apply(self):
+        """ Traslada al contexto asyncio el estado fijado desde el hilo (se llama en el bucle de eventos) """
+        if self._code is not None:
+            self._context.set_code(self._code)
+        if self._details is not None:
+            self._context.set_details(self._details)
+
+
+class AioKeyValueServicer(key_value_store_service_pb2_grpc.KeyValueStoreServicer):
+    """ Servicio KeyValueStore para el motor grpc.aio.
+
+    El bucle de eventos atiende todas las conexiones y llamadas sin limite de hilos; la logica de
+    KeyValueServer, que bloquea en los locks de las claves, el disco y el fsync del log, se ejecuta
+    en un pool de hilos propio, dentro de una copia del contexto de la llamada para que sus fases se
+    anoten en la traza de la peticion. Los Get en modo 'memory' se resuelven en el propio bucle, sin cambiar
+    de hilo.
+    """
+
+    def __init__(self, kv_server, workers=32):
+        self.kv_server = kv_server
+        self.executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aio-worker")
+
+        for name in UNARY_METHODS:
+            setattr(self, name, self._unary_handler(getattr(kv_server, name)))
+        for name in SERVER_STREAM_METHODS:
+            setattr(self, name, self._server_stream_handler(getattr(kv_server, name)))
+
+    def _unary_handler(self, method):
+        async def handler(request, context):
+            thread_context = _ThreadContext(context)
+            try:
+                response = await asyncio.get_running_loop().run_in_executor(self.executor, contextvars.copy_context().run, method, request, thread_context)
+            except _Aborted as e:
+                await context.abort(e.code, e.details)
+            finally:
+                thread_context.finish()
+            thread_context.apply()
+            return response
+        return handler
+
+    def _server_stream_handler(self, method):
+        async def handler(request, context):
+            loop = asyncio.get_running_loop()
+            thread_context = _ThreadContext(context)
+            responses = method(request, thread_context)
+            try:
+                while True:
+                    # Cada lote se genera en el pool de hilos; el bucle solo lo envia
+                    try:
+                        response = await loop.run_in_executor(self.executor, contextvars.copy_context().run, next, responses, _END)
+                    except _Aborted as e:
+                        await context.abort(e.code, e.details)
+                    if response is _END:
+                        break
+                    yield response
+            finally:
+                # Si el cliente cancela, el generador deja de recorrer el indice en su siguiente lote
+                thread_context.finish()
+            thread_context.apply()
+        return handler
+
+    async def Get(self, request, context):
+        kv_server = self.kv_server
+        if kv_server.storage == "memory":
+            # Las lecturas no toman el lock de la clave (ver KeyValueServer.Get)
+            value = kv_server.data.get(request.key)
+            if value is None:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                return key_value_store_service_pb2.GetValueResponse(status=False, value="Clave no encontrada")
+            kv_server.counters.add("total_requests")
+            kv_server.counters.add("total_get_requests")
+            return key_value_store_service_pb2.GetValueResponse(status=True, value=value.decode())
+
+        # En modo 'disk' el valor se lee del log: no bloqueamos el bucle
+        thread_context = _ThreadContext(context)
+        response = await asyncio.get_running_loop().run_in_executor(self.executor, contextvars.copy_context().run, kv_server.Get, request, thread_context)
+        thread_context.apply()
+        return response
+
+    async def Ingest(self, request_iterator, context):
+        """ Escribe cada lote recibido en el pool de hilos a medida que llega """
+        loop = asyncio.get_running_loop()
+        keys = 0
+        total_bytes = 0
+        async for batch in request_iterator:
+            entries = list(zip(batch.keys, batch.values))
+            if not entries:
+                continue
+            await loop.run_in_executor(self.executor, contextvars.copy_context().run, self.kv_server.apply_multi_set, entries)
+            keys += len(entries)
+            total_bytes += sum(len(key) + len(value) for key, value in entries)
+        return key_value_store_service_pb2.IngestResponse(keys=keys, bytes=total_bytes)
+
+    async def Pipeline(self, request_iterator, context):
+        """ Ejecuta cada operacion del stream en el pool de hilos y envia su respuesta en cuanto termina """
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(PIPELINE_MAX_IN_FLIGHT)
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def run(request):
+            try:
+                response = await loop.run_in_executor(self.executor, self.kv_server._pipeline_op, request)
+                # Las escrituras en el stream no pueden solaparse
+                async with write_lock:
+                    await context.write(response)
+            finally:
+                slots.release()
+
+        async for request in request_iterator:
+            await slots.acquire()
+            task = asyncio.ensure_future(run(request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        # El cliente cerro su lado del stream: esperamos las operaciones que siguen en curso
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+class AioBytesServicer(key_value_store_service_pb2_grpc.KeyValueStoreBytesServicer):
+    """ Servicio KeyValueStoreBytes para el motor grpc.aio; comparte el pool de hilos de AioKeyValueServicer """
+
+    def __init__(self, kv_server, aio_servicer):
+        self.kv_server = kv_server
+        self.bytes_servicer = BytesKeyValueServicer(kv_server)
+        self.executor = aio_servicer.executor
+
+        for name in BYTES_UNARY_METHODS:
+            setattr(self, name, aio_servicer._unary_handler(getattr(self.bytes_servicer, name)))
+        for name in BYTES_SERVER_STREAM_METHODS:
+            setattr(self, name, aio_servicer._server_stream_handler(getattr(self.bytes_servicer, name)))
+
+    async def Get(self, request, context):
+        kv_server = self.kv_server
+        if kv_server.storage == "memory":
+            # Igual que AioKeyValueServicer.Get, pero devolviendo el buffer guardado sin decodificarlo
+            value = kv_server.data.get(request.key)
+            if value is None:
+                context.set_code(grpc.StatusCode.NOT_FOUND)
+                return key_value_store_service_pb2.GetBytesResponse(status=False)
+            kv_server.counters.add("total_requests")
+            kv_server.counters.add("total_get_requests")
+            return key_value_store_service_pb2.GetBytesResponse(status=True, value=value)
+
+        thread_context = _ThreadContext(context)
+        response = await asyncio.get_running_loop().run_in_executor(self.executor, contextvars.copy_context().run, self.bytes_servicer.Get, request, thread_context)
+        thread_context.apply()
+        return response
+
+    async def SetStream(self, request_iterator, context):
+        """ Escribe cada bloque en el pool de hilos a medida que llega, como BytesKeyValueServicer.SetStream """
+        loop = asyncio.get_running_loop()
+        kv_server = self.kv_server
+        key = None
+        upload = None
+        try:
+            try:
+                async for chunk in request_iterator:
+                    if upload is None:
+                        if not chunk.key:
+                            break
+                        key = chunk.key
+                        upload = await loop.run_in_executor(self.executor, kv_server.begin_set_stream, key, chunk.total_size)
+                    await loop.run_in_executor(self.executor, upload.write, chunk.data)
+                if upload is not None:
+                    await loop.run_in_executor(self.executor, contextvars.copy_context().run, kv_server.finish_set_stream, key, upload)
+            except BaseException:
+                if upload is not None:
+                    upload.abort()
+                raise
+        except MigrationFenced as e:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        if upload is None:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "El primer mensaje debe llevar la clave y el tamaño del valor")
+        kv_server.counters.add("total_set_requests")
+        kv_server.counters.add("total_requests")
+        return key_value_store_service_pb2.SetKeyBytesResponse(status=True)
+
+
+async def serve_aio(kv_server, options, workers, port=50051):
+    """ Arranca el servidor grpc.aio y lo mantiene en ejecucion hasta que se cancele """
+    server = grpc.aio.server(options=options,
+                             interceptors=[AioRequestMetricsInterceptor(kv_server.counters, kv_server.errors, kv_server.latency)])
+    servicer = AioKeyValueServicer(kv_server, workers)
+    key_value_store_service_pb2_grpc.add_KeyValueStoreServicer_to_server(servicer, server)
+    key_value_store_service_pb2_grpc.add_KeyValueStoreBytesServicer_to_server(AioBytesServicer(kv_server, servicer), server)
+    server.add_insecure_port(f'[::]:{port}')
+    await server.start()
+    print(f"Server started on port {port} (engine = aio, durability = {kv_server.log.mode}, storage = {kv_server.storage})")
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(0)
+        servicer.executor.shutdown()
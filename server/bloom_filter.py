@@ -0,0 +1,142 @@
+import math
+import struct
+import threading
+import zlib
+
+# Formato serializado: cabecera (bits por clave, numero de capas) y por cada capa su cabecera y sus bits
+FILTER_HEADER = struct.Struct(">dI")
+LAYER_HEADER = struct.Struct(">IQQQ")
+
+# Claves que admite la primera capa antes de crear la siguiente
+INITIAL_CAPACITY = 64 * 1024
+
+
+def _hashes(key):
+    """ Dos hashes estables de la clave (el filtro se guarda en los snapshots y hash() cambia entre procesos).
+
+    El segundo es el CRC32 rotado: con doble hashing basta con que sea impar y distinto del primero.
+    """
+    h1 = zlib.crc32(key.encode("utf-8"))
+    return h1, ((h1 >> 15) | (h1 << 17)) & 0xFFFFFFFF | 1
+
+
+class _Layer:
+    __slots__ = ("k", "nbits", "capacity", "count", "bits")
+
+    def __init__(self, k, nbits, capacity, count = 0, bits = None):
+        self.k = k
+        self.nbits = nbits
+        self.capacity = capacity
+        self.count = count
+        self.bits = bytearray((nbits + 7) // 8) if bits is None else bits
+
+    def add(self, h1, h2):
+        bits, nbits = self.bits, self.nbits
+        position = h1 % nbits
+        for _ in range(self.k):
+            bits[position >> 3] |= 1 << (position & 7)
+            position = (position + h2) % nbits
+        self.count += 1
+
+    def estimated_fpr(self):
+        return (1 - math.exp(-self.k * self.count / self.nbits)) ** self.k
+
+
+class BloomFilter:
+    """ Filtro de Bloom de las claves existentes, para responder sin mas busquedas a las que no existen.
+
+    Crece por capas (filtro de Bloom escalable): cuando una capa llega a su capacidad se añade
+    otra del doble con una funcion hash mas, que tiene la mitad de falsos positivos, asi que la
+    tasa total queda acotada por el doble de la de la primera capa sin tener que reconstruir el
+    filtro con todas las claves. Las claves nunca se borran del almacen, asi que no hace falta
+    quitarlas del filtro. Los hashes se derivan de un CRC32 de la clave (doble hashing).
+
+    Las consultas no toman ningun lock: una clave se añade antes de publicar su ubicacion, asi
+    que quien puede ver la clave ve tambien sus bits. Las inserciones se serializan con un lock
+    porque dos claves pueden compartir un byte del filtro.
+    """
+
+    def __init__(self, bits_per_key = 10, initial_capacity = INITIAL_CAPACITY):
+        self.bits_per_key = bits_per_key
+        self.lock = threading.Lock()
+        self.layers = []
+        self._add_layer(initial_capacity)
+
+    def _add_layer(self, capacity):
+        # Cada capa usa una funcion hash mas que la anterior y ~1.44 bits por clave mas (mitad de falsos positivos)
+        k = max(1, round(self.bits_per_key * math.log(2))) + len(self.layers)
+        nbits = max(64, int(capacity * k / math.log(2)))
+        self.layers.append(_Layer(k, nbits, capacity))
+
+    def add(self, key):
+        h1, h2 = _hashes(key)
+        with self.lock:
+            layer = self.layers[-1]
+            if layer.count >= layer.capacity:
+                self._add_layer(layer.capacity * 2)
+                layer = self.layers[-1]
+            layer.add(h1, h2)
+
+    def might_contain(self, key):
+        """ False si la clave seguro que no se ha añadido; True si probablemente si.
+
+        Esta en el camino de cada lectura, asi que los bits se consultan aqui mismo: con una clave
+        que no esta casi siempre basta con mirar uno o dos bits de cada capa.
+        """
+        h1, h2 = _hashes(key)
+        for layer in self.layers:
+            bits, nbits = layer.bits, layer.nbits
+            position = h1 % nbits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                continue
+            for _ in range(layer.k - 1):
+                position = (position + h2) % nbits
+                if not bits[position >> 3] & (1 << (position & 7)):
+                    break
+            else:
+                return True
+        return False
+
+    def estimated_fpr(self):
+        """ Probabilidad estimada de falso positivo segun lo llenas que estan las capas """
+        miss = 1.0
+        for layer in list(self.layers):
+            miss *= 1 - layer.estimated_fpr()
+        return 1 - miss
+
+    def size_bytes(self):
+        return sum(len(layer.bits) for layer in list(self.layers))
+
+    def to_bytes(self):
+        with self.lock:
+            parts = [FILTER_HEADER.pack(self.bits_per_key, len(self.layers))]
+            for layer in self.layers:
+                parts.append(LAYER_HEADER.pack(layer.k, layer.nbits, layer.capacity, layer.count))
+                parts.append(bytes(layer.bits))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """ Reconstruye un filtro serializado con to_bytes; lanza ValueError si los datos no son validos """
+        try:
+            bits_per_key, count = FILTER_HEADER.unpack_from(data, 0)
+            offset = FILTER_HEADER.size
+            layers = []
+            for _ in range(count):
+                k, nbits, capacity, added = LAYER_HEADER.unpack_from(data, offset)
+                offset += LAYER_HEADER.size
+                size = (nbits + 7) // 8
+                bits = bytearray(data[offset:offset + size])
+                if len(bits) != size or k == 0 or nbits == 0:
+                    raise ValueError("Capa del filtro de Bloom incompleta")
+                offset += size
+                layers.append(_Layer(k, nbits, capacity, added, bits))
+        except struct.error as e:
+            raise ValueError(f"Filtro de Bloom dañado: {e}")
+        if not layers or offset != len(data):
+            raise ValueError("Filtro de Bloom dañado")
+        bloom = cls.__new__(cls)
+        bloom.bits_per_key = bits_per_key
+        bloom.lock = threading.Lock()
+        bloom.layers = layers
+        return bloom
@@ -0,0 +1,101 @@
+import itertools
+
+import grpc
+
+import key_value_store_service_pb2
+import key_value_store_service_pb2_grpc
+from migration import MigrationFenced
+
+
+# Tamaño por defecto de cada bloque de GetStream
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+
+class BytesKeyValueServicer(key_value_store_service_pb2_grpc.KeyValueStoreBytesServicer):
+    """ Servicio KeyValueStoreBytes: Get, Set y sus versiones por lotes y por bloques con los valores en bytes.
+
+    Comparte el almacen, los locks y el log de KeyValueServer. Los valores llegan en bytes y se
+    escriben en el log y se guardan en memoria sin convertirlos, y los Get devuelven el buffer
+    guardado (o leido del log en modo 'disk') sin decodificarlo. Las claves siguen siendo texto
+    porque las usan el indice ordenado y las consultas por prefijo.
+    """
+
+    def __init__(self, kv_server):
+        self.kv_server = kv_server
+
+    def Get(self, request, context):
+        value = self.kv_server.read_value(request.key)
+        if value is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            return key_value_store_service_pb2.GetBytesResponse(status = False)
+        self.kv_server.counters.add("total_requests")
+        self.kv_server.counters.add("total_get_requests")
+        return key_value_store_service_pb2.GetBytesResponse(status = True, value = value)
+
+    def Set(self, request, context):
+        try:
+            self.kv_server.apply_set(request.key, request.value)
+        except MigrationFenced as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        self.kv_server.counters.add("total_set_requests")
+        self.kv_server.counters.add("total_requests")
+        return key_value_store_service_pb2.SetKeyBytesResponse(status = True)
+
+    def MultiGet(self, request, context):
+        results = []
+        for key in request.keys:
+            value = self.kv_server.read_value(key)
+            if value is None:
+                results.append(key_value_store_service_pb2.GetBytesResponse(status = False))
+            else:
+                results.append(key_value_store_service_pb2.GetBytesResponse(status = True, value = value))
+        self.kv_server.counters.add("total_requests", len(request.keys))
+        self.kv_server.counters.add("total_get_requests", len(request.keys))
+        return key_value_store_service_pb2.MultiGetBytesResponse(results = results)
+
+    def MultiSet(self, request, context):
+        entries = [(entry.key, entry.value) for entry in request.entries]
+        if not entries:
+            return key_value_store_service_pb2.MultiSetResponse()
+        try:
+            self.kv_server.apply_multi_set(entries)
+        except MigrationFenced as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        self.kv_server.counters.add("total_requests", len(entries))
+        self.kv_server.counters.add("total_set_requests", len(entries))
+        return key_value_store_service_pb2.MultiSetResponse(status = [True] * len(entries))
+
+    def SetStream(self, request_iterator, context):
+        """ Escribe en el log cada bloque del valor en cuanto llega (ver KeyValueServer.apply_set_stream) """
+        first = next(request_iterator, None)
+        if first is None or not first.key:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "El primer mensaje debe llevar la clave y el tamaño del valor")
+        chunks = (chunk.data for chunk in itertools.chain([first], request_iterator))
+        try:
+            self.kv_server.apply_set_stream(first.key, first.total_size, chunks)
+        except MigrationFenced as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        self.kv_server.counters.add("total_set_requests")
+        self.kv_server.counters.add("total_requests")
+        return key_value_store_service_pb2.SetKeyBytesResponse(status = True)
+
+    def GetStream(self, request, context):
+        """ Envia el valor en bloques de chunk_size bytes, leyendo del log solo el bloque que se envia """
+        value = self.kv_server.value_chunks(request.key, request.chunk_size or STREAM_CHUNK_BYTES)
+        if value is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "Clave no encontrada")
+        self.kv_server.counters.add("total_requests")
+        self.kv_server.counters.add("total_get_requests")
+
+        size, chunks = value
+        yield key_value_store_service_pb2.ValueChunk(key = request.key, total_size = size)
+        try:
+            for data in chunks:
+                if not context.is_active():
+                    return
+                yield key_value_store_service_pb2.ValueChunk(data = data)
+        except FileNotFoundError:
+            # El compactador retiro el segmento durante la descarga: el cliente debe repetirla
+            context.abort(grpc.StatusCode.ABORTED, "El valor cambio de sitio durante la descarga")
@@ -0,0 +1,780 @@
+import os
+from collections import deque
+import struct
+import threading
+import time
+import datetime
+
+# Modos de durabilidad soportados por el log
+#   always:   fsync sincrono en cada escritura
+#   group:    group commit, un fsync por lote de escrituras concurrentes
+#   interval: escritura al SO en cada peticion y fsync periodico cada N ms
+#   none:     solo se escribe al buffer del SO, sin fsync
+DURABILITY_MODES = ("always", "group", "interval", "none")
+
+# Tamaño de la cabecera de cada registro (4 bytes de longitud de clave y 4 de valor)
+HEADER_SIZE = 8
+
+# Los dos bits altos de la longitud de clave indican el tipo de registro:
+#   BODY_FLAG:   cuerpo de un valor subido por partes (SetStream). Solo es valido si despues hay
+#                un marcador que lo confirma; si el servidor cae a mitad de la subida se ignora
+#   MARKER_FLAG: marcador de confirmacion de un cuerpo; su valor es la ubicacion del cuerpo (MARKER)
+#   BLOB_FLAG:   (los dos bits) puntero a un valor grande guardado en el log de blobs; su valor es
+#                la ubicacion del registro en ese log (BLOB_POINTER)
+BODY_FLAG = 1 << 31
+MARKER_FLAG = 1 << 30
+BLOB_FLAG = BODY_FLAG | MARKER_FLAG
+KEY_LEN_MASK = MARKER_FLAG - 1
+MARKER = struct.Struct(">QQQ")
+BLOB_POINTER = struct.Struct(">QQQ")
+
+# Cada segmento se identifica con un entero que combina su numero y su generacion
+# (la generacion aumenta cada vez que el compactador reescribe el segmento)
+GEN_BITS = 16
+
+# Segundos que se mantiene abierto el descriptor de un segmento retirado por el compactador
+RETIRED_FD_GRACE_SECONDS = 30
+
+# Numero maximo de buffers por llamada a os.writev (IOV_MAX del sistema)
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+
+def make_segment(number, gen=0):
+    """ Combina numero y generacion en el identificador de segmento """
+    return (number << GEN_BITS) | gen
+
+
+def segment_number(segment):
+    return segment >> GEN_BITS
+
+
+def segment_gen(segment):
+    return segment & ((1 << GEN_BITS) - 1)
+
+
+def segment_filename(segment):
+    """ Nombre del archivo de un segmento: database.<numero>.<generacion>.log """
+    return f"database.{segment_number(segment):06d}.{segment_gen(segment):04d}.log"
+
+
+def parse_segment_filename(name):
+    """ Devuelve el identificador del segmento a partir del nombre de archivo, o None si no es un segmento """
+    parts = name.split(".")
+    if len(parts) != 4 or parts[0] != "database" or parts[3] != "log":
+        return None
+    if not (parts[1].isdigit() and parts[2].isdigit()):
+        return None
+    return make_segment(int(parts[1]), int(parts[2]))
+
+
+def record_buffers(key, value, flags=0):
+    """ Buffers de un registro del log: cabecera (longitudes de clave y valor), clave y valor, sin concatenarlos """
+    return [struct.pack(">II", len(key) | flags, len(value)), key, value]
+
+
+def encode_record(key, value, flags=0):
+    """ Serializa un registro del log en un solo bloque: cabecera + clave + valor """
+    return b"".join(record_buffers(key, value, flags))
+
+
+def write_buffers(fd, buffers, offset):
+    """ Escribe los buffers en orden a partir de offset con una escritura agrupada (os.pwritev), sin copiarlos a un bloque comun.
+
+    Si el sistema escribe solo una parte se continua desde el punto en que se quedo.
+    """
+    buffers = [memoryview(buffer) for buffer in buffers if len(buffer)]
+    if not hasattr(os, "pwritev"):
+        for buffer in buffers:
+            while buffer:
+                written = os.pwrite(fd, buffer, offset)
+                buffer = buffer[written:]
+                offset += written
+        return
+    first = 0
+    while first < len(buffers):
+        written = os.pwritev(fd, buffers[first:first + IOV_MAX], offset)
+        offset += written
+        # Saltamos los buffers escritos por completo y recortamos el que quedo a medias
+        while first < len(buffers) and written >= len(buffers[first]):
+            written -= len(buffers[first])
+            first += 1
+        if written:
+            buffers[first] = buffers[first][written:]
+
+
+def read_records(path, with_values=True):
+    """ Recorre los registros de un segmento y devuelve (offset, tamaño, clave, valor, flags) por cada uno.
+
+    Se detiene en el primer registro incompleto, que corresponde a una escritura interrumpida
+    (fallo de luz, de proceso, etc). Con with_values=False los valores no se leen (se devuelve None),
+    salvo los de los marcadores y los punteros a blobs, que son la ubicacion a la que apuntan.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        offset = 0
+        while True:
+            header = file.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                return
+
+            key_len, value_len = struct.unpack(">II", header)
+            flags = key_len & ~KEY_LEN_MASK
+            key_len &= KEY_LEN_MASK
+            key = file.read(key_len)
+            if len(key) < key_len:
+                return
+            if with_values or flags in (MARKER_FLAG, BLOB_FLAG):
+                value = file.read(value_len)
+                if len(value) < value_len:
+                    return
+            else:
+                value = None
+                if offset + HEADER_SIZE + key_len + value_len > file_size:
+                    return
+                file.seek(value_len, os.SEEK_CUR)
+
+            size = HEADER_SIZE + key_len + value_len
+            yield offset, size, key, value, flags
+            offset += size
+
+
+def fsync_dir(path):
+    """ Sincroniza un directorio para que los renombrados y borrados sean durables """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _PendingWrite:
+    """ Registro encolado que espera a que el escritor lo haga durable """
+
+    __slots__ = ("buffers", "nbytes", "sizes", "event", "enqueued_at", "error", "location", "fsync_seconds")
+
+    def __init__(self, buffers, nbytes, sizes=None):
+        # Buffers de los registros (cabeceras, claves y valores) que se escriben juntos con os.writev
+        self.buffers = buffers
+        self.nbytes = nbytes
+        # Tamaño de cada registro si buffers contiene varios registros consecutivos
+        self.sizes = sizes
+        self.event = threading.Event()
+        self.enqueued_at = time.perf_counter()
+        self.error = None
+        self.location = None
+        # Duracion del fsync del lote que cubrio el registro
+        self.fsync_seconds = 0.0
+
+    def wait(self):
+        """ Bloquea hasta que el fsync que cubre el registro haya terminado y devuelve su ubicacion (o la lista de ubicaciones) """
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.location
+
+
+class _Upload:
+    """ Valor que se escribe por partes directamente en su sitio del log (ver CommitLog.begin_upload) """
+
+    def __init__(self, log, fd, key, location, value_size):
+        self.log = log
+        self.fd = fd
+        self.key = key
+        # Ubicacion del registro cuerpo completo (cabecera + clave + valor)
+        self.location = location
+        self.value_size = value_size
+        self.value_offset = location[1] + HEADER_SIZE + len(key)
+        self.written = 0
+        self.finished = False
+
+    def write(self, data):
+        """ Escribe la siguiente parte del valor a continuacion de la anterior """
+        if self.written + len(data) > self.value_size:
+            raise ValueError(f"El valor supera el tamaño anunciado ({self.value_size} bytes)")
+        write_buffers(self.fd, [data], self.value_offset + self.written)
+        self.written += len(data)
+
+    def read_back(self):
+        """ Lee el valor completo ya escrito (para guardarlo en memoria en modo 'memory') """
+        return os.pread(self.fd, self.value_size, self.value_offset)
+
+    def commit(self, confirm=True):
+        """ Hace durable el cuerpo y escribe su marcador con la durabilidad del modo; devuelve la ubicacion del cuerpo.
+
+        El cuerpo se sincroniza antes de escribir el marcador, asi que un marcador durable nunca
+        apunta a un cuerpo incompleto (salvo en modo 'none', que no sincroniza nada). Con
+        confirm=False no se escribe el marcador: lo confirma quien guarde la ubicacion del cuerpo
+        en otro log (el puntero de un blob).
+        """
+        if self.written != self.value_size:
+            raise ValueError(f"Faltan {self.value_size - self.written} bytes del valor")
+        if self.log.mode != "none":
+            os.fsync(self.fd)
+        if confirm:
+            segment, offset, size = self.location
+            self.log.append(self.key, MARKER.pack(segment, offset, size), MARKER_FLAG)
+        self.log._end_upload(self)
+        return self.location
+
+    def abort(self):
+        """ Descarta la subida: el cuerpo queda como registro muerto sin marcador """
+        if not self.finished:
+            self.log.mark_dead(self.location)
+            self.log._end_upload(self)
+
+
+class CommitLog:
+    """ Log de solo escritura dividido en segmentos, con durabilidad configurable.
+
+    Las escrituras van siempre al segmento activo; cuando supera el tamaño maximo se sella
+    y se abre uno nuevo. Los segmentos sellados son inmutables salvo para el compactador,
+    que los reescribe con una generacion nueva.
+
+    En modo 'group' los hilos que atienden peticiones Set encolan sus registros y un unico
+    hilo escritor los agrupa, los escribe de una sola vez y hace un unico fsync por lote.
+    Cada llamador recibe su confirmacion solo despues del fsync que cubre su registro.
+    El resto de modos escriben desde el propio hilo del llamador bajo un lock del archivo.
+
+    Cada escritura devuelve la ubicacion del registro: (segmento, offset, tamaño). Los registros
+    se escriben con os.pwritev en el offset reservado para ellos, lo que permite reservar el hueco
+    de un valor grande y rellenarlo por partes mientras otros registros se escriben detras.
+    """
+
+    def __init__(self, data_dir, mode="group", fsync_interval_ms=100, segment_max_bytes=64 * 1024 * 1024,
+                 legacy_path=None, max_batch_bytes=16 * 1024 * 1024, max_wait_ms=0.0, latency=None):
+        if mode not in DURABILITY_MODES:
+            raise ValueError(f"Modo de durabilidad desconocido: {mode}")
+
+        self.data_dir = data_dir
+        self.mode = mode
+        self.segment_max_bytes = segment_max_bytes
+        self._file_lock = threading.Lock()
+
+        # Tamaño y bytes muertos (registros sobrescritos) de cada segmento
+        self.segment_sizes = {}
+        self.dead_bytes = {}
+        self._accounting_lock = threading.Lock()
+
+        # Descriptores de lectura de cada segmento para leer valores con os.pread. Los de segmentos
+        # retirados por el compactador se cierran con retraso, por si algun lector aun los usa
+        self._read_fds = {}
+        self._retired_fds = []
+        self._fds_lock = threading.Lock()
+
+        # Subidas por partes en curso por segmento: esos segmentos no se compactan hasta que terminen
+        self._uploads = {}
+
+        os.makedirs(data_dir, exist_ok=True)
+        self._load_segments(legacy_path)
+
+        # Abrimos siempre un segmento nuevo: si el ultimo quedo con un registro incompleto
+        # no se escribe nada detras de el
+        last_number = max((segment_number(s) for s in self.segment_sizes), default=0)
+        self._open_segment(make_segment(last_number + 1))
+
+        # Momento (epoch) del ultimo fsync completado, 0 si aun no se ha hecho ninguno
+        self.last_fsync = 0.0
+        self._dirty = False
+
+        # Limite de bytes por lote y tiempo maximo que el escritor espera a que lleguen mas registros
+        self.max_batch_bytes = max_batch_bytes
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue = deque()
+        self._queued_bytes = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Metricas del escritor (las modifica el hilo escritor o el llamador bajo el lock del archivo)
+        self.total_batches = 0
+        self.total_records = 0
+        self.total_bytes = 0
+        self.max_batch_records = 0
+        self.total_fsync_seconds = 0.0
+        self.total_commit_seconds = 0.0
+        self.max_commit_seconds = 0.0
+
+        # Histogramas de latencia del servidor (metrics.LatencyHistograms) donde se anota cada fsync
+        self.latency = latency
+
+        # Hilo de fondo segun el modo: escritor de lotes (group) o fsync periodico (interval)
+        self._writer = None
+        if mode == "group":
+            self._writer = threading.Thread(target=self._run, name="commit-log-writer", daemon=True)
+        elif mode == "interval":
+            self.fsync_interval = fsync_interval_ms / 1000
+            self._writer = threading.Thread(target=self._run_interval, name="commit-log-fsync", daemon=True)
+        if self._writer is not None:
+            self._writer.start()
+
+    def _load_segments(self, legacy_path):
+        """ Busca los segmentos existentes y limpia los restos de compactaciones interrumpidas """
+        found = {}
+        for name in os.listdir(self.data_dir):
+            path = os.path.join(self.data_dir, name)
+            # Archivos temporales de una compactacion que no llego a completarse
+            if name.endswith(".tmp"):
+                os.remove(path)
+                continue
+            segment = parse_segment_filename(name)
+            if segment is None:
+                continue
+            number = segment_number(segment)
+            # Si quedaron dos generaciones del mismo segmento, la mas nueva ya esta completa
+            if number in found:
+                older, newer = sorted((found[number], segment))
+                os.remove(os.path.join(self.data_dir, segment_filename(older)))
+                segment = newer
+            found[number] = segment
+
+        # El antiguo database.log (un unico archivo) se migra como el primer segmento
+        if not found and legacy_path and os.path.exists(legacy_path) and os.path.getsize(legacy_path) > 0:
+            segment = make_segment(0)
+            os.rename(legacy_path, self.segment_path(segment))
+            fsync_dir(self.data_dir)
+            found[0] = segment
+
+        for segment in found.values():
+            size = os.path.getsize(self.segment_path(segment))
+            # Segmentos abiertos en arranques anteriores en los que no se llego a escribir nada
+            if size == 0:
+                os.remove(self.segment_path(segment))
+                continue
+            self.segment_sizes[segment] = size
+            self.dead_bytes[segment] = 0
+
+    def segment_path(self, segment):
+        return os.path.join(self.data_dir, segment_filename(segment))
+
+    def _open_segment(self, segment):
+        """ Abre un segmento nuevo como segmento activo.
+
+        El archivo no tiene buffer: los registros se escriben directamente con os.pwritev.
+        """
+        self.active_segment = segment
+        self.file = open(self.segment_path(segment), "wb", buffering=0)
+        with self._accounting_lock:
+            self.segment_sizes[segment] = 0
+            self.dead_bytes[segment] = 0
+        fsync_dir(self.data_dir)
+
+    def _maybe_rotate(self):
+        """ Sella el segmento activo si supero el tamaño maximo (se llama con el lock del archivo) """
+        if self.segment_sizes[self.active_segment] >= self.segment_max_bytes:
+            self._seal_active()
+
+    def rotate(self):
+        """ Sella el segmento activo si tiene datos y devuelve el numero del nuevo segmento activo """
+        with self._file_lock:
+            if self.segment_sizes[self.active_segment] > 0:
+                self._seal_active()
+            return segment_number(self.active_segment)
+
+    def _seal_active(self):
+        """ Cierra el segmento activo y abre el siguiente (se llama con el lock del archivo) """
+        if self.mode != "none":
+            os.fsync(self.file.fileno())
+        self.file.close()
+        self._open_segment(make_segment(segment_number(self.active_segment) + 1))
+
+    def _reserve(self, nbytes):
+        """ Devuelve el segmento activo y el offset donde empiezan los nbytes siguientes (con el lock del archivo) """
+        self._maybe_rotate()
+        segment = self.active_segment
+        offset = self.segment_sizes[segment]
+        with self._accounting_lock:
+            self.segment_sizes[segment] = offset + nbytes
+        return segment, offset
+
+    def _locations(self, segment, offset, nbytes, sizes):
+        """ Ubicacion del registro, o lista de ubicaciones si sizes indica varios registros consecutivos """
+        if sizes is None:
+            return segment, offset, nbytes
+        locations = []
+        for size in sizes:
+            locations.append((segment, offset, size))
+            offset += size
+        return locations
+
+    def _write(self, buffers, nbytes, sizes=None):
+        """ Escribe uno o varios registros en el segmento activo y devuelve su ubicacion (con el lock del archivo) """
+        segment, offset = self._reserve(nbytes)
+        write_buffers(self.file.fileno(), buffers, offset)
+        return self._locations(segment, offset, nbytes, sizes)
+
+    def begin_upload(self, key, value_size):
+        """ Reserva en el segmento activo el registro cuerpo de un valor de value_size bytes que llegara por partes.
+
+        La cabecera (marcada como cuerpo) y la clave se escriben ya; el valor se rellena con
+        _Upload.write y solo pasa a ser visible tras la recuperacion si _Upload.commit escribe su
+        marcador. El resto de escrituras continuan detras del hueco reservado.
+        """
+        nbytes = HEADER_SIZE + len(key) + value_size
+        with self._file_lock:
+            if self.file.closed:
+                raise ValueError("El log de escritura esta cerrado")
+            segment, offset = self._reserve(nbytes)
+            self._uploads[segment] = self._uploads.get(segment, 0) + 1
+            # Descriptor propio: la subida sigue aunque el segmento se selle mientras tanto
+            fd = os.open(self.segment_path(segment), os.O_RDWR)
+            write_buffers(fd, [struct.pack(">II", len(key) | BODY_FLAG, value_size), key], offset)
+        return _Upload(self, fd, key, (segment, offset, nbytes), value_size)
+
+    def _end_upload(self, upload):
+        upload.finished = True
+        os.close(upload.fd)
+        segment = upload.location[0]
+        with self._file_lock:
+            self._uploads[segment] -= 1
+            if not self._uploads[segment]:
+                del self._uploads[segment]
+
+    def replay(self, from_number=0, with_values=True):
+        """ Recorre en orden los registros de los segmentos sellados a partir del numero dado.
+
+        Devuelve (segmento, offset, tamaño, clave, valor, flags); un registro posterior de la misma
+        clave sustituye al anterior.
+        """
+        for segment in self.sealed_segments():
+            if segment_number(segment) < from_number:
+                continue
+            for offset, size, key, value, flags in read_records(self.segment_path(segment), with_values):
+                yield segment, offset, size, key, value, flags
+
+    def sealed_segments(self):
+        """ Lista ordenada de los segmentos que ya no reciben escrituras """
+        with self._accounting_lock:
+            return sorted(s for s in self.segment_sizes if s != self.active_segment)
+
+    def compactable_segments(self):
+        """ Segmentos sellados sin subidas por partes en curso """
+        with self._file_lock:
+            uploading = set(self._uploads)
+        return [segment for segment in self.sealed_segments() if segment not in uploading]
+
+    def has_segment(self, segment):
+        """ Indica si el segmento (numero y generacion) sigue existiendo """
+        with self._accounting_lock:
+            return segment in self.segment_sizes
+
+    def contains(self, location):
+        """ Indica si el registro de la ubicacion dada esta entero en un segmento existente """
+        segment, offset, size = location
+        with self._accounting_lock:
+            return offset + size <= self.segment_sizes.get(segment, 0)
+
+    def segment_table(self, below=None):
+        """ Devuelve numero -> (generacion, bytes muertos) de los segmentos sellados (opcionalmente solo los anteriores a 'below') """
+        with self._accounting_lock:
+            return {
+                segment_number(s): (segment_gen(s), self.dead_bytes[s])
+                for s in self.segment_sizes
+                if s != self.active_segment and (below is None or segment_number(s) < below)
+            }
+
+    def restore_dead_bytes(self, table):
+        """ Recupera la contabilidad de bytes muertos guardada en un snapshot """
+        with self._accounting_lock:
+            for segment in self.segment_sizes:
+                entry = table.get(segment_number(segment))
+                if entry is not None and entry[0] == segment_gen(segment):
+                    self.dead_bytes[segment] = entry[1]
+
+    def reset_dead_bytes(self, live_bytes):
+        """ Calcula los bytes muertos de los segmentos sellados a partir de sus bytes vivos (segmento -> bytes).
+
+        Sirve para los logs que no se reproducen al arrancar (el de blobs): todo lo que no esta
+        vivo, incluidas las subidas interrumpidas, queda como muerto para el compactador.
+        """
+        with self._accounting_lock:
+            for segment, size in self.segment_sizes.items():
+                if segment != self.active_segment:
+                    self.dead_bytes[segment] = size - live_bytes.get(segment, 0)
+
+    def mark_dead(self, location):
+        """ Contabiliza como muerto un registro que ha sido sustituido por otro mas reciente """
+        segment, _, size = location
+        with self._accounting_lock:
+            if segment in self.dead_bytes:
+                self.dead_bytes[segment] += size
+
+    def space_usage(self):
+        """ Devuelve (bytes vivos, bytes muertos, numero de segmentos) """
+        with self._accounting_lock:
+            total = sum(self.segment_sizes.values())
+            dead = sum(self.dead_bytes.values())
+            return total - dead, dead, len(self.segment_sizes)
+
+    def dead_ratio(self, segment):
+        with self._accounting_lock:
+            size = self.segment_sizes.get(segment, 0)
+            return self.dead_bytes.get(segment, 0) / size if size else 0.0
+
+    def install_segment(self, old_segment, new_segment, size):
+        """ Registra la nueva generacion de un segmento compactado en lugar de la anterior.
+
+        El archivo de la nueva generacion ya debe estar completo y sincronizado en disco; el de la
+        anterior se borra con remove_segment_file cuando ninguna clave apunte a el.
+        """
+        with self._accounting_lock:
+            self.segment_sizes[new_segment] = size
+            self.dead_bytes[new_segment] = 0
+            del self.segment_sizes[old_segment]
+            del self.dead_bytes[old_segment]
+
+    def remove_segment_file(self, segment):
+        """ Borra del disco una generacion de segmento ya retirada """
+        self._retire_fd(segment)
+        os.remove(self.segment_path(segment))
+        fsync_dir(self.data_dir)
+
+    def _fd_for(self, segment):
+        """ Devuelve (abriendolo si hace falta) el descriptor de lectura de un segmento """
+        fd = self._read_fds.get(segment)
+        if fd is not None:
+            return fd
+        with self._fds_lock:
+            fd = self._read_fds.get(segment)
+            if fd is None:
+                fd = os.open(self.segment_path(segment), os.O_RDONLY)
+                self._read_fds[segment] = fd
+            return fd
+
+    def _retire_fd(self, segment):
+        """ Deja de ofrecer el descriptor del segmento y cierra los retirados hace tiempo """
+        now = time.monotonic()
+        with self._fds_lock:
+            fd = self._read_fds.pop(segment, None)
+            if fd is not None:
+                self._retired_fds.append((now, fd))
+            while self._retired_fds and now - self._retired_fds[0][0] > RETIRED_FD_GRACE_SECONDS:
+                os.close(self._retired_fds.pop(0)[1])
+
+    def read_value(self, location, key_len, start=0, length=None):
+        """ Lee con os.pread el valor del registro en la ubicacion dada (o length bytes desde start) """
+        segment, offset, size = location
+        value_len = size - HEADER_SIZE - key_len
+        if length is None:
+            length = value_len - start
+        return os.pread(self._fd_for(segment), length, offset + HEADER_SIZE + key_len + start)
+
+    def drop_segment(self, segment):
+        """ Elimina un segmento que ya no contiene ningun registro vivo """
+        with self._accounting_lock:
+            del self.segment_sizes[segment]
+            del self.dead_bytes[segment]
+        self.remove_segment_file(segment)
+
+    def append(self, key, value, flags=0):
+        """ Escribe un registro (clave y valor en bytes o memoryview) con la durabilidad del modo configurado y devuelve su ubicacion.
+
+        La cabecera, la clave y el valor se escriben con una sola llamada os.pwritev, sin copiarlos a un bloque comun.
+        """
+        buffers = record_buffers(key, value, flags)
+        nbytes = HEADER_SIZE + len(key) + len(value)
+        if self.mode == "group":
+            return self._append_group(buffers, nbytes)
+        return self._append_direct(buffers, nbytes)
+
+    def append_many(self, items, flags=None):
+        """ Escribe varios registros (pares clave, valor en bytes) con una sola escritura y un solo fsync.
+
+        flags indica opcionalmente el tipo de cada registro. Devuelve la lista de ubicaciones en el
+        mismo orden que items.
+        """
+        buffers = []
+        sizes = []
+        for i, (key, value) in enumerate(items):
+            buffers.extend(record_buffers(key, value, flags[i] if flags else 0))
+            sizes.append(HEADER_SIZE + len(key) + len(value))
+        if self.mode == "group":
+            return self._append_group(buffers, sum(sizes), sizes)
+        return self._append_direct(buffers, sum(sizes), sizes)
+
+    def _append_direct(self, buffers, nbytes, sizes=None):
+        """ Escribe en los modos sin escritor de lotes; sizes indica si buffers contiene varios registros """
+        start = time.perf_counter()
+        with self._file_lock:
+            if self.file.closed:
+                raise ValueError("El log de escritura esta cerrado")
+            location = self._write(buffers, nbytes, sizes)
+            if self.mode == "always":
+                fsync_start = time.perf_counter()
+                os.fsync(self.file.fileno())
+                self.last_fsync = time.time()
+                self._record_fsync(time.perf_counter() - fsync_start)
+            else:
+                self._dirty = True
+
+            # En estos modos cada escritura es su propio "lote"
+            commit_seconds = time.perf_counter() - start
+            records = 1 if sizes is None else len(sizes)
+            self.total_batches += 1
+            self.total_records += records
+            self.total_bytes += nbytes
+            self.max_batch_records = max(self.max_batch_records, records)
+            self.total_commit_seconds += commit_seconds * records
+            self.max_commit_seconds = max(self.max_commit_seconds, commit_seconds)
+        return location
+
+    def _run_interval(self):
+        """ Bucle del hilo de fsync periodico del modo 'interval' """
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                self._cond.wait(self.fsync_interval)
+            self.sync()
+
+    def sync(self):
+        """ Fuerza un fsync de lo escrito hasta ahora si hay datos sin sincronizar """
+        with self._file_lock:
+            if not self._dirty or self.file.closed:
+                return
+            self._dirty = False
+            fd = os.dup(self.file.fileno())
+        # El fsync se hace fuera del lock para no bloquear a los escritores
+        try:
+            fsync_start = time.perf_counter()
+            os.fsync(fd)
+            self.last_fsync = time.time()
+            if self.latency is not None:
+                self.latency.record("fsync", time.perf_counter() - fsync_start)
+        finally:
+            os.close(fd)
+
+    def last_fsync_iso(self):
+        """ Fecha del ultimo fsync en formato ISO, o cadena vacia si nunca se ha hecho """
+        if not self.last_fsync:
+            return ""
+        return datetime.datetime.fromtimestamp(self.last_fsync).isoformat()
+
+    def _append_group(self, buffers, nbytes, sizes=None):
+        """ Encola el registro (o los registros) para el escritor de lotes y espera al fsync que lo cubre """
+        pending = _PendingWrite(buffers, nbytes, sizes)
+        with self._cond:
+            if self._closed:
+                raise ValueError("El log de escritura esta cerrado")
+            self._queue.append(pending)
+            self._queued_bytes += pending.nbytes
+            self._cond.notify()
+        location = pending.wait()
+        # El fsync se hizo en el hilo escritor: lo anotamos tambien en la traza de la peticion
+        if self.latency is not None:
+            self.latency.trace("fsync", pending.fsync_seconds)
+        return location
+
+    def _next_batch(self):
+        """ Extrae de la cola el siguiente lote de registros respetando el limite de bytes """
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+
+            # Si se configuro una espera, damos tiempo a que se acumulen mas registros en el lote
+            if self.max_wait:
+                deadline = time.perf_counter() + self.max_wait
+                while not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0 or self._queued_bytes >= self.max_batch_bytes:
+                        break
+                    self._cond.wait(remaining)
+
+            batch = []
+            batch_bytes = 0
+            while self._queue and (not batch or batch_bytes + self._queue[0].nbytes <= self.max_batch_bytes):
+                pending = self._queue.popleft()
+                batch.append(pending)
+                batch_bytes += pending.nbytes
+            self._queued_bytes -= batch_bytes
+            return batch
+
+    def _run(self):
+        """ Bucle del hilo escritor: escribe cada lote, hace un fsync y confirma a los llamadores """
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            error = None
+            try:
+                with self._file_lock:
+                    # Todo el lote se escribe con una sola escritura agrupada, sin concatenar los registros
+                    buffers = []
+                    for pending in batch:
+                        # Si el segmento se llena a mitad de lote, lo acumulado se escribe antes de sellarlo
+                        if buffers and self.segment_sizes[self.active_segment] >= self.segment_max_bytes:
+                            write_buffers(self.file.fileno(), buffers, batch_offset)
+                            buffers = []
+                        segment, offset = self._reserve(pending.nbytes)
+                        if not buffers:
+                            batch_offset = offset
+                        pending.location = self._locations(segment, offset, pending.nbytes, pending.sizes)
+                        buffers.extend(pending.buffers)
+                    write_buffers(self.file.fileno(), buffers, batch_offset)
+                    fsync_start = time.perf_counter()
+                    os.fsync(self.file.fileno())
+                    fsync_end = time.perf_counter()
+                self.last_fsync = time.time()
+            except OSError as e:
+                error = e
+                fsync_start = fsync_end = time.perf_counter()
+
+            # Actualizamos las metricas del lote
+            records = sum(1 if p.sizes is None else len(p.sizes) for p in batch)
+            self.total_batches += 1
+            self.total_records += records
+            self.total_bytes += sum(p.nbytes for p in batch)
+            self.max_batch_records = max(self.max_batch_records, records)
+            if error is None:
+                self._record_fsync(fsync_end - fsync_start)
+
+            for pending in batch:
+                commit_seconds = fsync_end - pending.enqueued_at
+                self.total_commit_seconds += commit_seconds * (1 if pending.sizes is None else len(pending.sizes))
+                self.max_commit_seconds = max(self.max_commit_seconds, commit_seconds)
+                pending.error = error
+                pending.fsync_seconds = fsync_end - fsync_start
+                pending.event.set()
+
+    def _record_fsync(self, seconds):
+        self.total_fsync_seconds += seconds
+        if self.latency is not None:
+            self.latency.record("fsync", seconds)
+
+    def stats(self):
+        """ Devuelve las metricas de tamaño de lote y latencia del escritor """
+        batches = self.total_batches or 1
+        records = self.total_records or 1
+        return {
+            "batches": self.total_batches,
+            "records": self.total_records,
+            "bytes": self.total_bytes,
+            "avg_batch_records": self.total_records / batches,
+            "max_batch_records": self.max_batch_records,
+            "avg_fsync_ms": self.total_fsync_seconds / batches * 1000,
+            "avg_commit_ms": self.total_commit_seconds / records * 1000,
+            "max_commit_ms": self.max_commit_seconds * 1000,
+        }
+
+    def close(self):
+        """ Termina de escribir los registros pendientes, sincroniza y cierra el archivo """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+        if self.mode in ("interval", "none"):
+            self._dirty = True
+            self.sync()
+        with self._file_lock:
+            self.file.close()
+        with self._fds_lock:
+            for fd in list(self._read_fds.values()) + [fd for _, fd in self._retired_fds]:
+                os.close(fd)
+            self._read_fds.clear()
+            self._retired_fds.clear()
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+from commit_log import MARKER, MARKER_FLAG, encode_record, read_records, segment_filename, segment_gen, fsync_dir
+
+
+class Compactor:
+    """ Hilo de fondo que reescribe los segmentos sellados con muchos registros muertos.
+
+    Cada segmento se compacta por separado: se copian sus registros vivos a una nueva
+    generacion del mismo segmento, que se instala de forma atomica (renombrado) antes de
+    borrar la anterior. Como el numero de segmento no cambia, el orden de reproduccion del
+    log en la recuperacion se mantiene.
+
+    El servidor aporta dos funciones:
+      is_live(clave, ubicacion): indica si la ubicacion es la version vigente de la clave
+      relocate(clave, ubicacion_vieja, ubicacion_nueva): actualiza la ubicacion si sigue vigente
+    y opcionalmente is_marker_live(clave, ubicacion_del_cuerpo), que indica si el marcador de un
+    valor subido por partes debe conservarse (si no se indica se usa is_live con la ubicacion del cuerpo).
+    Los cuerpos y los marcadores se copian con su tipo, y los segmentos con subidas en curso no se compactan.
+
+    Si las ubicaciones se guardan en otro log (las de los blobs, en el log principal), before_install(movidos)
+    recibe antes del renombrado la lista de (clave, ubicacion_vieja, ubicacion_nueva) para hacerlas
+    durables: al arrancar, si existen dos generaciones de un segmento se borra la anterior.
+
+    La instalacion de cada segmento se hace con maintenance_lock tomado para no coincidir con
+    la captura de un snapshot, y al terminar se llama a on_compacted (si se indica).
+    """
+
+    def __init__(self, log, is_live, relocate, min_dead_ratio=0.5, rate_bytes_per_sec=16 * 1024 * 1024, interval=5.0,
+                 maintenance_lock=None, on_compacted=None, is_marker_live=None, before_install=None, name="compactor"):
+        self.log = log
+        self.is_live = is_live
+        self.is_marker_live = is_marker_live or is_live
+        self.relocate = relocate
+        self.before_install = before_install
+        self.maintenance_lock = maintenance_lock or threading.Lock()
+        self.on_compacted = on_compacted
+
+        # Proporcion minima de bytes muertos para compactar un segmento
+        self.min_dead_ratio = min_dead_ratio
+
+        # Presupuesto de E/S (lectura + escritura) para no afectar la latencia de las peticiones
+        self.rate_bytes_per_sec = rate_bytes_per_sec
+        self.interval = interval
+
+        # Metricas del compactador
+        self.total_compactions = 0
+        self.total_reclaimed_bytes = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for segment in self.log.compactable_segments():
+                if self._stop.is_set():
+                    return
+                if self.log.dead_ratio(segment) >= self.min_dead_ratio:
+                    self.compact_segment(segment)
+
+    def _throttle(self, started, processed):
+        """ Duerme lo necesario para no superar el presupuesto de bytes por segundo """
+        if not self.rate_bytes_per_sec:
+            return
+        ahead = processed / self.rate_bytes_per_sec - (time.perf_counter() - started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def compact_segment(self, segment):
+        """ Copia los registros vivos del segmento a una nueva generacion e instala el resultado """
+        new_segment = segment + 1
+        if segment_gen(new_segment) == 0:
+            # Se agoto el contador de generaciones del segmento
+            return
+
+        old_path = self.log.segment_path(segment)
+        new_path = self.log.segment_path(new_segment)
+        tmp_path = new_path + ".tmp"
+
+        started = time.perf_counter()
+        processed = 0
+        moved = []
+        new_size = 0
+        with open(tmp_path, "wb") as out:
+            for offset, size, key, value, flags in read_records(old_path):
+                processed += size
+                location = (segment, offset, size)
+                key_str = key.decode()
+                if flags == MARKER_FLAG:
+                    # El marcador no tiene ubicacion propia en el servidor: se conserva mientras su cuerpo siga vigente
+                    if self.is_marker_live(key_str, MARKER.unpack(value)):
+                        out.write(encode_record(key, value, flags))
+                        new_size += size
+                        processed += size
+                elif self.is_live(key_str, location):
+                    out.write(encode_record(key, value, flags))
+                    moved.append((key_str, location, (new_segment, new_size, size)))
+                    new_size += size
+                    processed += size
+                self._throttle(started, processed)
+            out.flush()
+            os.fsync(out.fileno())
+
+        old_size = self.log.segment_sizes.get(segment, 0)
+        with self.maintenance_lock:
+            self._install(segment, new_segment, tmp_path, new_path, new_size, moved)
+
+        self.total_compactions += 1
+        self.total_reclaimed_bytes += old_size - new_size
+        print(f"Compactado {segment_filename(segment)}: {old_size} -> {new_size} bytes")
+        if self.on_compacted is not None:
+            self.on_compacted()
+
+    def _install(self, segment, new_segment, tmp_path, new_path, new_size, moved):
+        """ Sustituye el segmento por su nueva generacion y actualiza las ubicaciones de las claves """
+        if new_size == 0:
+            os.remove(tmp_path)
+            self.log.drop_segment(segment)
+        else:
+            if self.before_install is not None and moved:
+                self.before_install(moved)
+
+            # El renombrado instala la nueva generacion de forma atomica
+            os.rename(tmp_path, new_path)
+            fsync_dir(os.path.dirname(new_path))
+
+            # Apuntamos cada clave a su nueva ubicacion; las que se sobrescribieron mientras
+            # tanto quedan como registros muertos en la nueva generacion
+            self.log.install_segment(segment, new_segment, new_size)
+            for key, old_location, new_location in moved:
+                if not self.relocate(key, old_location, new_location):
+                    self.log.mark_dead(new_location)
+            self.log.remove_segment_file(segment)
+
@@ -24,29 +24,93 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1dkey_value_store_service.proto\x12\x0fkey_value_store\")\n\x0bSetKeyValue\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\"6\n\x13SetKeyValueResponse\x12\x0e\n\x06status\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x17\n\x08GetValue\x12\x0b\n\x03key\x18\x01 \x01(\t\"1\n\x10GetValueResponse\x12\x0e\n\x06status\x18\x01 \x01(\x08\x12\r\n\x05value\x18\x02 \x01(\t\"\x1e\n\tGetPrefix\x12\x11\n\tprefixKey\x18\x01 \x01(\t\"1\n\x11GetPrefixResponse\x12\x0c\n\x04keys\x18\x01 \x03(\t\x12\x0e\n\x06values\x18\x02 \x03(\t\"\r\n\x0bStatRequest\"\x97\x01\n\x0cStatResponse\x12\x14\n\x0ctime_started\x18\x01 \x01(\t\x12\x16\n\x0etotal_requests\x18\x02 \x01(\x03\x12\x1a\n\x12total_set_requests\x18\x03 \x01(\x03\x12\x1a\n\x12total_get_requests\x18\x04 \x01(\x03\x12!\n\x19total_get_prefix_requests\x18\x05 \x01(\x03\x32\xb4\x02\n\rKeyValueStore\x12I\n\x03Set\x12\x1c.key_value_store.SetKeyValue\x1a$.key_value_store.SetKeyValueResponse\x12\x43\n\x03Get\x12\x19.key_value_store.GetValue\x1a!.key_value_store.GetValueResponse\x12N\n\x0cGetPrefixKey\x12\x1a.key_value_store.GetPrefix\x1a\".key_value_store.GetPrefixResponse\x12\x43\n\x04Stat\x12\x1c.key_value_store.StatRequest\x1a\x1d.key_value_store.StatResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1dkey_value_store_service.proto\x12\x0fkey_value_store\")\n\x0bSetKeyValue\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\"6\n\x13SetKeyValueResponse\x12\x0e\n\x06status\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\")\n\x0bSetKeyBytes\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x0c\"%\n\x13SetKeyBytesResponse\x12\x0e\n\x06status\x18\x01 \x01(\x08\"1\n\x10GetBytesResponse\x12\x0e\n\x06status\x18\x01 \x01(\x08\x12\r\n\x05value\x18\x02 \x01(\x0c\"K\n\x15MultiGetBytesResponse\x12\x32\n\x07results\x18\x01 \x03(\x0b\x32!.key_value_store.GetBytesResponse\"E\n\x14MultiSetBytesRequest\x12-\n\x07\x65ntries\x18\x01 \x03(\x0b\x32\x1c.key_value_store.SetKeyBytes\";\n\nValueChunk\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x12\n\ntotal_size\x18\x02 \x01(\x03\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"3\n\x10GetStreamRequest\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x12\n\nchunk_size\x18\x02 \x01(\x05\"\x17\n\x08GetValue\x12\x0b\n\x03key\x18\x01 \x01(\t\"1\n\x10GetValueResponse\x12\x0e\n\x06status\x18\x01 \x01(\x08\x12\r\n\x05value\x18\x02 \x01(\t\"\x1f\n\x0fMultiGetRequest\x12\x0c\n\x04keys\x18\x01 \x03(\t\"F\n\x10MultiGetResponse\x12\x32\n\x07results\x18\x01 \x03(\x0b\x32!.key_value_store.GetValueResponse\"@\n\x0fMultiSetRequest\x12-\n\x07\x65ntries\x18\x01 \x03(\x0b\x32\x1c.key_value_store.SetKeyValue\"\"\n\x10MultiSetResponse\x12\x0e\n\x06status\x18\x01 \x03(\x08\"{\n\x0fPipelineRequest\x12\x0b\n\x03seq\x18\x01 \x01(\x04\x12(\n\x03get\x18\x02 \x01(\x0b\x32\x19.key_value_store.GetValueH\x00\x12+\n\x03set\x18\x03 \x01(\x0b\x32\x1c.key_value_store.SetKeyValueH\x00\x42\x04\n\x02op\">\n\x10PipelineResponse\x12\x0b\n\x03seq\x18\x01 \x01(\x04\x12\x0e\n\x06status\x18\x02 \x01(\x08\x12\r\n\x05value\x18\x03 \x01(\t\"r\n\tGetPrefix\x12\x11\n\tprefixKey\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\x12/\n\nprojection\x18\x04 \x01(\x0e\x32\x1b.key_value_store.Projection\"Y\n\x11GetPrefixResponse\x12\x0c\n\x04keys\x18\x01 \x03(\t\x12\x0e\n\x06values\x18\x02 \x03(\t\x12\x17\n\x0fnext_page_token\x18\x03 \x01(\t\x12\r\n\x05\x63ount\x18\x04 \x01(\x03\"d\n\x0bScanRequest\x12\x11\n\tstart_key\x18\x01 \x01(\t\x12\x0f\n\x07\x65nd_key\x18\x02 \x01(\t\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x0f\n\x07reverse\x18\x04 \x01(\x08\x12\x11\n\tkeys_only\x18\x05 \x01(\x08\",\n\x0cScanResponse\x12\x0c\n\x04keys\x18\x01 \x03(\t\x12\x0e\n\x06values\x18\x02 \x03(\t\"\xa2\x01\n\rExportRequest\x12\x14\n\x0cmigration_id\x18\x01 \x01(\t\x12\x11\n\tstart_key\x18\x02 \x01(\t\x12\x0f\n\x07\x65nd_key\x18\x03 \x01(\t\x12\x14\n\x0chash_modulus\x18\x04 \x01(\r\x12\x14\n\x0chash_buckets\x18\x05 \x03(\r\x12+\n\x05phase\x18\x06 \x01(\x0e\x32\x1c.key_value_store.ExportPhase\"+\n\x0b\x45xportBatch\x12\x0c\n\x04keys\x18\x01 \x03(\t\x12\x0e\n\x06values\x18\x02 \x03(\x0c\"-\n\x0eIngestResponse\x12\x0c\n\x04keys\x18\x01 \x01(\x03\x12\r\n\x05\x62ytes\x18\x02 \x01(\x03\">\n\x13\x45ndMigrationRequest\x12\x14\n\x0cmigration_id\x18\x01 \x01(\t\x12\x11\n\tcompleted\x18\x02 \x01(\x08\"&\n\x14\x45ndMigrationResponse\x12\x0e\n\x06status\x18\x01 \x01(\x08\"\r\n\x0bStatRequest\"\x86\t\n\x0cStatResponse\x12\x14\n\x0ctime_started\x18\x01 \x01(\t\x12\x16\n\x0etotal_requests\x18\x02 \x01(\x03\x12\x1a\n\x12total_set_requests\x18\x03 \x01(\x03\x12\x1a\n\x12total_get_requests\x18\x04 \x01(\x03\x12!\n\x19total_get_prefix_requests\x18\x05 \x01(\x03\x12\x16\n\x0e\x63ommit_batches\x18\x06 \x01(\x03\x12\x16\n\x0e\x63ommit_records\x18\x07 \x01(\x03\x12 \n\x18\x63ommit_avg_batch_records\x18\x08 \x01(\x01\x12 \n\x18\x63ommit_max_batch_records\x18\t \x01(\x03\x12\x1b\n\x13\x63ommit_avg_fsync_ms\x18\n \x01(\x01\x12\x1d\n\x15\x63ommit_avg_latency_ms\x18\x0b \x01(\x01\x12\x1d\n\x15\x63ommit_max_latency_ms\x18\x0c \x01(\x01\x12\x17\n\x0f\x64urability_mode\x18\r \x01(\t\x12\x12\n\nlast_fsync\x18\x0e \x01(\t\x12\x12\n\nlive_bytes\x18\x0f \x01(\x03\x12\x12\n\ndead_bytes\x18\x10 \x01(\x03\x12\x10\n\x08segments\x18\x11 \x01(\x03\x12\x13\n\x0b\x63ompactions\x18\x12 \x01(\x03\x12\x11\n\tsnapshots\x18\x13 \x01(\x03\x12\x15\n\rlast_snapshot\x18\x14 \x01(\t\x12\x18\n\x10recovery_seconds\x18\x15 \x01(\x01\x12\x1f\n\x17recovered_from_snapshot\x18\x16 \x01(\x08\x12\x14\n\x0cstorage_mode\x18\x17 \x01(\t\x12\x0c\n\x04keys\x18\x18 \x01(\x03\x12\x1b\n\x13total_scan_requests\x18\x19 \x01(\x03\x12\x0e\n\x06shards\x18\x1a \x01(\x05\x12\x16\n\x0eresident_bytes\x18\x1b \x01(\x03\x12\x11\n\tlog_bytes\x18\x1c \x01(\x03\x12\x16\n\x0euptime_seconds\x18\x1d \x01(\x01\x12\x1a\n\x12in_flight_requests\x18\x1e \x01(\x03\x12@\n\nrpc_errors\x18\x1f \x03(\x0b\x32,.key_value_store.StatResponse.RpcErrorsEntry\x12\x17\n\x0f\x62lob_live_bytes\x18  \x01(\x03\x12\x17\n\x0f\x62lob_dead_bytes\x18! \x01(\x03\x12\x15\n\rblob_segments\x18\" \x01(\x03\x12\x18\n\x10\x62lob_compactions\x18# \x01(\x03\x12\x12\n\ncache_hits\x18$ \x01(\x03\x12\x14\n\x0c\x63\x61\x63he_misses\x18% \x01(\x03\x12\x17\n\x0f\x63\x61\x63he_evictions\x18& \x01(\x03\x12\x13\n\x0b\x63\x61\x63he_bytes\x18\' \x01(\x03\x12\x11\n\tbloom_fpr\x18( \x01(\x01\x12\x17\n\x0f\x62loom_negatives\x18) \x01(\x03\x12\x1d\n\x15\x62loom_false_positives\x18* \x01(\x03\x12\x13\n\x0b\x62loom_bytes\x18+ \x01(\x03\x1a\x30\n\x0eRpcErrorsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\"$\n\x13LatencyStatsRequest\x12\r\n\x05reset\x18\x01 \x01(\x08\"\xb9\x01\n\x10LatencyHistogram\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\x12\x0f\n\x07mean_ms\x18\x03 \x01(\x01\x12\x0e\n\x06p50_ms\x18\x04 \x01(\x01\x12\x0e\n\x06p90_ms\x18\x05 \x01(\x01\x12\x0e\n\x06p99_ms\x18\x06 \x01(\x01\x12\x0f\n\x07p999_ms\x18\x07 \x01(\x01\x12\x0e\n\x06max_ms\x18\x08 \x01(\x01\x12\x0f\n\x07\x62uckets\x18\t \x03(\x05\x12\x15\n\rbucket_counts\x18\n \x03(\x03\"e\n\x14LatencyStatsResponse\x12\x16\n\x0ewindow_seconds\x18\x01 \x01(\x01\x12\x35\n\nhistograms\x18\x02 \x03(\x0b\x32!.key_value_store.LatencyHistogram\"L\n\x0eProfileRequest\x12\x0f\n\x07seconds\x18\x01 \x01(\x01\x12\x13\n\x0binterval_ms\x18\x02 \x01(\x01\x12\x14\n\x0cinclude_idle\x18\x03 \x01(\x08\"M\n\x0fProfileResponse\x12\x18\n\x10\x63ollapsed_stacks\x18\x01 \x01(\t\x12\x0f\n\x07samples\x18\x02 \x01(\x03\x12\x0f\n\x07seconds\x18\x03 \x01(\x01\"\x0f\n\rShardsRequest\"#\n\x0eShardsResponse\x12\x11\n\taddresses\x18\x01 \x03(\t*@\n\nProjection\x12\x13\n\x0fKEYS_AND_VALUES\x10\x00\x12\r\n\tKEYS_ONLY\x10\x01\x12\x0e\n\nCOUNT_ONLY\x10\x02*B\n\x0b\x45xportPhase\x12\x0e\n\nEXPORT_ALL\x10\x00\x12\x10\n\x0c\x45XPORT_DIRTY\x10\x01\x12\x11\n\rEXPORT_FENCED\x10\x02\x32\xb2\t\n\rKeyValueStore\x12I\n\x03Set\x12\x1c.key_value_store.SetKeyValue\x1a$.key_value_store.SetKeyValueResponse\x12\x43\n\x03Get\x12\x19.key_value_store.GetValue\x1a!.key_value_store.GetValueResponse\x12O\n\x08MultiGet\x12 .key_value_store.MultiGetRequest\x1a!.key_value_store.MultiGetResponse\x12O\n\x08MultiSet\x12 .key_value_store.MultiSetRequest\x1a!.key_value_store.MultiSetResponse\x12S\n\x08Pipeline\x12 .key_value_store.PipelineRequest\x1a!.key_value_store.PipelineResponse(\x01\x30\x01\x12N\n\x0cGetPrefixKey\x12\x1a.key_value_store.GetPrefix\x1a\".key_value_store.GetPrefixResponse\x12V\n\x12GetPrefixKeyStream\x12\x1a.key_value_store.GetPrefix\x1a\".key_value_store.GetPrefixResponse0\x01\x12\x45\n\x04Scan\x12\x1c.key_value_store.ScanRequest\x1a\x1d.key_value_store.ScanResponse0\x01\x12\x43\n\x04Stat\x12\x1c.key_value_store.StatRequest\x1a\x1d.key_value_store.StatResponse\x12[\n\x0cLatencyStats\x12$.key_value_store.LatencyStatsRequest\x1a%.key_value_store.LatencyStatsResponse\x12L\n\x07Profile\x12\x1f.key_value_store.ProfileRequest\x1a .key_value_store.ProfileResponse\x12H\n\x06\x45xport\x12\x1e.key_value_store.ExportRequest\x1a\x1c.key_value_store.ExportBatch0\x01\x12I\n\x06Ingest\x12\x1c.key_value_store.ExportBatch\x1a\x1f.key_value_store.IngestResponse(\x01\x12[\n\x0c\x45ndMigration\x12$.key_value_store.EndMigrationRequest\x1a%.key_value_store.EndMigrationResponse\x12I\n\x06Shards\x12\x1e.key_value_store.ShardsRequest\x1a\x1f.key_value_store.ShardsResponse2\xf1\x03\n\x12KeyValueStoreBytes\x12I\n\x03Set\x12\x1c.key_value_store.SetKeyBytes\x1a$.key_value_store.SetKeyBytesResponse\x12\x43\n\x03Get\x12\x19.key_value_store.GetValue\x1a!.key_value_store.GetBytesResponse\x12T\n\x08MultiGet\x12 .key_value_store.MultiGetRequest\x1a&.key_value_store.MultiGetBytesResponse\x12T\n\x08MultiSet\x12%.key_value_store.MultiSetBytesRequest\x1a!.key_value_store.MultiSetResponse\x12P\n\tSetStream\x12\x1b.key_value_store.ValueChunk\x1a$.key_value_store.SetKeyBytesResponse(\x01\x12M\n\tGetStream\x12!.key_value_store.GetStreamRequest\x1a\x1b.key_value_store.ValueChunk0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'key_value_store_service_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_STATRESPONSE_RPCERRORSENTRY']._loaded_options = None
+  _globals['_STATRESPONSE_RPCERRORSENTRY']._serialized_options = b'8\001'
+  _globals['_PROJECTION']._serialized_start=3448
+  _globals['_PROJECTION']._serialized_end=3512
+  _globals['_EXPORTPHASE']._serialized_start=3514
+  _globals['_EXPORTPHASE']._serialized_end=3580
   _globals['_SETKEYVALUE']._serialized_start=50
   _globals['_SETKEYVALUE']._serialized_end=91
   _globals['_SETKEYVALUERESPONSE']._serialized_start=93
   _globals['_SETKEYVALUERESPONSE']._serialized_end=147
-  _globals['_GETVALUE']._serialized_start=149
-  _globals['_GETVALUE']._serialized_end=172
-  _globals['_GETVALUERESPONSE']._serialized_start=174
-  _globals['_GETVALUERESPONSE']._serialized_end=223
-  _globals['_GETPREFIX']._serialized_start=225
-  _globals['_GETPREFIX']._serialized_end=255
-  _globals['_GETPREFIXRESPONSE']._serialized_start=257
-  _globals['_GETPREFIXRESPONSE']._serialized_end=306
-  _globals['_STATREQUEST']._serialized_start=308
-  _globals['_STATREQUEST']._serialized_end=321
-  _globals['_STATRESPONSE']._serialized_start=324
-  _globals['_STATRESPONSE']._serialized_end=475
-  _globals['_KEYVALUESTORE']._serialized_start=478
-  _globals['_KEYVALUESTORE']._serialized_end=786
+  _globals['_SETKEYBYTES']._serialized_start=149
+  _globals['_SETKEYBYTES']._serialized_end=190
+  _globals['_SETKEYBYTESRESPONSE']._serialized_start=192
+  _globals['_SETKEYBYTESRESPONSE']._serialized_end=229
+  _globals['_GETBYTESRESPONSE']._serialized_start=231
+  _globals['_GETBYTESRESPONSE']._serialized_end=280
+  _globals['_MULTIGETBYTESRESPONSE']._serialized_start=282
+  _globals['_MULTIGETBYTESRESPONSE']._serialized_end=357
+  _globals['_MULTISETBYTESREQUEST']._serialized_start=359
+  _globals['_MULTISETBYTESREQUEST']._serialized_end=428
+  _globals['_VALUECHUNK']._serialized_start=430
+  _globals['_VALUECHUNK']._serialized_end=489
+  _globals['_GETSTREAMREQUEST']._serialized_start=491
+  _globals['_GETSTREAMREQUEST']._serialized_end=542
+  _globals['_GETVALUE']._serialized_start=544
+  _globals['_GETVALUE']._serialized_end=567
+  _globals['_GETVALUERESPONSE']._serialized_start=569
+  _globals['_GETVALUERESPONSE']._serialized_end=618
+  _globals['_MULTIGETREQUEST']._serialized_start=620
+  _globals['_MULTIGETREQUEST']._serialized_end=651
+  _globals['_MULTIGETRESPONSE']._serialized_start=653
+  _globals['_MULTIGETRESPONSE']._serialized_end=723
+  _globals['_MULTISETREQUEST']._serialized_start=725
+  _globals['_MULTISETREQUEST']._serialized_end=789
+  _globals['_MULTISETRESPONSE']._serialized_start=791
+  _globals['_MULTISETRESPONSE']._serialized_end=825
+  _globals['_PIPELINEREQUEST']._serialized_start=827
+  _globals['_PIPELINEREQUEST']._serialized_end=950
+  _globals['_PIPELINERESPONSE']._serialized_start=952
+  _globals['_PIPELINERESPONSE']._serialized_end=1014
+  _globals['_GETPREFIX']._serialized_start=1016
+  _globals['_GETPREFIX']._serialized_end=1130
+  _globals['_GETPREFIXRESPONSE']._serialized_start=1132
+  _globals['_GETPREFIXRESPONSE']._serialized_end=1221
+  _globals['_SCANREQUEST']._serialized_start=1223
+  _globals['_SCANREQUEST']._serialized_end=1323
+  _globals['_SCANRESPONSE']._serialized_start=1325
+  _globals['_SCANRESPONSE']._serialized_end=1369
+  _globals['_EXPORTREQUEST']._serialized_start=1372
+  _globals['_EXPORTREQUEST']._serialized_end=1534
+  _globals['_EXPORTBATCH']._serialized_start=1536
+  _globals['_EXPORTBATCH']._serialized_end=1579
+  _globals['_INGESTRESPONSE']._serialized_start=1581
+  _globals['_INGESTRESPONSE']._serialized_end=1626
+  _globals['_ENDMIGRATIONREQUEST']._serialized_start=1628
+  _globals['_ENDMIGRATIONREQUEST']._serialized_end=1690
+  _globals['_ENDMIGRATIONRESPONSE']._serialized_start=1692
+  _globals['_ENDMIGRATIONRESPONSE']._serialized_end=1730
+  _globals['_STATREQUEST']._serialized_start=1732
+  _globals['_STATREQUEST']._serialized_end=1745
+  _globals['_STATRESPONSE']._serialized_start=1748
+  _globals['_STATRESPONSE']._serialized_end=2906
+  _globals['_STATRESPONSE_RPCERRORSENTRY']._serialized_start=2858
+  _globals['_STATRESPONSE_RPCERRORSENTRY']._serialized_end=2906
+  _globals['_LATENCYSTATSREQUEST']._serialized_start=2908
+  _globals['_LATENCYSTATSREQUEST']._serialized_end=2944
+  _globals['_LATENCYHISTOGRAM']._serialized_start=2947
+  _globals['_LATENCYHISTOGRAM']._serialized_end=3132
+  _globals['_LATENCYSTATSRESPONSE']._serialized_start=3134
+  _globals['_LATENCYSTATSRESPONSE']._serialized_end=3235
+  _globals['_PROFILEREQUEST']._serialized_start=3237
+  _globals['_PROFILEREQUEST']._serialized_end=3313
+  _globals['_PROFILERESPONSE']._serialized_start=3315
+  _globals['_PROFILERESPONSE']._serialized_end=3392
+  _globals['_SHARDSREQUEST']._serialized_start=3394
+  _globals['_SHARDSREQUEST']._serialized_end=3409
+  _globals['_SHARDSRESPONSE']._serialized_start=3411
+  _globals['_SHARDSRESPONSE']._serialized_end=3446
+  _globals['_KEYVALUESTORE']._serialized_start=3583
+  _globals['_KEYVALUESTORE']._serialized_end=4785
+  _globals['_KEYVALUESTOREBYTES']._serialized_start=4788
+  _globals['_KEYVALUESTOREBYTES']._serialized_end=5285
 # @@protoc_insertion_point(module_scope)
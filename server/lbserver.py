@@ -4,189 +4,1326 @@ import key_value_store_service_pb2_grpc
 from concurrent import futures
 import os
 import threading
+import asyncio
+import queue
+import signal
+import subprocess
+import sys
 import grpc
 import datetime
+import argparse
+import base64
+import binascii
 
-import struct
+from commit_log import CommitLog, DURABILITY_MODES, HEADER_SIZE, BODY_FLAG, MARKER, MARKER_FLAG, BLOB_FLAG, BLOB_POINTER, segment_number
+from compactor import Compactor
+from snapshot import Checkpointer, load_latest_snapshot, write_snapshot
+from sorted_index import SortedKeyIndex
+from aio_server import serve_aio
+from bytes_service import BytesKeyValueServicer
+from shard_router import ShardRouter, BytesShardRouter
+from migration import KeyFilter, Migration, MigrationFenced, load_moved, save_moved
+from profiler import SamplingProfiler
+from value_cache import ValueCache
+from bloom_filter import BloomFilter, INITIAL_CAPACITY
+from metrics import ShardedCounters, LatencyHistograms, RequestMetricsInterceptor, histogram_response
+import time
+
+# Modos de almacenamiento de los valores
+STORAGE_MODES = ("memory", "disk")
+
+# Motores del servidor gRPC: pool de hilos o bucle de eventos asyncio
+ENGINES = ("sync", "aio")
+
+# Tamaño maximo aproximado (claves + valores) de cada mensaje de las respuestas en streaming
+STREAM_BATCH_BYTES = 1024 * 1024
+
+# Claves que se extraen del indice en cada paso de una exportacion
+EXPORT_INDEX_BATCH = 1024
+
+# Hilos que ejecutan las operaciones de los streams Pipeline y operaciones en curso por stream
+PIPELINE_WORKERS = 32
+PIPELINE_MAX_IN_FLIGHT = 1024
+
+def encode_page_token(key):
+    """ Codifica la ultima clave devuelta como token opaco de continuacion """
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii")
+
+def decode_page_token(token):
+    """ Decodifica un token de continuacion; lanza ValueError si no es valido """
+    try:
+        return base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError(f"Token de pagina invalido: {e}")
 
 class KeyValueServer(key_value_store_service_pb2_grpc.KeyValueStoreServicer):
-    def __init__(self, num_locks = 32):
-        # Diccionario para guardar los par clave-valor
+    def __init__(self, num_locks = 32, durability = "group", fsync_interval_ms = 100, data_dir = "./server/data",
+                 segment_max_bytes = 64 * 1024 * 1024, compaction_rate_bytes = 16 * 1024 * 1024,
+                 snapshot_interval = 60.0, use_snapshots = True, storage = "memory", legacy_path = "./server/database.log",
+                 blob_threshold = 64 * 1024, cache_bytes = 64 * 1024 * 1024, bloom_bits_per_key = 0):
+        # Modo de almacenamiento: 'memory' guarda los valores en el diccionario, 'disk' solo guarda
+        # en memoria la ubicacion de cada clave en el log y lee los valores del disco (estilo Bitcask)
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Modo de almacenamiento desconocido: {storage}")
+        self.storage = storage
+        
+        # Diccionario para guardar los par clave-valor (vacio en modo 'disk')
         self.data = {}
         
-        # Archivo que guarda los pares clave-valor
-        self.file = open("./server/database.log", "ab")
+        # Ubicacion en el log (segmento, offset, tamaño) del registro vigente de cada clave
+        self.locations = {}
+        
+        # Directorio con los segmentos del log y los snapshots
+        self.data_dir = data_dir
+        
+        # Histogramas de latencia por RPC y por fase interna (espera de locks, codificacion, escritura
+        # en el log, fsync y construccion de la respuesta)
+        self.latency = LatencyHistograms()
+        
+        # Log segmentado que guarda los pares clave-valor con el modo de durabilidad elegido.
+        # Si existe el antiguo 'database.log' se migra como primer segmento
+        self.log = CommitLog(data_dir, mode = durability, fsync_interval_ms = fsync_interval_ms,
+                             segment_max_bytes = segment_max_bytes, legacy_path = legacy_path, latency = self.latency)
+        
+        # Log de blobs para los valores de al menos blob_threshold bytes (0 = ninguno). El log principal
+        # solo guarda un puntero a cada uno, asi que su recuperacion y su compactacion no leen esos valores
+        self.blob_threshold = blob_threshold
+        self.blob_log = CommitLog(os.path.join(data_dir, "blobs"), mode = durability, fsync_interval_ms = fsync_interval_ms,
+                                  segment_max_bytes = segment_max_bytes, latency = self.latency)
+        
+        # Ubicacion en el log de cada puntero vigente -> ubicacion de su valor en el log de blobs
+        self.blob_pointers = {}
+        
+        # Migraciones de particiones hacia otros servidores: id -> Migration. Las terminadas se guardan
+        # en el directorio de datos y siguen rechazando las escrituras de su particion
+        self.migrations = load_moved(data_dir)
+        self.migrations_lock = threading.Lock()
+        
+        # Pool de hilos que ejecuta las operaciones de los streams Pipeline
+        self.pipeline_executor = futures.ThreadPoolExecutor(max_workers = PIPELINE_WORKERS, thread_name_prefix = "pipeline")
         
         # Pool de hilos para gestionar la concurrencia
         self.num_locks = num_locks
         self.locks = [threading.Lock() for _ in range(num_locks)]
+        
+        # Cache de los valores leidos del log en modo 'disk' (en modo 'memory' ya estan todos en RAM),
+        # con una particion por lock de claves y un presupuesto total de cache_bytes (0 = sin cache)
+        self.cache = ValueCache(cache_bytes, num_locks) if storage == "disk" and cache_bytes > 0 else None
+        
+        # Filtro de Bloom de las claves en modo 'disk' (0 bits por clave = sin filtro): las lecturas
+        # de claves que no existen se responden sin consultar las ubicaciones, el cache ni el log.
+        # Mientras las ubicaciones esten todas en memoria una busqueda en ese diccionario cuesta menos
+        # que consultar el filtro, por eso viene desactivado (ver client/benchmark_bloom.py). Se crea al
+        # terminar la recuperacion
+        self.bloom_bits_per_key = bloom_bits_per_key if storage == "disk" else 0
+        self.bloom = None
                 
-        # Metricas del servidor
+        # Metricas del servidor. Los contadores de peticiones se reparten por hilo para que las
+        # peticiones concurrentes no compitan por ellos; errors cuenta los errores de cada RPC
         self.time_started = datetime.datetime.now().isoformat()
-        self.total_requests = 0
-        self.total_set_requests = 0
-        self.total_get_requests = 0
-        self.total_get_prefix_requests = 0
+        self.started_at = time.monotonic()
+        self.counters = ShardedCounters()
+        self.errors = ShardedCounters()
+        self.total_snapshots = 0
+        
+        # Perfilador por muestreo que se activa bajo demanda con la RPC Profile
+        self.profiler = SamplingProfiler()
+        self.last_snapshot = ""
+        self._records_at_snapshot = 0
+        
+        # Almacena los clave-valor en el diccionario (desde el ultimo snapshot valido y la cola del log)
+        recovery_start = time.perf_counter()
+        self.recovered_from_snapshot = self.recover_data(use_snapshots)
+        
+        # Indice ordenado de claves para las consultas por prefijo
+        self.index = SortedKeyIndex(self.locations)
+        
+        # Bytes de claves (y de valores en modo 'memory') que ocupa el keyspace en memoria
+        self.counters.add("resident_bytes", sum(map(len, self.locations)) + sum(map(len, self.data.values())))
+        self.recovery_seconds = time.perf_counter() - recovery_start
+        print(f"Recuperacion completada en {self.recovery_seconds:.3f} s (snapshot = {self.recovered_from_snapshot})")
+        
+        # Evita que la captura de un snapshot coincida con la instalacion de un segmento compactado
+        self.maintenance_lock = threading.Lock()
         
-        # Almacena los clave-valor en el diccionario
-        self.recover_data()
+        # Snapshots periodicos del keyspace para no reproducir todo el log al reiniciar
+        self.checkpointer = Checkpointer(self.checkpoint, interval = snapshot_interval)
+        self.checkpointer.start()
         
+        # Compactador en segundo plano que elimina los registros sobrescritos de los segmentos sellados.
+        # Tras cada compactacion se pide un snapshot nuevo, porque el anterior deja de ser valido
+        self.compactor = Compactor(self.log, self.is_live, self.relocate, rate_bytes_per_sec = compaction_rate_bytes,
+                                   maintenance_lock = self.maintenance_lock, on_compacted = self._on_compacted,
+                                   is_marker_live = self.is_marker_live)
+        self.compactor.start()
+        
+        # Recolector de basura del log de blobs: el mismo compactador, con su propio hilo y ritmo. Los
+        # valores que mueve reciben un puntero nuevo en el log principal (ver write_blob_pointers)
+        self.blob_compactor = Compactor(self.blob_log, self.is_blob_live, self.relocate_blob, rate_bytes_per_sec = compaction_rate_bytes,
+                                        maintenance_lock = self.maintenance_lock, before_install = self.write_blob_pointers,
+                                        name = "blob-compactor")
+        self.blob_compactor.start()
+        
+    def shutdown(self):
+        """ Detiene los hilos de fondo y cierra el log tras escribir los registros pendientes """
+        self.pipeline_executor.shutdown()
+        self.compactor.stop()
+        self.blob_compactor.stop()
+        self.checkpointer.stop()
+        self.log.close()
+        self.blob_log.close()
+    
     def _get_lock_for_key(self, key: str):
         """Calcula el hash de la clave para obtener el lock específico."""
         index = hash(key) % self.num_locks
         return self.locks[index]
         
-    def recover_data(self):
-        """ Lee la base de datos 'database.log' y almacena las claves y valores en el diccionario """
+    def recover_data(self, use_snapshots = True):
+        """ Carga el ultimo snapshot valido y reproduce en orden los segmentos posteriores del log.
+        
+        Devuelve True si se partio de un snapshot.
+        """
+        replay_from = 0
+        snapshot = None
+        if use_snapshots:
+            current_segments = {number: gen for number, (gen, _) in self.log.segment_table().items()}
+            snapshot = load_latest_snapshot(self.data_dir, current_segments)
+        if snapshot is not None:
+            self.data = snapshot.data
+            self.locations = snapshot.locations
+            self.blob_pointers = snapshot.blob_pointers
+            self.log.restore_dead_bytes(snapshot.segments)
+            self.bloom = self._load_bloom(snapshot.bloom)
+            replay_from = snapshot.replay_from
+        
+        # Claves publicadas al reproducir el log, que el filtro del snapshot aun no contiene
+        replayed = []
+        
+        # Cuerpos de valores subidos por partes: (numero de segmento, clave) -> ubicacion, y los
+        # que aun no tienen marcador (los de subidas interrumpidas se quedan sin el)
+        bodies = {}
+        unconfirmed = set()
+        
+        # En modo 'disk' no hace falta leer los valores para reconstruir el indice
+        with_values = self.storage == "memory"
+        for segment, offset, size, key_bytes, value, flags in self.log.replay(replay_from, with_values):
+            key = key_bytes.decode()
+            location = (segment, offset, size)
+            if flags == BODY_FLAG:
+                bodies[(segment_number(segment), key)] = location
+                unconfirmed.add(location)
+                continue
+            if flags == MARKER_FLAG:
+                location = self._marker_target(key, MARKER.unpack(value), bodies)
+                if location is None:
+                    continue
+                unconfirmed.discard(location)
+                if with_values:
+                    value = self.log.read_value(location, len(key_bytes))
+            blob = None
+            if flags == BLOB_FLAG:
+                blob = BLOB_POINTER.unpack(value)
+                # En los modos sin fsync el puntero pudo llegar a disco sin su blob: la clave conserva el valor anterior
+                if not self.blob_log.contains(blob):
+                    self.log.mark_dead(location)
+                    continue
+            
+            # Si la clave ya existia, su registro anterior pasa a ser un registro muerto
+            previous = self.locations.get(key)
+            if previous is not None and previous != location:
+                self.log.mark_dead(previous)
+                self.blob_pointers.pop(previous, None)
+            
+            # Almacenamos en el diccionario el valor en bytes, tal como esta en el log (los blobs se cargan al final)
+            if blob is not None:
+                self.blob_pointers[location] = blob
+                self.data.pop(key, None)
+            elif with_values:
+                self.data[key] = value
+            self.locations[key] = location
+            replayed.append(key)
+        
+        for location in unconfirmed:
+            self.log.mark_dead(location)
+        self._load_blobs(with_values)
+        self._build_bloom(replayed)
+        return snapshot is not None
+    
+    def _load_bloom(self, serialized):
+        """ Filtro de Bloom guardado en el snapshot, o None si no hay o no sirve con la configuracion actual """
+        if not self.bloom_bits_per_key or serialized is None:
+            return None
         try:
-            # Abre el archivo 'database.log' en formato de lectura binaria
-            with open("./server/database.log", "rb") as file:
-                while True:
-                    # Obtenemos el header (compuesto por 4 bytes de la clave y 4 bytes del valor)
-                    header = file.read(8)
-                    
-                    # En caso de que el header no tenga los 8 bytes, se entiende que hubo un fallo al escribir la informacion (fallo de luz, de proceso, etc)
-                    if len(header) < 8:
-                        break
-
-                    # Descomprimimos la cadena de bytes del header en el clave y valor (4 bits para key_len y 4 bits para value_len)
-                    key_len, value_len = struct.unpack(">II", header)
-                    key = file.read(key_len)
-                    value = file.read(value_len)
-
-                    if len(key) < key_len or len(value) < value_len:
-                        break
-                    
-                    # Almacenamos en el diccionario el par clave-valor decodificado en texto. 
-                    self.data[key.decode()] = value.decode()
-        except FileNotFoundError:
-            pass
+            bloom = BloomFilter.from_bytes(serialized)
+        except ValueError as e:
+            print(f"Filtro de Bloom del snapshot descartado: {e}")
+            return None
+        return bloom if bloom.bits_per_key == self.bloom_bits_per_key else None
+    
+    def _build_bloom(self, replayed):
+        """ Añade al filtro del snapshot las claves reproducidas del log, o lo crea con todas si no habia """
+        if not self.bloom_bits_per_key:
+            return
+        if self.bloom is not None:
+            for key in replayed:
+                self.bloom.add(key)
+            return
+        start = time.perf_counter()
+        # La primera capa admite el doble de las claves actuales antes de que el filtro tenga que crecer
+        self.bloom = BloomFilter(self.bloom_bits_per_key, max(INITIAL_CAPACITY, 2 * len(self.locations)))
+        for key in self.locations:
+            self.bloom.add(key)
+        print(f"Filtro de Bloom creado con {len(self.locations)} claves en {time.perf_counter() - start:.3f} s")
+    
+    def _load_blobs(self, with_values):
+        """ Cuenta los bytes vivos de cada segmento del log de blobs y, en modo 'memory', carga los valores.
+        
+        El log de blobs no se reproduce: lo que no apunta ningun puntero vigente (valores sobrescritos
+        o subidas interrumpidas) queda como muerto para su compactador.
+        """
+        live = {}
+        if self.blob_pointers:
+            for key, location in list(self.locations.items()):
+                blob = self.blob_pointers.get(location)
+                if blob is None:
+                    continue
+                if not self.blob_log.contains(blob):
+                    # Snapshot de un modo sin fsync cuyo blob no llego a disco
+                    del self.locations[key]
+                    del self.blob_pointers[location]
+                    self.data.pop(key, None)
+                    continue
+                live[blob[0]] = live.get(blob[0], 0) + blob[2]
+                if with_values:
+                    self.data[key] = self.blob_log.read_value(blob, len(key.encode("utf-8")))
+        self.blob_log.reset_dead_bytes(live)
+    
+    def _marker_target(self, key, target, bodies):
+        """ Ubicacion actual del cuerpo que confirma un marcador, o None si ya no existe.
+        
+        Si el compactador reescribio el segmento del cuerpo, el cuerpo vigente de la clave en ese
+        segmento es el que se conservo; si no hay ninguno la clave se sobrescribio despues.
+        """
+        if self.log.has_segment(target[0]):
+            return target
+        return bodies.get((segment_number(target[0]), key))
+    
+    def _on_compacted(self):
+        """ El snapshot anterior deja de ser valido tras una compactacion; pedimos uno nuevo aunque no haya escrituras """
+        self._records_at_snapshot = -1
+        self.checkpointer.request()
+    
+    def checkpoint(self):
+        """ Crea un snapshot del keyspace y de la posicion del log.
+        
+        Solo se detienen las escrituras el instante necesario para sellar el segmento activo y copiar
+        los diccionarios; la escritura del snapshot a disco se hace sin ningun lock tomado.
+        """
+        if self.log.total_records == self._records_at_snapshot:
+            return
+        
+        with self.maintenance_lock:
+            # Con todos los locks tomados no hay ningun Set a medio escribir
+            for lock in self.locks:
+                lock.acquire()
+            try:
+                self._records_at_snapshot = self.log.total_records
+                replay_from = self.log.rotate()
+                segments = self.log.segment_table(below = replay_from)
+                # En modo 'disk' el snapshot solo guarda las ubicaciones (hint file)
+                data = self.data.copy() if self.storage == "memory" else None
+                locations = self.locations.copy()
+                blob_pointers = self.blob_pointers.copy()
+                bloom = self.bloom.to_bytes() if self.bloom is not None else None
+            finally:
+                for lock in self.locks:
+                    lock.release()
+        
+        # Los blobs a los que apunta el snapshot deben llegar a disco antes que el (modo 'interval')
+        self.blob_log.sync()
+        start = time.perf_counter()
+        path = write_snapshot(self.data_dir, replay_from, segments, locations, data, blob_pointers, bloom)
+        self.total_snapshots += 1
+        self.last_snapshot = datetime.datetime.now().isoformat()
+        print(f"Snapshot {os.path.basename(path)} creado con {len(locations)} claves en {time.perf_counter() - start:.3f} s")
+            
+    def read_value(self, key, location = None):
+        """ Devuelve el valor vigente de la clave en bytes, de memoria o del log segun el modo, o None si no existe.
         
+        En modo 'disk' se puede indicar la ubicacion ya capturada del registro; si el compactador
+        retiro ese segmento se lee la ubicacion vigente.
+        """
+        if self.storage == "memory":
+            return self.data.get(key)
+        
+        if self.bloom is not None and location is None and not self.bloom.might_contain(key):
+            self.counters.add("bloom_negatives")
+            return None
+        
+        # Una clave que no existe se descarta con una sola busqueda en el diccionario de ubicaciones,
+        # sin pasar por el cache. El valor leido solo se guarda en el cache si la clave sigue en la
+        # ubicacion de partida: si cambio durante la lectura (Set, compactacion) puede ser el anterior
+        version = location if location is not None else self.locations.get(key)
+        if version is None:
+            if self.bloom is not None:
+                self.counters.add("bloom_false_positives")
+            return None
+        
+        if self.cache is not None and location is None:
+            value = self.cache.get(key)
+            if value is not None:
+                return value
+        
+        key_len = len(key.encode("utf-8"))
+        for _ in range(3):
+            log, location = self._resolve(key, location, key_len)
+            if log is None:
+                return None
+            try:
+                value = log.read_value(location, key_len)
+            except FileNotFoundError:
+                # El compactador retiro el segmento justo despues de leer la ubicacion; la volvemos a leer
+                location = None
+                continue
+            if self.cache is not None:
+                self.cache.put(key, value, lambda: self.locations.get(key) == version)
+            return value
+        raise RuntimeError(f"No se pudo leer el valor de la clave {key}")
+    
+    def _resolve(self, key, location, key_len):
+        """ Devuelve (log, ubicacion) del valor de la clave: su registro en el log o, si es un puntero, su blob.
+        
+        La entrada de un puntero en blob_pointers se crea antes de publicar su ubicacion y se borra
+        despues de sustituirla; si la ubicacion ya no es la vigente y tiene el tamaño de un puntero
+        puede ser uno sustituido mientras tanto, y se usa la vigente.
+        """
+        while True:
+            if location is None:
+                location = self.locations.get(key)
+                if location is None:
+                    return None, None
+            blob = self.blob_pointers.get(location)
+            if blob is not None:
+                return self.blob_log, blob
+            if location[2] - HEADER_SIZE - key_len != BLOB_POINTER.size or self.locations.get(key) == location:
+                return self.log, location
+            location = None
+    
+    def is_live(self, key, location):
+        """ Indica si la ubicacion del log corresponde a la version vigente de la clave """
+        return self.locations.get(key) == location
+    
+    def is_marker_live(self, key, target):
+        """ El marcador de un valor subido por partes se conserva mientras la clave siga en el segmento de su cuerpo """
+        location = self.locations.get(key)
+        return location is not None and segment_number(location[0]) == segment_number(target[0])
+    
+    def relocate(self, key, old_location, new_location):
+        """ Mueve la ubicacion de la clave tras una compactacion si nadie la ha sobrescrito """
+        with self._get_lock_for_key(key):
+            if self.locations.get(key) != old_location:
+                return False
+            # Mismo orden que _commit_location: la entrada del puntero nuevo antes y la del viejo despues
+            blob = self.blob_pointers.get(old_location)
+            if blob is not None:
+                self.blob_pointers[new_location] = blob
+            self.locations[key] = new_location
+            if blob is not None:
+                del self.blob_pointers[old_location]
+            return True
+    
+    def is_blob_live(self, key, blob):
+        """ Indica si la ubicacion del log de blobs es el valor vigente de la clave """
+        return self.blob_pointers.get(self.locations.get(key)) == blob
+    
+    def write_blob_pointers(self, moved):
+        """ Antes de instalar la nueva generacion de un segmento de blobs, escribe en el log un puntero a cada valor movido que siga vigente.
+        
+        Al arrancar se borra la generacion anterior en cuanto existe la nueva, asi que los punteros
+        deben ser durables antes del renombrado. Mientras tanto la entrada de cada puntero nuevo en
+        blob_pointers sigue apuntando al blob viejo (relocate_blob la cambia tras la instalacion).
+        Si el proceso muere antes del renombrado, la recuperacion descarta los punteros nuevos porque
+        su blob no existe y cada clave conserva el anterior.
+        """
+        for key, old_blob, new_blob in moved:
+            with self._get_lock_for_key(key):
+                if self.is_blob_live(key, old_blob):
+                    location = self.log.append(key.encode("utf-8"), BLOB_POINTER.pack(*new_blob), BLOB_FLAG)
+                    self._commit_location(key, location, old_blob)
+        # En los modos sin fsync por escritura los punteros aun pueden no estar en disco
+        self.log.sync()
+    
+    def relocate_blob(self, key, old_blob, new_blob):
+        """ Tras instalar la nueva generacion de un segmento de blobs, apunta al valor movido el puntero de write_blob_pointers """
+        with self._get_lock_for_key(key):
+            if not self.is_blob_live(key, old_blob):
+                return False
+            self.blob_pointers[self.locations[key]] = new_blob
+            return True
+        
+    def encode_value(self, value):
+        """ Convierte a bytes el valor de texto de las RPC del servicio KeyValueStore (el servicio de bytes ya los recibe asi) """
+        start = time.perf_counter()
+        value = value.encode("utf-8")
+        self.latency.record("encode", time.perf_counter() - start)
+        return value
+    
+    def is_large(self, size):
+        """ Indica si un valor de size bytes se guarda en el log de blobs """
+        return self.blob_threshold > 0 and size >= self.blob_threshold
+    
     def write_entry(self, key, value):
-        """ Serializa en datos binarios las peticiones SET del cliente """
+        """ Escribe en el log la clave y el valor (bytes) de una peticion SET; devuelve True si la clave es nueva """
+        key_bytes = key.encode("utf-8")
+        blob = None
+        flags = 0
+        if self.is_large(len(value)):
+            # El valor grande va antes al log de blobs y el log principal guarda su ubicacion
+            start = time.perf_counter()
+            blob = self.blob_log.append(key_bytes, value)
+            self.latency.record("blob_append", time.perf_counter() - start)
+            value, flags = BLOB_POINTER.pack(*blob), BLOB_FLAG
         
-        # Codificamos la clave y valor en utf-8
-        key_formated = key.encode("utf-8")
-        value_formated = value.encode("utf-8")
+        # Escribimos el registro en el log sin copiar el valor. En modo 'group' el hilo escritor lo
+        # escribe junto con los registros de otras peticiones concurrentes y nos confirma tras el
+        # fsync que lo cubre
+        start = time.perf_counter()
+        location = self.log.append(key_bytes, value, flags)
+        self.latency.record("log_append", time.perf_counter() - start)
+        return self._commit_location(key, location, blob)
+    
+    def write_entries(self, entries):
+        """ Escribe varios pares clave-valor (bytes) con un solo registro en el log y un solo fsync; devuelve si cada clave es nueva """
+        items = [(key.encode("utf-8"), value) for key, value in entries]
+        blobs = [None] * len(items)
+        flags = None
+        large = [i for i, (_, value) in enumerate(items) if self.is_large(len(value))]
+        if large:
+            # Los valores grandes se escriben juntos en el log de blobs (una escritura y un fsync)
+            start = time.perf_counter()
+            for i, blob in zip(large, self.blob_log.append_many([items[i] for i in large])):
+                blobs[i] = blob
+                items[i] = (items[i][0], BLOB_POINTER.pack(*blob))
+            self.latency.record("blob_append", time.perf_counter() - start)
+            flags = [0 if blob is None else BLOB_FLAG for blob in blobs]
+        start = time.perf_counter()
+        locations = self.log.append_many(items, flags)
+        self.latency.record("log_append", time.perf_counter() - start)
+        return [self._commit_location(key, location, blob) for (key, _), location, blob in zip(entries, locations, blobs)]
+    
+    def _commit_location(self, key, location, blob = None):
+        """ Apunta la clave a su nuevo registro del log (y a su blob si lo tiene); devuelve True si la clave es nueva """
         
-        # Comprimimos en una cadena de byte las longitudes de la clave y valor
-        header = struct.pack(">II", len(key_formated), len(value_formated))
+        # El registro anterior de la clave queda muerto hasta que el compactador lo elimine
+        previous = self.locations.get(key)
+        if previous is not None:
+            self.log.mark_dead(previous)
         
-        # Escribimos en el archivo la cabecera, clave y valor y sincronizamos el archivo para asegurarnos que es escriba correctamente
-        self.file.write(header + key_formated + value_formated)
-        self.file.flush()
-        os.fsync(self.file.fileno())
+        # Una clave nueva entra en el filtro de Bloom antes de publicarse: quien la encuentra ya ve sus bits
+        if previous is None and self.bloom is not None:
+            self.bloom.add(key)
+        
+        # La entrada del puntero se crea antes de publicar la ubicacion y la del anterior se borra despues (ver _resolve)
+        if blob is not None:
+            self.blob_pointers[location] = blob
+        self.locations[key] = location
+        if self.cache is not None:
+            # Despues de publicar la ubicacion: una lectura que la vio antes no puede guardar el valor anterior
+            self.cache.invalidate(key)
+        if previous is not None:
+            previous_blob = self.blob_pointers.pop(previous, None)
+            if previous_blob is not None:
+                self.blob_log.mark_dead(previous_blob)
+        return previous is None
         
     def Get(self, request, context):
-        """ Devuelve el valor de la clave dada """
+        """ Devuelve el valor de la clave dada.
         
-        lock = self._get_lock_for_key(request.key)
-        with lock:
-            # Obtenemos el valor en el diccionario a partir de la clave
-            value = self.data.get(request.key)
+        No toma el lock de la clave: un Set solo publica el valor (o su ubicacion en el log) despues
+        de que el registro sea durable, y la publicacion es una sola asignacion en el diccionario,
+        asi que la lectura ve el valor anterior o el nuevo completo sin esperar al fsync.
+        """
+        
+        # Obtenemos el valor de la clave (del diccionario o del log)
+        value = self.read_value(request.key)
+        
+        # Si no existe un valor, el cliente recibe un Status.Not_Found y un mensaje del error
+        if value is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            response = key_value_store_service_pb2.GetValueResponse(status = False, value = f"Clave no encontrada")
+            return response
             
-            # Si no existe un valor, el cliente recibe un Status.Not_Found y un mensaje del error
-            if value is None:
-                context.set_code(grpc.StatusCode.NOT_FOUND)
-                response = key_value_store_service_pb2.GetValueResponse(status = False, value = f"Clave no encontrada")
-                return response
-                
-            # Objeto que sera enviado al cliente con el valor de la clave dada
-            response = key_value_store_service_pb2.GetValueResponse(status = True, value = value)
+        # Objeto que sera enviado al cliente con el valor de la clave dada (decodificado en texto)
+        start = time.perf_counter()
+        response = key_value_store_service_pb2.GetValueResponse(status = True, value = value.decode())
+        self.latency.record("response_build", time.perf_counter() - start)
 
-            # Incrementamos el numero de peticiones totales y peticiones get
-            self.total_requests += 1
-            self.total_get_requests += 1
-            
-            # print(f"Se ha recibido una peticion de Get") #Se volvió un comentario para evitar spam en la salida del servidor
-            return response
+        # Incrementamos el numero de peticiones totales y peticiones get
+        self.counters.add("total_requests")
+        self.counters.add("total_get_requests")
+        
+        # print(f"Se ha recibido una peticion de Get") #Se volvió un comentario para evitar spam en la salida del servidor
+        return response
     
     def Set(self, request, context):
         """ Establece el valor de la clave dada """
         
-        # Obtenemos la clave y valor enviado por el cliente
+        # Obtenemos la clave y valor enviado por el cliente; el valor se guarda en bytes
         key = request.key
-        value = request.value
+        value = self.encode_value(request.value)
+        
+        try:
+            self.apply_set(key, value)
+        except MigrationFenced as e:
+            # El cliente debe reintentar en el servidor de destino de la migracion
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        
+        # Incrementamos el numero de peticiones totales y peticiones set
+        self.counters.add("total_set_requests")
+        self.counters.add("total_requests")
+        
+        #print("Se ha recibido una peticion Set") #Se volvió un comentario para evitar spam en la salida del servidor
+        
+        # Enviamos al usuario la respuesta; no incluye el valor, que duplicaria el tamaño de la respuesta
+        start = time.perf_counter()
+        response = key_value_store_service_pb2.SetKeyValueResponse(status = True, message = f"Set: {request.key}")
+        self.latency.record("response_build", time.perf_counter() - start)
+        return response
+    
+    def apply_set(self, key, value):
+        """ Escribe el par (valor en bytes) en el log y lo publica en memoria con el lock de la clave tomado.
         
+        El lock solo ordena las escrituras de una misma clave (el orden del log coincide con el de
+        memoria); los lectores no lo toman y ven el valor nuevo cuando ya es durable.
+        """
         lock = self._get_lock_for_key(key)
+        start = time.perf_counter()
         with lock:
-            # Serializamos los datos
-            self.write_entry(key, value)
+            self.latency.record("lock_wait", time.perf_counter() - start)
             
-            # Guardamos en el diccionario
-            self.data[key] = value
+            # Si la clave pertenece a una particion en corte de migracion la escritura se rechaza
+            if self.migrations:
+                self._check_fence(key)
             
-            # Incrementamos el numero de peticiones totales y peticiones set
-            self.total_set_requests += 1
-            self.total_requests += 1
+            # Serializamos los datos
+            is_new = self.write_entry(key, value)
+            self._publish(key, value, is_new)
+    
+    def begin_set_stream(self, key, size):
+        """ Empieza un Set por partes: reserva en el log (o en el de blobs si es grande) el hueco del valor y devuelve la subida (_Upload) """
+        if self.migrations:
+            with self._get_lock_for_key(key):
+                self._check_fence(key)
+        log = self.blob_log if self.is_large(size) else self.log
+        return log.begin_upload(key.encode("utf-8"), size)
+    
+    def finish_set_stream(self, key, upload):
+        """ Confirma una subida ya escrita entera y la publica como apply_set; si falla la descarta """
+        try:
+            # En modo 'memory' el valor se guarda entero en el diccionario: lo leemos del log
+            value = upload.read_back() if self.storage == "memory" else None
+            lock = self._get_lock_for_key(key)
+            start = time.perf_counter()
+            with lock:
+                self.latency.record("lock_wait", time.perf_counter() - start)
+                if self.migrations:
+                    self._check_fence(key)
+                start = time.perf_counter()
+                blob = None
+                if upload.log is self.blob_log:
+                    # El cuerpo del blob no lleva marcador: lo confirma su puntero en el log principal
+                    blob = upload.commit(confirm = False)
+                    location = self.log.append(upload.key, BLOB_POINTER.pack(*blob), BLOB_FLAG)
+                else:
+                    location = upload.commit()
+                self.latency.record("log_append", time.perf_counter() - start)
+                is_new = self._commit_location(key, location, blob)
+                self._publish(key, value, is_new)
+        except BaseException:
+            upload.abort()
+            raise
+    
+    def apply_set_stream(self, key, size, chunks):
+        """ Escribe en el log, a medida que llegan, los bloques (bytes) de un valor de size bytes y lo publica.
+        
+        La memoria que ocupa la subida es la de un bloque: cada uno se escribe en su sitio del log
+        y se descarta. Si el servidor cae antes del final, la recuperacion ignora el valor incompleto.
+        """
+        upload = self.begin_set_stream(key, size)
+        try:
+            for data in chunks:
+                upload.write(data)
+        except BaseException:
+            upload.abort()
+            raise
+        self.finish_set_stream(key, upload)
+    
+    def value_chunks(self, key, chunk_size):
+        """ Devuelve (tamaño, iterador de bloques) del valor de la clave, o None si no existe.
+        
+        Los bloques se copian de memoria o se leen del log de uno en uno, sin leer el valor entero.
+        """
+        if self.storage == "memory":
+            value = self.data.get(key)
+            if value is None:
+                return None
+            return len(value), (value[start:start + chunk_size] for start in range(0, len(value), chunk_size))
+        
+        if self.bloom is not None and not self.bloom.might_contain(key):
+            self.counters.add("bloom_negatives")
+            return None
+        key_len = len(key.encode("utf-8"))
+        log, location = self._resolve(key, None, key_len)
+        if log is None:
+            return None
+        size = location[2] - HEADER_SIZE - key_len
+        chunks = (log.read_value(location, key_len, start, min(chunk_size, size - start))
+                  for start in range(0, size, chunk_size))
+        return size, chunks
+    
+    def apply_multi_set(self, entries):
+        """ Escribe varios pares con un solo registro en el log y los publica con los locks de sus claves tomados """
+        
+        # Tomamos los locks de todas las claves en orden creciente para no bloquearnos con otros
+        # MultiSet ni con la captura de un snapshot, que los toma en el mismo orden
+        lock_ids = sorted({hash(key) % self.num_locks for key, _ in entries})
+        start = time.perf_counter()
+        for lock_id in lock_ids:
+            self.locks[lock_id].acquire()
+        self.latency.record("lock_wait", time.perf_counter() - start)
+        try:
+            if self.migrations:
+                for key, _ in entries:
+                    self._check_fence(key)
+            is_new = self.write_entries(entries)
+            for (key, value), new in zip(entries, is_new):
+                self._publish(key, value, new)
+        finally:
+            for lock_id in reversed(lock_ids):
+                self.locks[lock_id].release()
+    
+    def _publish(self, key, value, is_new):
+        """ Hace visible en memoria un par ya escrito en el log (con el lock de la clave tomado) """
+        
+        # Guardamos en el diccionario (en modo 'disk' basta con la ubicacion que guarda write_entry)
+        if self.storage == "memory":
+            previous = self.data.get(key)
+            self.data[key] = value
+            if previous is None:
+                self.counters.add("resident_bytes", len(key) + len(value))
+            else:
+                self.counters.add("resident_bytes", len(value) - len(previous))
+        elif is_new:
+            self.counters.add("resident_bytes", len(key))
+        
+        # Las claves nuevas se añaden al indice ordenado una vez visibles en el diccionario
+        if is_new:
+            self.index.add(key)
+        
+        # Las migraciones en curso vuelven a copiar la clave en su fase de puesta al dia
+        if self.migrations:
+            self._mark_dirty(key)
+    
+    def _check_fence(self, key):
+        """ Lanza MigrationFenced si la clave pertenece a una migracion en corte (con el lock de la clave tomado) """
+        for migration in list(self.migrations.values()):
+            if migration.fenced and migration.filter.matches(key):
+                if migration.completed:
+                    raise MigrationFenced(f"La clave {key} se ha migrado a otro servidor")
+                raise MigrationFenced(f"La clave {key} se esta migrando a otro servidor")
+    
+    def _mark_dirty(self, key):
+        for migration in list(self.migrations.values()):
+            if migration.filter.matches(key):
+                migration.mark_dirty(key)
+    
+    def _pipeline_op(self, request):
+        """ Ejecuta una operacion del stream Pipeline y devuelve su respuesta con el mismo numero de secuencia """
+        op = request.WhichOneof("op")
+        try:
+            if op == "get":
+                value = self.read_value(request.get.key)
+                self.counters.add("total_requests")
+                self.counters.add("total_get_requests")
+                if value is None:
+                    return key_value_store_service_pb2.PipelineResponse(seq = request.seq, status = False, value = "Clave no encontrada")
+                return key_value_store_service_pb2.PipelineResponse(seq = request.seq, status = True, value = value.decode())
             
-            #print("Se ha recibido una peticion Set") #Se volvió un comentario para evitar spam en la salida del servidor
+            if op == "set":
+                self.apply_set(request.set.key, self.encode_value(request.set.value))
+                self.counters.add("total_requests")
+                self.counters.add("total_set_requests")
+                return key_value_store_service_pb2.PipelineResponse(seq = request.seq, status = True)
             
-            # Enviamos al usuario la respuesta con los datos realizados
-            response = key_value_store_service_pb2.SetKeyValueResponse(status = True, message = f"Set: {request.key} = {request.value}")
-            return response
+            return key_value_store_service_pb2.PipelineResponse(seq = request.seq, status = False, value = "Operacion desconocida")
+        except (OSError, ValueError, RuntimeError) as e:
+            return key_value_store_service_pb2.PipelineResponse(seq = request.seq, status = False, value = str(e))
+    
+    def Pipeline(self, request_iterator, context):
+        """ Ejecuta las operaciones que llegan por el stream sin esperar a que terminen las anteriores.
+        
+        Un hilo lee las peticiones y las reparte al pool de operaciones del pipeline; cada respuesta
+        se envia en cuanto termina su operacion, asi que pueden llegar en distinto orden que las
+        peticiones (el cliente las empareja por su numero de secuencia). Los Set concurrentes de un
+        mismo stream se confirman juntos en un lote del log.
+        """
+        responses = queue.Queue()
+        slots = threading.Semaphore(PIPELINE_MAX_IN_FLIGHT)
+        
+        def run(request):
+            responses.put(self._pipeline_op(request))
+        
+        def read_requests():
+            submitted = 0
+            try:
+                for request in request_iterator:
+                    # Limitamos las operaciones en curso por stream por si el cliente no respeta su ventana
+                    while not slots.acquire(timeout = 0.5):
+                        if not context.is_active():
+                            return
+                    self.pipeline_executor.submit(run, request)
+                    submitted += 1
+            except grpc.RpcError:
+                # El cliente cancelo el stream
+                pass
+            finally:
+                # Un entero marca el final de las peticiones con el numero total enviado
+                responses.put(submitted)
+        
+        reader = threading.Thread(target = read_requests, name = "pipeline-reader", daemon = True)
+        reader.start()
+        
+        sent = 0
+        total = None
+        while total is None or sent < total:
+            response = responses.get()
+            if isinstance(response, int):
+                total = response
+                continue
+            slots.release()
+            sent += 1
+            yield response
+    
+    def MultiGet(self, request, context):
+        """ Devuelve el valor de cada una de las claves dadas, con un estado por clave """
+        results = []
+        for key in request.keys:
+            value = self.read_value(key)
+            if value is None:
+                results.append(key_value_store_service_pb2.GetValueResponse(status = False, value = "Clave no encontrada"))
+            else:
+                results.append(key_value_store_service_pb2.GetValueResponse(status = True, value = value.decode()))
+        
+        # Cada clave cuenta como una peticion get
+        self.counters.add("total_requests", len(request.keys))
+        self.counters.add("total_get_requests", len(request.keys))
+        return key_value_store_service_pb2.MultiGetResponse(results = results)
+    
+    def MultiSet(self, request, context):
+        """ Establece el valor de varias claves con una sola escritura y un solo fsync del log """
+        entries = [(entry.key, self.encode_value(entry.value)) for entry in request.entries]
+        if not entries:
+            return key_value_store_service_pb2.MultiSetResponse()
+        
+        try:
+            self.apply_multi_set(entries)
+        except MigrationFenced as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        
+        # Cada clave cuenta como una peticion set
+        self.counters.add("total_requests", len(entries))
+        self.counters.add("total_set_requests", len(entries))
+        return key_value_store_service_pb2.MultiSetResponse(status = [True] * len(entries))
+    
+    def _prefix_key_batches(self, request, context):
+        """ Recorre en bloques las claves con el prefijo de la peticion, a partir de su token de continuacion """
+        start_after = None
+        if request.page_token:
+            try:
+                start_after = decode_page_token(request.page_token)
+            except ValueError as e:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        
+        for key_batch in self.index.prefix_batches(request.prefixKey, start_after = start_after):
+            # Si el cliente cancelo la llamada o vencio su deadline dejamos de recorrer el indice
+            if not context.is_active():
+                return
+            yield key_batch
+    
+    def _prefix_items(self, request, context):
+        """ Devuelve (clave, valor) de las coincidencias segun la proyeccion (valor None con KEYS_ONLY).
+        
+        Respeta el limite de la peticion: si quedan mas coincidencias, termina devolviendo
+        (None, token) con el token de la siguiente pagina.
+        """
+        keys_only = request.projection == key_value_store_service_pb2.KEYS_ONLY
+        returned = 0
+        last_key = None
+        for key_batch in self._prefix_key_batches(request, context):
+            for key in key_batch:
+                if request.limit and returned == request.limit:
+                    yield None, encode_page_token(last_key)
+                    return
+                
+                value = None
+                if not keys_only:
+                    value = self.read_value(key)
+                    if value is None:
+                        continue
+                    value = value.decode()
+                yield key, value
+                returned += 1
+                last_key = key
     
     def GetPrefixKey(self, request, context):
         """ Devuelve una lista de valores cuyas claves empiezan por prefixKey """
         
-        if not hasattr(self, 'data_lock'):
-            self.data_lock = threading.Lock()
-
-        with self.data_lock:
-            data_copy = self.data.copy()
+        # Incrementamos el numero de peticiones totales y peticiones get_prefix
+        self.counters.add("total_get_prefix_requests")
+        self.counters.add("total_requests")
+        
+        # Con COUNT_ONLY solo se cuentan las claves del indice, sin leer ningun valor
+        if request.projection == key_value_store_service_pb2.COUNT_ONLY:
+            count = sum(len(key_batch) for key_batch in self._prefix_key_batches(request, context))
+            return key_value_store_service_pb2.GetPrefixResponse(count = count)
             
         # Iniciamos una lista de claves y valores (para valores coincidentes)
         keys = []
         values = []
+        next_page_token = ""
             
-        # Recorremos el diccionario en busca de claves que empiecen por prefixKey, en caso de encontrar, se le añade a las listas de claves y valores
-        for key, value in data_copy.items():
-            if key.startswith(request.prefixKey):
-                    keys.append(key)
-                    values.append(value)
+        # El indice ordenado devuelve directamente las claves que empiezan por prefixKey, sin copiar
+        # ni recorrer todo el diccionario; despues obtenemos el valor de cada una
+        for key, value in self._prefix_items(request, context):
+            if key is None:
+                next_page_token = value
+                break
+            keys.append(key)
+            if value is not None:
+                values.append(value)
             
         # Objeto que sera enviado al cliente con la respuesta deseada (lista de valores que empiezan por la prefixKey)
-        response = key_value_store_service_pb2.GetPrefixResponse(keys = keys, values = values)
-            
+        start = time.perf_counter()
+        response = key_value_store_service_pb2.GetPrefixResponse(keys = keys, values = values, next_page_token = next_page_token,
+                                                                  count = len(keys))
+        self.latency.record("response_build", time.perf_counter() - start)
+        return response
+    
+    def GetPrefixKeyStream(self, request, context):
+        """ Devuelve en lotes de tamaño acotado las claves y valores cuyas claves empiezan por prefixKey """
+        
         # Incrementamos el numero de peticiones totales y peticiones get_prefix
-        self.total_get_prefix_requests += 1
-        self.total_requests += 1
+        self.counters.add("total_get_prefix_requests")
+        self.counters.add("total_requests")
+        
+        if request.projection == key_value_store_service_pb2.COUNT_ONLY:
+            count = sum(len(key_batch) for key_batch in self._prefix_key_batches(request, context))
+            yield key_value_store_service_pb2.GetPrefixResponse(count = count)
+            return
+        
+        keys = []
+        values = []
+        batch_bytes = 0
+        for key, value in self._prefix_items(request, context):
+            # Al llegar al limite el ultimo mensaje lleva el token de la siguiente pagina
+            if key is None:
+                yield key_value_store_service_pb2.GetPrefixResponse(keys = keys, values = values, next_page_token = value,
+                                                                    count = len(keys))
+                return
             
-        return response     
+            # Enviamos el lote actual antes de que supere el tamaño maximo
+            size = len(key) + (len(value) if value is not None else 0)
+            if keys and batch_bytes + size > STREAM_BATCH_BYTES:
+                yield key_value_store_service_pb2.GetPrefixResponse(keys = keys, values = values, count = len(keys))
+                keys = []
+                values = []
+                batch_bytes = 0
+            keys.append(key)
+            if value is not None:
+                values.append(value)
+            batch_bytes += size
+        
+        if keys:
+            yield key_value_store_service_pb2.GetPrefixResponse(keys = keys, values = values, count = len(keys))
     
-    def Stat(self, request, context):
-        """ Recupera las estadísticas del servidor """
-        with self.locks[0]:
-            # Objeto con todas las estadisticas del servidor
-            response = key_value_store_service_pb2.StatResponse(
-                time_started = self.time_started,
-                total_requests = self.total_requests,
-                total_set_requests = self.total_set_requests,
-                total_get_requests = self.total_get_requests,
-                total_get_prefix_requests = self.total_get_prefix_requests
-            )
-            print("Se ha recibido una peticion Stat")
+    def _scan_keys(self, request, context):
+        """ Recorre en orden las claves del intervalo de la peticion, como maximo request.limit.
+        
+        El indice se recorre por bloques sin tomar los locks de las claves, como en las consultas
+        por prefijo: su lock solo se toma mientras se extrae cada bloque, asi que la memoria del scan
+        no depende del tamaño del intervalo y los Set de claves nuevas no esperan a que termine.
+        """
+        returned = 0
+        for key_batch in self.index.range_batches(request.start_key, request.end_key, request.reverse):
+            # Si el cliente cancelo la llamada o vencio su deadline dejamos de recorrer el indice
+            if not context.is_active():
+                return
+            for key in key_batch:
+                if request.limit and returned == request.limit:
+                    return
+                yield key
+                returned += 1
+    
+    def Scan(self, request, context):
+        """ Devuelve en orden, y en lotes de tamaño acotado, las claves y valores del intervalo [start_key, end_key) """
+        
+        # Incrementamos el numero de peticiones totales y peticiones scan
+        self.counters.add("total_scan_requests")
+        self.counters.add("total_requests")
+        
+        if request.end_key and request.start_key >= request.end_key:
+            return
+        
+        batch_keys = []
+        batch_values = []
+        batch_bytes = 0
+        for key in self._scan_keys(request, context):
+            value = None
+            if not request.keys_only:
+                value = self.read_value(key)
+                if value is None:
+                    continue
+                value = value.decode()
             
-            # Se envia el objeto al cliente
-            return response
+            # Enviamos el lote actual antes de que supere el tamaño maximo
+            size = len(key) + (len(value) if value is not None else 0)
+            if batch_keys and batch_bytes + size > STREAM_BATCH_BYTES:
+                # Si el cliente cancelo la llamada o vencio su deadline dejamos de enviar lotes
+                if not context.is_active():
+                    return
+                yield key_value_store_service_pb2.ScanResponse(keys = batch_keys, values = batch_values)
+                batch_keys = []
+                batch_values = []
+                batch_bytes = 0
+            batch_keys.append(key)
+            if value is not None:
+                batch_values.append(value)
+            batch_bytes += size
+        
+        if batch_keys:
+            yield key_value_store_service_pb2.ScanResponse(keys = batch_keys, values = batch_values)
+    
+    def _export_keys(self, key_filter):
+        """ Recorre en orden todas las claves del indice que pertenecen a la particion """
+        start = key_filter.start_key
+        while True:
+            keys = self.index.range(start, key_filter.end_key, limit = EXPORT_INDEX_BATCH)
+            if not keys:
+                return
+            for key in keys:
+                if key_filter.matches(key):
+                    yield key
+            # La menor clave posterior a la ultima devuelta
+            start = keys[-1] + "\0"
+    
+    def Export(self, request, context):
+        """ Envia en lotes las claves y valores de una particion para migrarla a otro servidor.
+        
+        EXPORT_ALL registra la migracion y copia toda la particion; desde ese momento las
+        escrituras de la particion se anotan. EXPORT_DIRTY copia las claves escritas desde la
+        exportacion anterior. EXPORT_FENCED rechaza a partir de ese momento las escrituras de la
+        particion y copia las ultimas claves escritas (corte final).
+        """
+        migration_id = request.migration_id
+        if request.phase == key_value_store_service_pb2.EXPORT_ALL:
+            migration = Migration(migration_id, KeyFilter.from_request(request))
+            with self.migrations_lock:
+                self.migrations[migration_id] = migration
+            keys = self._export_keys(migration.filter)
+        else:
+            migration = self.migrations.get(migration_id)
+            if migration is None:
+                context.abort(grpc.StatusCode.NOT_FOUND, f"Migracion desconocida: {migration_id}")
+            if request.phase == key_value_store_service_pb2.EXPORT_FENCED:
+                migration.fenced = True
+                # Esperamos a que terminen las escrituras que ya habian pasado el control del corte,
+                # que anotan su clave antes de soltar el lock
+                for lock in self.locks:
+                    with lock:
+                        pass
+            keys = migration.take_dirty()
+        
+        batch_keys = []
+        batch_values = []
+        batch_bytes = 0
+        for key in keys:
+            value = self.read_value(key)
+            if value is None:
+                continue
+            size = len(key) + len(value)
+            if batch_keys and batch_bytes + size > STREAM_BATCH_BYTES:
+                if not context.is_active():
+                    return
+                yield key_value_store_service_pb2.ExportBatch(keys = batch_keys, values = batch_values)
+                batch_keys = []
+                batch_values = []
+                batch_bytes = 0
+            batch_keys.append(key)
+            batch_values.append(value)
+            batch_bytes += size
+        if batch_keys:
+            yield key_value_store_service_pb2.ExportBatch(keys = batch_keys, values = batch_values)
     
+    def Ingest(self, request_iterator, context):
+        """ Escribe los lotes recibidos de un Export; cada lote es una sola escritura y un solo fsync del log """
+        keys = 0
+        total_bytes = 0
+        for batch in request_iterator:
+            entries = list(zip(batch.keys, batch.values))
+            if not entries:
+                continue
+            self.apply_multi_set(entries)
+            keys += len(entries)
+            total_bytes += sum(len(key) + len(value) for key, value in entries)
+        return key_value_store_service_pb2.IngestResponse(keys = keys, bytes = total_bytes)
     
+    def EndMigration(self, request, context):
+        """ Termina una migracion.
+        
+        Con completed (corte con exito) la particion sigue en corte para siempre, tambien tras
+        reiniciar: sus datos estan en el destino, asi que un cliente con el enrutado antiguo no debe
+        poder escribirla aqui. Sin completed la migracion se olvida: se deja de anotar sus
+        escrituras y se levanta el corte (tambien el de una migracion ya terminada).
+        """
+        with self.migrations_lock:
+            migration = self.migrations.get(request.migration_id)
+            if migration is None:
+                return key_value_store_service_pb2.EndMigrationResponse(status = False)
+            if request.completed:
+                if not migration.fenced:
+                    context.abort(grpc.StatusCode.FAILED_PRECONDITION, "La migracion no ha llegado al corte final")
+                migration.complete()
+            else:
+                del self.migrations[request.migration_id]
+            save_moved(self.data_dir, list(self.migrations.values()))
+        return key_value_store_service_pb2.EndMigrationResponse(status = True)
+    
+    def Stat(self, request, context):
+        """ Recupera las estadísticas del servidor.
+        
+        No toma ningun lock de las claves: los contadores se suman de las copias de cada hilo y el
+        numero de claves es el tamaño del diccionario de ubicaciones, que se lee de una vez.
+        """
+        counters = self.counters.snapshot()
+        
+        # Metricas del escritor del log (tamaño de lote y latencias de group commit)
+        commit_stats = self.log.stats()
+        live_bytes, dead_bytes, segments = self.log.space_usage()
+        blob_live_bytes, blob_dead_bytes, blob_segments = self.blob_log.space_usage()
+        cache_hits, cache_misses, cache_evictions, cache_bytes = self.cache.stats() if self.cache is not None else (0, 0, 0, 0)
+        bloom = self.bloom
+        
+        # Objeto con todas las estadisticas del servidor
+        response = key_value_store_service_pb2.StatResponse(
+            time_started = self.time_started,
+            total_requests = counters["total_requests"],
+            total_set_requests = counters["total_set_requests"],
+            total_get_requests = counters["total_get_requests"],
+            total_get_prefix_requests = counters["total_get_prefix_requests"],
+            total_scan_requests = counters["total_scan_requests"],
+            commit_batches = commit_stats["batches"],
+            commit_records = commit_stats["records"],
+            commit_avg_batch_records = commit_stats["avg_batch_records"],
+            commit_max_batch_records = commit_stats["max_batch_records"],
+            commit_avg_fsync_ms = commit_stats["avg_fsync_ms"],
+            commit_avg_latency_ms = commit_stats["avg_commit_ms"],
+            commit_max_latency_ms = commit_stats["max_commit_ms"],
+            durability_mode = self.log.mode,
+            last_fsync = self.log.last_fsync_iso(),
+            live_bytes = live_bytes,
+            dead_bytes = dead_bytes,
+            segments = segments,
+            compactions = self.compactor.total_compactions,
+            snapshots = self.total_snapshots,
+            last_snapshot = self.last_snapshot,
+            recovery_seconds = self.recovery_seconds,
+            recovered_from_snapshot = self.recovered_from_snapshot,
+            storage_mode = self.storage,
+            keys = len(self.locations),
+            shards = 1,
+            resident_bytes = counters["resident_bytes"],
+            log_bytes = live_bytes + dead_bytes,
+            uptime_seconds = time.monotonic() - self.started_at,
+            in_flight_requests = counters["in_flight_requests"],
+            rpc_errors = {method: count for method, count in self.errors.snapshot().items() if count},
+            blob_live_bytes = blob_live_bytes,
+            blob_dead_bytes = blob_dead_bytes,
+            blob_segments = blob_segments,
+            blob_compactions = self.blob_compactor.total_compactions,
+            cache_hits = cache_hits,
+            cache_misses = cache_misses,
+            cache_evictions = cache_evictions,
+            cache_bytes = cache_bytes,
+            bloom_fpr = bloom.estimated_fpr() if bloom is not None else 0.0,
+            bloom_negatives = counters["bloom_negatives"],
+            bloom_false_positives = counters["bloom_false_positives"],
+            bloom_bytes = bloom.size_bytes() if bloom is not None else 0
+        )
+        print("Se ha recibido una peticion Stat")
+        
+        # Se envia el objeto al cliente
+        return response
+    
+    def LatencyStats(self, request, context):
+        """ Devuelve los histogramas de latencia de la ventana actual; con reset empieza una nueva """
+        window_seconds, histograms = self.latency.window(request.reset)
+        return key_value_store_service_pb2.LatencyStatsResponse(
+            window_seconds = window_seconds,
+            histograms = [histogram_response(name, histogram) for name, histogram in sorted(histograms.items())]
+        )
+    
+    def Profile(self, request, context):
+        """ Muestrea las pilas de los hilos del servidor durante los segundos pedidos.
+        
+        La llamada ocupa uno de los hilos del servidor mientras dura el muestreo.
+        """
+        seconds = request.seconds or 10.0
+        interval = (request.interval_ms or 10.0) / 1000
+        try:
+            collapsed, samples, elapsed = self.profiler.profile(seconds, interval, request.include_idle)
+        except RuntimeError as e:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(e))
+        return key_value_store_service_pb2.ProfileResponse(collapsed_stacks = collapsed, samples = samples, seconds = elapsed)
+    
+    def Shards(self, request, context):
+        """ Un servidor de un solo proceso no esta particionado """
+        return key_value_store_service_pb2.ShardsResponse()
+    
+    
+def parse_args():
+    """ Lee las opciones de arranque del servidor """
+    parser = argparse.ArgumentParser(description="Servidor clave-valor lbserver")
+    parser.add_argument("--durability", choices=DURABILITY_MODES, default="group",
+                        help="Modo de durabilidad del log: always, group, interval o none")
+    parser.add_argument("--fsync-interval-ms", type=int, default=100,
+                        help="Periodo de fsync en milisegundos para el modo interval")
+    parser.add_argument("--data-dir", default="./server/data",
+                        help="Directorio donde se guardan los segmentos del log")
+    parser.add_argument("--segment-max-mb", type=float, default=64,
+                        help="Tamaño maximo de cada segmento del log en MB")
+    parser.add_argument("--blob-threshold-kb", type=float, default=64,
+                        help="Los valores de al menos este tamaño en KB se guardan en el log de blobs (0 = nunca)")
+    parser.add_argument("--cache-mb", type=float, default=64,
+                        help="Presupuesto en MB del cache de valores en modo disk (0 = sin cache)")
+    parser.add_argument("--bloom-bits-per-key", type=float, default=0,
+                        help="Bits por clave del filtro de Bloom en modo disk (0 = sin filtro)")
+    parser.add_argument("--compaction-rate-mb", type=float, default=16,
+                        help="Presupuesto de E/S del compactador en MB/s (0 = sin limite)")
+    parser.add_argument("--snapshot-interval", type=float, default=60,
+                        help="Segundos entre snapshots del keyspace")
+    parser.add_argument("--storage", choices=STORAGE_MODES, default="memory",
+                        help="Guardar los valores en memoria o solo su ubicacion en el log (disk)")
+    parser.add_argument("--engine", choices=ENGINES, default="sync",
+                        help="Servidor gRPC con pool de hilos (sync) o con bucle de eventos asyncio (aio)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Hilos del pool de peticiones (por defecto 10 con sync y 32 con aio)")
+    parser.add_argument("--port", type=int, default=50051,
+                        help="Puerto en el que escucha el servidor")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Numero de procesos shard; con mas de uno este proceso solo reparte las peticiones")
+    # Lo pasa el proceso frontal a cada shard
+    parser.add_argument("--shard-id", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--recovery", choices=("snapshot", "replay"), default="snapshot",
+                        help="Recuperar desde el ultimo snapshot o reproduciendo todo el log")
+    args = parser.parse_args()
+    if args.workers is None:
+        args.workers = 32 if args.engine == "aio" else 10
+    return args
+
+def shard_command(args, shard):
+    """ Linea de comandos de un proceso shard: mismas opciones, su propio puerto y directorio de datos """
+    return [sys.executable, os.path.abspath(__file__),
+            "--port", str(args.port + 1 + shard),
+            "--data-dir", os.path.join(args.data_dir, f"shard-{shard}"),
+            "--durability", args.durability,
+            "--fsync-interval-ms", str(args.fsync_interval_ms),
+            "--segment-max-mb", str(args.segment_max_mb),
+            "--blob-threshold-kb", str(args.blob_threshold_kb),
+            "--cache-mb", str(args.cache_mb),
+            "--bloom-bits-per-key", str(args.bloom_bits_per_key),
+            "--compaction-rate-mb", str(args.compaction_rate_mb),
+            "--snapshot-interval", str(args.snapshot_interval),
+            "--storage", args.storage,
+            "--engine", args.engine,
+            "--workers", str(args.workers),
+            "--recovery", args.recovery,
+            "--shard-id", str(shard)]
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def serve_sharded(args, options):
+    """ Arranca un proceso lbserver por shard y un servidor frontal que reparte las peticiones entre ellos """
+    shards = [subprocess.Popen(shard_command(args, shard)) for shard in range(args.shards)]
+    router = ShardRouter([f"localhost:{args.port + 1 + shard}" for shard in range(args.shards)], options = options)
+    
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=args.workers), options=options)
+    key_value_store_service_pb2_grpc.add_KeyValueStoreServicer_to_server(router, server)
+    key_value_store_service_pb2_grpc.add_KeyValueStoreBytesServicer_to_server(BytesShardRouter(router), server)
+    server.add_insecure_port(f'[::]:{args.port}')
+    server.start()
+    print(f"Router started on port {args.port} ({args.shards} shards on ports {args.port + 1}-{args.port + args.shards})")
+    
+    # Al terminar el proceso frontal (Ctrl+C o terminate()) detenemos los shards de forma ordenada
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.wait_for_termination()
+    except KeyboardInterrupt:
+        print("Router shutting down...")
+        server.stop(0)
+        router.close()
+        for proc in shards:
+            proc.send_signal(signal.SIGINT)
+        for proc in shards:
+            proc.wait()
+
 def main():
-    # Iniciamos el servidor gRPC
+    args = parse_args()
+    
+    # Opciones de los mensajes gRPC
 
     options = [
     ("grpc.max_send_message_length", 6 * 1024 * 1024),      # 6 MB
     ("grpc.max_receive_message_length", 6 * 1024 * 1024)    # 6 MB
 ]
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options=options)
     
-    # Añadimos el servicio KeyValueStore al servidor
-    key_value_store_service_pb2_grpc.add_KeyValueStoreServicer_to_server(KeyValueServer(), server)
+    if args.shards > 1:
+        # Cada shard es un proceso con su propio GIL, su propio log y una particion hash del keyspace
+        serve_sharded(args, options)
+        return
+    
+    kv_server = KeyValueServer(durability = args.durability, fsync_interval_ms = args.fsync_interval_ms,
+                               data_dir = args.data_dir, segment_max_bytes = int(args.segment_max_mb * 1024 * 1024),
+                               compaction_rate_bytes = int(args.compaction_rate_mb * 1024 * 1024),
+                               snapshot_interval = args.snapshot_interval, use_snapshots = args.recovery == "snapshot",
+                               storage = args.storage, blob_threshold = int(args.blob_threshold_kb * 1024),
+                               cache_bytes = int(args.cache_mb * 1024 * 1024), bloom_bits_per_key = args.bloom_bits_per_key,
+                               # Un shard solo guarda su particion: el antiguo 'database.log' no se migra
+                               legacy_path = "./server/database.log" if args.shard_id is None else None)
+    
+    if args.engine == "aio":
+        # El motor asyncio atiende todas las llamadas en un bucle de eventos y ejecuta la logica
+        # bloqueante (locks, disco, fsync) en un pool de args.workers hilos
+        try:
+            asyncio.run(serve_aio(kv_server, options, args.workers, args.port))
+        except KeyboardInterrupt:
+            print("Server shutting down...")
+            kv_server.shutdown()
+        return
+    
+    # Iniciamos el servidor gRPC
+    # El interceptor cuenta las peticiones en curso y los errores de cada RPC para Stat y mide su latencia
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=args.workers), options=options,
+                         interceptors=[RequestMetricsInterceptor(kv_server.counters, kv_server.errors, kv_server.latency)])
+    
+    # Añadimos el servicio KeyValueStore al servidor, y su version con los valores en bytes
+    key_value_store_service_pb2_grpc.add_KeyValueStoreServicer_to_server(kv_server, server)
+    key_value_store_service_pb2_grpc.add_KeyValueStoreBytesServicer_to_server(BytesKeyValueServicer(kv_server), server)
     
-    # Iniciamos el servidor en el puerto 50051
-    server.add_insecure_port('[::]:50051')
+    # Iniciamos el servidor en el puerto indicado (50051 por defecto)
+    server.add_insecure_port(f'[::]:{args.port}')
     server.start()
-    print("Server started on port 50051")
+    print(f"Server started on port {args.port} (engine = {args.engine}, durability = {args.durability}, storage = {args.storage})")
     
     try:
         # Mantenemos el servidor en ejecución hasta que se interrumpa manualmente
@@ -194,6 +1331,7 @@ def main():
     except KeyboardInterrupt:
         print("Server shutting down...")
         server.stop(0)
+        kv_server.shutdown()
         
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,365 @@
+import collections
+import contextvars
+import inspect
+import math
+import threading
+import time
+
+import grpc
+
+import key_value_store_service_pb2
+
+# Cada potencia de 2 (en microsegundos) se divide en HISTOGRAM_SUB_BUCKETS cubetas lineales, asi
+# que el valor que se informa de una cubeta se aleja del real como mucho 1/32 (estilo HdrHistogram)
+HISTOGRAM_SUB_BUCKETS = 32
+
+# Percentiles que se informan de cada histograma
+PERCENTILES = (("p50_ms", 0.5), ("p90_ms", 0.9), ("p99_ms", 0.99), ("p999_ms", 0.999))
+
+# Metadato con el que el cliente pide la traza de una peticion ("1") y con el que el servidor la
+# devuelve en los metadatos finales ("fase=ms,fase=ms,...")
+TRACE_METADATA_KEY = "x-kv-trace"
+
+# Traza de la peticion que se esta atendiendo (None si el cliente no la pidio)
+_current_trace = contextvars.ContextVar("current_trace", default = None)
+
+
+class ShardedCounters:
+    """ Contadores con una copia por hilo que se suman al leerlos.
+
+    Cada hilo incrementa solo su propio diccionario, asi que los incrementos no comparten ningun
+    lock ni se pierden cuando dos hilos cuentan a la vez. La lectura suma las copias de todos los
+    hilos (tambien las de hilos ya terminados) sin bloquear a los que escriben.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        # Solo protege el registro de la copia de un hilo nuevo
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.counts
+        except AttributeError:
+            counts = collections.defaultdict(int)
+            with self._lock:
+                self._shards.append(counts)
+            self._local.counts = counts
+            return counts
+
+    def add(self, name, amount = 1):
+        self._shard()[name] += amount
+
+    def snapshot(self):
+        """ Devuelve un diccionario nombre -> total de todos los hilos """
+        totals = collections.defaultdict(int)
+        for shard in list(self._shards):
+            # dict() copia el diccionario de una vez aunque su hilo siga incrementandolo
+            for name, value in dict(shard).items():
+                totals[name] += value
+        return totals
+
+    def value(self, name):
+        return sum(shard.get(name, 0) for shard in list(self._shards))
+
+
+class RequestTrace:
+    """ Duracion de cada fase de una peticion, en el orden en que aparecen; las repetidas se suman """
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def encode(self):
+        return ",".join(f"{name}={seconds * 1000:.3f}" for name, seconds in self.phases.items())
+
+
+def trace_requested(metadata):
+    return any(key == TRACE_METADATA_KEY and value == "1" for key, value in metadata or ())
+
+
+def _timed_deserializer(deserializer, trace):
+    """ Envuelve el deserializador de la RPC para anotar en la traza el tiempo de decodificar el protobuf """
+    def deserialize(data):
+        start = time.perf_counter()
+        request = deserializer(data)
+        trace.add("decode", time.perf_counter() - start)
+        return request
+    return deserialize
+
+
+def bucket_for(seconds):
+    """ Cubeta logaritmica de una duracion; la cubeta 0 agrupa lo que dura menos de 1 microsegundo """
+    micros = seconds * 1e6
+    if micros < 1:
+        return 0
+    # micros = mantissa * 2 ** exponent con mantissa en [0.5, 1)
+    mantissa, exponent = math.frexp(micros)
+    return exponent * HISTOGRAM_SUB_BUCKETS + int((mantissa - 0.5) * 2 * HISTOGRAM_SUB_BUCKETS)
+
+
+def bucket_upper_ms(bucket):
+    """ Limite superior de la cubeta en milisegundos """
+    if bucket == 0:
+        return 0.001
+    exponent, sub_bucket = divmod(bucket, HISTOGRAM_SUB_BUCKETS)
+    return 2 ** (exponent - 1) * (1 + (sub_bucket + 1) / HISTOGRAM_SUB_BUCKETS) / 1000
+
+
+class LatencyHistograms:
+    """ Histogramas de latencia con cubetas logaritmicas, uno por nombre (una RPC o una fase interna).
+
+    Como ShardedCounters, cada hilo anota en sus propios histogramas y la lectura los suma. reset
+    no borra nada: guarda los totales del momento como linea base y las lecturas posteriores
+    devuelven solo lo registrado desde entonces (la ventana actual).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self._baseline = {}
+        self._window_start = time.monotonic()
+
+    def _shard(self):
+        try:
+            return self._local.histograms
+        except AttributeError:
+            histograms = {}
+            with self._lock:
+                self._shards.append(histograms)
+            self._local.histograms = histograms
+            return histograms
+
+    def record(self, name, seconds):
+        """ Anota la duracion en el histograma del nombre y en la traza de la peticion en curso, si la hay """
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, seconds)
+        histograms = self._shard()
+        histogram = histograms.get(name)
+        if histogram is None:
+            # Cubeta -> numero de muestras; la clave None acumula la suma de las duraciones
+            histogram = histograms[name] = collections.defaultdict(int)
+        histogram[bucket_for(seconds)] += 1
+        histogram[None] += seconds
+
+    def trace(self, name, seconds):
+        """ Anota la duracion solo en la traza de la peticion en curso (fases ya registradas desde otro hilo) """
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, seconds)
+
+    def _totals(self):
+        totals = {}
+        for shard in list(self._shards):
+            for name, histogram in dict(shard).items():
+                merged = totals.setdefault(name, collections.defaultdict(int))
+                for bucket, count in dict(histogram).items():
+                    merged[bucket] += count
+        return totals
+
+    def window(self, reset = False):
+        """ Devuelve (segundos de la ventana, nombre -> histograma) de lo registrado desde el ultimo reset.
+
+        Con reset se empieza una ventana nueva justo despues de leer esta.
+        """
+        totals = self._totals()
+        now = time.monotonic()
+        window_seconds = now - self._window_start
+        histograms = {}
+        for name, histogram in totals.items():
+            base = self._baseline.get(name, {})
+            delta = {bucket: count - base.get(bucket, 0) for bucket, count in histogram.items()}
+            if any(count for bucket, count in delta.items() if bucket is not None):
+                histograms[name] = delta
+        if reset:
+            self._baseline = totals
+            self._window_start = now
+        return window_seconds, histograms
+
+
+def histogram_response(name, histogram):
+    """ Convierte un histograma (cubeta -> muestras, None -> suma en segundos) en un LatencyHistogram con sus percentiles """
+    buckets = sorted((bucket, count) for bucket, count in histogram.items() if bucket is not None and count)
+    total = sum(count for _, count in buckets)
+    response = key_value_store_service_pb2.LatencyHistogram(
+        name = name,
+        count = total,
+        mean_ms = histogram.get(None, 0.0) / total * 1000 if total else 0.0,
+        max_ms = bucket_upper_ms(buckets[-1][0]) if buckets else 0.0,
+        buckets = [bucket for bucket, _ in buckets],
+        bucket_counts = [count for _, count in buckets],
+    )
+    for field, fraction in PERCENTILES:
+        target = math.ceil(total * fraction)
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen >= target:
+                setattr(response, field, bucket_upper_ms(bucket))
+                break
+    return response
+
+
+def merge_histograms(responses):
+    """ Suma las cubetas de varios LatencyHistogram con el mismo nombre y devuelve el histograma combinado """
+    merged = collections.defaultdict(int)
+    for response in responses:
+        for bucket, count in zip(response.buckets, response.bucket_counts):
+            merged[bucket] += count
+        merged[None] += response.mean_ms * response.count / 1000
+    return merged
+
+
+def _method_name(handler_call_details):
+    """ Nombre de la RPC; las de otros servicios llevan delante el nombre del servicio (KeyValueStoreBytes.Set) """
+    service, method = handler_call_details.method.rsplit("/", 1)
+    service = service.rsplit(".", 1)[-1]
+    return method if service == "KeyValueStore" else f"{service}.{method}"
+
+
+def _failed(context):
+    code = context.code()
+    return code is not None and code != grpc.StatusCode.OK
+
+
+class _MetricsInterceptor:
+    """ Parte comun de los interceptores de metricas de los dos motores """
+
+    def __init__(self, counters, errors, latency):
+        self.counters = counters
+        self.errors = errors
+        self.latency = latency
+
+    def _prepare(self, handler, handler_call_details):
+        """ Crea la traza de la llamada si el cliente la pidio y mide la decodificacion de sus mensajes """
+        if not trace_requested(handler_call_details.invocation_metadata):
+            return handler, None
+        trace = RequestTrace()
+        if handler.request_deserializer is not None:
+            handler = handler._replace(request_deserializer = _timed_deserializer(handler.request_deserializer, trace))
+        return handler, trace
+
+    def _start(self, trace):
+        self.counters.add("in_flight_requests")
+        if trace is not None:
+            _current_trace.set(trace)
+        return time.perf_counter()
+
+    def _finish(self, method, context, start, trace):
+        elapsed = time.perf_counter() - start
+        if trace is not None:
+            # Los metadatos finales salen con el estado de la llamada, despues de la ultima respuesta
+            _current_trace.set(None)
+            trace.add("handler", elapsed)
+            context.set_trailing_metadata(((TRACE_METADATA_KEY, trace.encode()),))
+        self.latency.record(method, elapsed)
+        self.counters.add("in_flight_requests", -1)
+
+
+class RequestMetricsInterceptor(_MetricsInterceptor, grpc.ServerInterceptor):
+    """ Cuenta las peticiones en curso y los errores de cada RPC del servidor sincrono y registra su latencia.
+
+    Una llamada cuenta como error si lanza una excepcion (incluido context.abort) o termina con un
+    codigo de estado distinto de OK (por ejemplo NOT_FOUND en Get). Si el cliente envia el metadato
+    TRACE_METADATA_KEY, las fases de la peticion se devuelven en sus metadatos finales.
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        handler, trace = self._prepare(handler, handler_call_details)
+        method = _method_name(handler_call_details)
+        if handler.unary_unary:
+            return handler._replace(unary_unary = self._unary(method, handler.unary_unary, trace))
+        if handler.stream_unary:
+            return handler._replace(stream_unary = self._unary(method, handler.stream_unary, trace))
+        if handler.unary_stream:
+            return handler._replace(unary_stream = self._stream(method, handler.unary_stream, trace))
+        return handler._replace(stream_stream = self._stream(method, handler.stream_stream, trace))
+
+    def _unary(self, method, behavior, trace):
+        def wrapper(request, context):
+            start = self._start(trace)
+            try:
+                response = behavior(request, context)
+            except Exception:
+                self.errors.add(method)
+                raise
+            finally:
+                self._finish(method, context, start, trace)
+            if _failed(context):
+                self.errors.add(method)
+            return response
+        return wrapper
+
+    def _stream(self, method, behavior, trace):
+        def wrapper(request, context):
+            start = self._start(trace)
+            try:
+                yield from behavior(request, context)
+            except Exception:
+                self.errors.add(method)
+                raise
+            else:
+                if _failed(context):
+                    self.errors.add(method)
+            finally:
+                # En los streams se mide la llamada completa, hasta el ultimo mensaje
+                self._finish(method, context, start, trace)
+        return wrapper
+
+
+class AioRequestMetricsInterceptor(_MetricsInterceptor, grpc.aio.ServerInterceptor):
+    """ Version de RequestMetricsInterceptor para el motor grpc.aio """
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        handler, trace = self._prepare(handler, handler_call_details)
+        method = _method_name(handler_call_details)
+        for kind in ("unary_unary", "stream_unary", "unary_stream", "stream_stream"):
+            behavior = getattr(handler, kind)
+            if behavior is not None:
+                # Los streams de respuesta pueden ser generadores asincronos o corrutinas que usan context.write
+                if inspect.isasyncgenfunction(behavior):
+                    return handler._replace(**{kind: self._stream(method, behavior, trace)})
+                return handler._replace(**{kind: self._unary(method, behavior, trace)})
+        return handler
+
+    def _unary(self, method, behavior, trace):
+        async def wrapper(request, context):
+            start = self._start(trace)
+            try:
+                response = await behavior(request, context)
+            except Exception:
+                self.errors.add(method)
+                raise
+            finally:
+                self._finish(method, context, start, trace)
+            if _failed(context):
+                self.errors.add(method)
+            return response
+        return wrapper
+
+    def _stream(self, method, behavior, trace):
+        async def wrapper(request, context):
+            start = self._start(trace)
+            try:
+                async for response in behavior(request, context):
+                    yield response
+            except Exception:
+                self.errors.add(method)
+                raise
+            else:
+                if _failed(context):
+                    self.errors.add(method)
+            finally:
+                self._finish(method, context, start, trace)
+        return wrapper
@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import zlib
+
+from commit_log import fsync_dir
+
+# Archivo del directorio de datos con las particiones ya migradas a otros servidores
+MOVED_FILE = "moved_partitions.json"
+
+
+class MigrationFenced(RuntimeError):
+    """ Escritura rechazada porque la clave pertenece a una particion en corte de migracion """
+
+
+class KeyFilter:
+    """ Particion del keyspace que se migra: un intervalo [start_key, end_key) y opcionalmente
+    los buckets hash (crc32(clave) % hash_modulus) que se mueven. Un end_key vacio no tiene limite.
+    """
+
+    def __init__(self, start_key="", end_key="", hash_modulus=0, hash_buckets=()):
+        self.start_key = start_key
+        self.end_key = end_key
+        self.hash_modulus = hash_modulus
+        self.hash_buckets = frozenset(hash_buckets)
+
+    @classmethod
+    def from_request(cls, request):
+        return cls(request.start_key, request.end_key, request.hash_modulus, request.hash_buckets)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["start_key"], data["end_key"], data["hash_modulus"], data["hash_buckets"])
+
+    def to_dict(self):
+        return {"start_key": self.start_key, "end_key": self.end_key, "hash_modulus": self.hash_modulus,
+                "hash_buckets": sorted(self.hash_buckets)}
+
+    def matches(self, key):
+        if key < self.start_key or (self.end_key and key >= self.end_key):
+            return False
+        if self.hash_modulus:
+            return zlib.crc32(key.encode("utf-8")) % self.hash_modulus in self.hash_buckets
+        return True
+
+
+class Migration:
+    """ Estado de una migracion en el servidor de origen.
+
+    Desde que se registra, cada escritura de una clave de la particion se anota en dirty para
+    que la fase de puesta al dia la vuelva a copiar. Con fenced activo las escrituras de la
+    particion se rechazan (corte final). Una migracion terminada (completed) mantiene el corte
+    para siempre: los datos de la particion ya estan en el destino.
+    """
+
+    def __init__(self, migration_id, key_filter):
+        self.migration_id = migration_id
+        self.filter = key_filter
+        self.fenced = False
+        self.completed = False
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def complete(self):
+        """ Marca la migracion como terminada: deja la particion en corte y deja de anotar sus escrituras """
+        self.fenced = True
+        self.completed = True
+        with self._lock:
+            self._dirty = set()
+
+    def mark_dirty(self, key):
+        with self._lock:
+            self._dirty.add(key)
+
+    def take_dirty(self):
+        """ Devuelve en orden las claves escritas desde la ultima llamada y vacia el conjunto """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return sorted(dirty)
+
+
+def load_moved(data_dir):
+    """ Devuelve id -> Migration terminada de las particiones ya migradas guardadas en el directorio de datos """
+    path = os.path.join(data_dir, MOVED_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        entries = json.load(file)
+    migrations = {}
+    for entry in entries:
+        migration = Migration(entry["migration_id"], KeyFilter.from_dict(entry))
+        migration.complete()
+        migrations[migration.migration_id] = migration
+    return migrations
+
+
+def save_moved(data_dir, migrations):
+    """ Guarda de forma atomica (archivo temporal + fsync + renombrado) las particiones de las migraciones terminadas """
+    entries = [dict(migration.filter.to_dict(), migration_id = migration.migration_id)
+               for migration in migrations if migration.completed]
+    path = os.path.join(data_dir, MOVED_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(entries, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.rename(tmp_path, path)
+    fsync_dir(data_dir)
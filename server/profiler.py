@@ -0,0 +1,88 @@
+import collections
+import os
+import re
+import sys
+import threading
+import time
+
+# Duracion maxima de una sesion de perfilado pedida por RPC
+MAX_PROFILE_SECONDS = 300.0
+
+# Marcos en los que un hilo solo espera trabajo (colas, condiciones, el bucle de sondeo de gRPC,
+# un Thread.run dentro de codigo C); sus muestras se descartan salvo que se pidan expresamente
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("threading.py", "run"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("selectors.py", "select"),
+    ("_server.py", "_serve"),
+    ("base_events.py", "_run_once"),
+}
+
+
+def _thread_group(name):
+    """ Nombre del hilo sin su numero final, para agrupar los hilos de un mismo pool """
+    return re.sub(r"[-_]\d+(_\d+)?(?= \(|$)", "", name)
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """ Perfilador por muestreo de las pilas de todos los hilos del proceso.
+
+    Un hilo toma cada interval segundos la pila de los demas hilos con sys._current_frames() y
+    cuenta cuantas veces aparece cada pila. No instala ganchos en el interprete (a diferencia de
+    cProfile o sys.setprofile), asi que el coste es el de cada muestra y no el de cada llamada.
+    El resultado es texto en formato de pilas colapsadas ("hilo;marco;marco N" por linea), que
+    herramientas como flamegraph.pl o speedscope convierten en un flame graph.
+    """
+
+    def __init__(self):
+        # Solo una sesion de perfilado a la vez por proceso
+        self._lock = threading.Lock()
+
+    def profile(self, seconds, interval = 0.01, include_idle = False):
+        """ Muestrea durante seconds segundos; devuelve (pilas colapsadas, muestras, duracion real).
+
+        Lanza RuntimeError si ya hay otra sesion en curso.
+        """
+        if not self._lock.acquire(blocking = False):
+            raise RuntimeError("Ya hay una sesion de perfilado en curso")
+        try:
+            return self._sample(min(seconds, MAX_PROFILE_SECONDS), interval, include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds, interval, include_idle):
+        stacks = collections.Counter()
+        samples = 0
+        own_id = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + seconds
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not include_idle and (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(_thread_group(names.get(thread_id, str(thread_id))))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+
+        collapsed = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+        return collapsed, samples, time.perf_counter() - start
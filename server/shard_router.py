@@ -0,0 +1,467 @@
+import base64
+import heapq
+import itertools
+import queue
+import threading
+import time
+import zlib
+
+import grpc
+
+import key_value_store_service_pb2
+import key_value_store_service_pb2_grpc
+from metrics import TRACE_METADATA_KEY, ShardedCounters, histogram_response, merge_histograms, trace_requested
+
+# Tamaño maximo aproximado (claves + valores) de cada mensaje de las respuestas en streaming
+STREAM_BATCH_BYTES = 1024 * 1024
+
+# Contadores de peticiones que el router cuenta por su cuenta en lugar de sumar los de los shards
+REQUEST_COUNTERS = ("total_requests", "total_get_requests", "total_set_requests", "total_get_prefix_requests", "total_scan_requests")
+
+# Metricas de StatResponse que no se suman al combinar los shards
+MAX_FIELDS = ("commit_max_batch_records", "commit_max_latency_ms", "recovery_seconds", "uptime_seconds", "bloom_fpr")
+AVG_FIELDS = ("commit_avg_batch_records", "commit_avg_fsync_ms", "commit_avg_latency_ms")
+
+
+class ForwardTrace:
+    """ Traza de una llamada reenviada: si el cliente la pidio, la pide a los shards y se la devuelve.
+
+    Las llamadas a varios shards van en paralelo, asi que de cada fase se toma el maximo entre los
+    shards. Se añade la fase 'router': el tiempo del proceso frontal que no cubren las del shard
+    (reparto de las claves, la llamada al shard y la combinacion de las respuestas).
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.metadata = ((TRACE_METADATA_KEY, "1"),) if trace_requested(context.invocation_metadata()) else None
+        self.start = time.perf_counter()
+        self.calls = []
+
+    def add(self, call):
+        """ Anota una llamada a un shard (o el RpcError de una llamada con with_call) para leer su traza al final """
+        if self.metadata is not None:
+            self.calls.append(call)
+        return call
+
+    def finish(self):
+        """ Envia al cliente la traza en los metadatos finales; hay que llamarla antes de responder o de abortar """
+        if self.metadata is None:
+            return
+        phases = {}
+        for call in self.calls:
+            for key, value in call.trailing_metadata() or ():
+                if key == TRACE_METADATA_KEY and value:
+                    for phase in value.split(","):
+                        name, ms = phase.split("=")
+                        phases[name] = max(phases.get(name, 0.0), float(ms))
+        elapsed = (time.perf_counter() - self.start) * 1000
+        phases["router"] = max(0.0, elapsed - phases.get("handler", 0.0) - phases.get("decode", 0.0))
+        encoded = ",".join(f"{name}={ms:.3f}" for name, ms in phases.items())
+        self.context.set_trailing_metadata(((TRACE_METADATA_KEY, encoded),))
+
+
+def shard_for_key(key, shards):
+    """ Shard propietario de la clave; crc32 da el mismo resultado en todos los procesos (hash() no) """
+    return zlib.crc32(key.encode("utf-8")) % shards
+
+
+def encode_page_token(key):
+    """ Token de continuacion con el mismo formato que los de lbserver: la ultima clave devuelta """
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii")
+
+
+class ShardRouter(key_value_store_service_pb2_grpc.KeyValueStoreServicer):
+    """ Proceso frontal del modo multiproceso: reenvia cada peticion al shard propietario de la clave.
+
+    Cada shard es un proceso lbserver independiente con su propio log y su propia particion hash
+    del keyspace. Las consultas por prefijo, los scans y Stat se envian a todos los shards y se
+    combinan aqui. Los clientes que necesiten escalar con el numero de nucleos pueden pedir las
+    direcciones de los shards con la RPC Shards y enviarles las peticiones directamente. Las
+    llamadas unarias reenviadas devuelven la traza del shard si el cliente la pide (ver ForwardTrace).
+    """
+
+    def __init__(self, addresses, options=None):
+        self.addresses = list(addresses)
+        self.channels = [grpc.insecure_channel(address, options=options) for address in self.addresses]
+        self.stubs = [key_value_store_service_pb2_grpc.KeyValueStoreStub(channel) for channel in self.channels]
+        # Peticiones recibidas por el router: las que abarcan varios shards se cuentan una sola vez
+        self.counters = ShardedCounters()
+
+    def _count(self, kind, amount = 1):
+        """ Cuenta amount peticiones del tipo dado ('get', 'set', 'get_prefix' o 'scan') con los mismos criterios que lbserver """
+        self.counters.add("total_requests", amount)
+        self.counters.add(f"total_{kind}_requests", amount)
+
+    def _stub_for_key(self, key):
+        return self.stubs[shard_for_key(key, len(self.stubs))]
+
+    def _forward(self, method, request, context):
+        """ Reenvia una llamada unaria y traslada al cliente el codigo de error y la traza del shard """
+        trace = ForwardTrace(context)
+        try:
+            if trace.metadata is None:
+                return method(request)
+            response, call = method.with_call(request, metadata = trace.metadata)
+            trace.add(call)
+        except grpc.RpcError as e:
+            trace.add(e)
+            trace.finish()
+            context.abort(e.code(), e.details())
+        trace.finish()
+        return response
+
+    def _result(self, call, context, trace = None):
+        """ Espera el resultado de una llamada enviada con future y traslada el codigo de error del shard """
+        try:
+            return call.result()
+        except grpc.RpcError as e:
+            if trace is not None:
+                trace.finish()
+            context.abort(e.code(), e.details())
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+
+    def Shards(self, request, context):
+        return key_value_store_service_pb2.ShardsResponse(addresses = self.addresses)
+
+    def Get(self, request, context):
+        response = self._forward(self._stub_for_key(request.key).Get, request, context)
+        self._count("get")
+        return response
+
+    def Set(self, request, context):
+        response = self._forward(self._stub_for_key(request.key).Set, request, context)
+        self._count("set")
+        return response
+
+    def _group_by_shard(self, keys):
+        """ Devuelve shard -> posiciones de las claves que le corresponden """
+        groups = {}
+        for position, key in enumerate(keys):
+            groups.setdefault(shard_for_key(key, len(self.stubs)), []).append(position)
+        return groups
+
+    def _multi_get(self, stubs, keys, context):
+        """ Envia a cada shard (con los stubs del servicio dado) sus claves del MultiGet y devuelve los resultados en orden """
+        trace = ForwardTrace(context)
+        groups = self._group_by_shard(keys)
+        calls = {
+            shard: trace.add(stubs[shard].MultiGet.future(key_value_store_service_pb2.MultiGetRequest(keys = [keys[i] for i in positions]),
+                                                          metadata = trace.metadata))
+            for shard, positions in groups.items()
+        }
+        results = [None] * len(keys)
+        for shard, positions in groups.items():
+            response = self._result(calls[shard], context, trace)
+            for position, result in zip(positions, response.results):
+                results[position] = result
+        self._count("get", len(keys))
+        trace.finish()
+        return results
+
+    def _multi_set(self, stubs, entries, request_type, context):
+        """ Envia a cada shard sus pares del MultiSet como request_type y devuelve el estado de cada par """
+        trace = ForwardTrace(context)
+        groups = self._group_by_shard([entry.key for entry in entries])
+        calls = {
+            shard: trace.add(stubs[shard].MultiSet.future(request_type(entries = [entries[i] for i in positions]),
+                                                          metadata = trace.metadata))
+            for shard, positions in groups.items()
+        }
+        status = [False] * len(entries)
+        for shard, positions in groups.items():
+            response = self._result(calls[shard], context, trace)
+            for position, ok in zip(positions, response.status):
+                status[position] = ok
+        self._count("set", len(entries))
+        trace.finish()
+        return status
+
+    def MultiGet(self, request, context):
+        results = self._multi_get(self.stubs, list(request.keys), context)
+        return key_value_store_service_pb2.MultiGetResponse(results = results)
+
+    def MultiSet(self, request, context):
+        status = self._multi_set(self.stubs, list(request.entries), key_value_store_service_pb2.MultiSetRequest, context)
+        return key_value_store_service_pb2.MultiSetResponse(status = status)
+
+    def Pipeline(self, request_iterator, context):
+        """ Reenvia cada operacion al shard propietario sin esperar a las anteriores """
+        responses = queue.Queue()
+
+        def forward(request):
+            op = request.WhichOneof("op")
+            if op == "get":
+                call = self._stub_for_key(request.get.key).Get.future(request.get)
+            else:
+                call = self._stub_for_key(request.set.key).Set.future(request.set)
+
+            def done(call):
+                # Como en lbserver, los get del pipeline se cuentan aunque la clave no exista
+                if op == "get":
+                    self._count("get")
+                try:
+                    response = call.result()
+                    if op == "set" and response.status:
+                        self._count("set")
+                    responses.put(key_value_store_service_pb2.PipelineResponse(
+                        seq = request.seq, status = response.status, value = response.value if op == "get" else ""))
+                except grpc.RpcError as e:
+                    responses.put(key_value_store_service_pb2.PipelineResponse(
+                        seq = request.seq, status = False, value = e.details() or ""))
+            call.add_done_callback(done)
+
+        def read_requests():
+            submitted = 0
+            try:
+                for request in request_iterator:
+                    forward(request)
+                    submitted += 1
+            except grpc.RpcError:
+                pass
+            finally:
+                responses.put(submitted)
+
+        threading.Thread(target = read_requests, name = "router-pipeline-reader", daemon = True).start()
+        sent = 0
+        total = None
+        while total is None or sent < total:
+            response = responses.get()
+            if isinstance(response, int):
+                total = response
+                continue
+            sent += 1
+            yield response
+
+    def GetPrefixKey(self, request, context):
+        """ Pide la consulta a todos los shards y combina sus resultados en orden de clave """
+        self._count("get_prefix")
+        trace = ForwardTrace(context)
+        calls = [trace.add(stub.GetPrefixKey.future(request, metadata = trace.metadata)) for stub in self.stubs]
+        responses = [self._result(call, context, trace) for call in calls]
+
+        if request.projection == key_value_store_service_pb2.COUNT_ONLY:
+            trace.finish()
+            return key_value_store_service_pb2.GetPrefixResponse(count = sum(r.count for r in responses))
+
+        items = heapq.merge(*(_response_items(response) for response in responses))
+        keys, values, next_page_token = _take(items, request.limit, any(r.next_page_token for r in responses))
+        trace.finish()
+        return key_value_store_service_pb2.GetPrefixResponse(keys = keys, values = values, next_page_token = next_page_token,
+                                                              count = len(keys))
+
+    def GetPrefixKeyStream(self, request, context):
+        if request.projection == key_value_store_service_pb2.COUNT_ONLY:
+            yield self.GetPrefixKey(request, context)
+            return
+
+        self._count("get_prefix")
+        streams = [stub.GetPrefixKeyStream(request) for stub in self.stubs]
+        truncated = []
+
+        def stream_items(stream):
+            for response in stream:
+                if response.next_page_token:
+                    truncated.append(True)
+                yield from _response_items(response)
+
+        try:
+            items = heapq.merge(*(stream_items(stream) for stream in streams))
+            for keys, values, last in _batches(items, request.limit, context):
+                next_page_token = ""
+                if last and request.limit and keys and (truncated or last == "limit"):
+                    next_page_token = encode_page_token(keys[-1])
+                yield key_value_store_service_pb2.GetPrefixResponse(keys = keys, values = values,
+                                                                    next_page_token = next_page_token, count = len(keys))
+        except grpc.RpcError as e:
+            context.abort(e.code(), e.details())
+        finally:
+            for stream in streams:
+                stream.cancel()
+
+    def Scan(self, request, context):
+        self._count("scan")
+        streams = [stub.Scan(request) for stub in self.stubs]
+        try:
+            items = heapq.merge(*(_stream_items(stream) for stream in streams), reverse = request.reverse)
+            for keys, values, _ in _batches(items, request.limit, context):
+                yield key_value_store_service_pb2.ScanResponse(keys = keys, values = values)
+        except grpc.RpcError as e:
+            context.abort(e.code(), e.details())
+        finally:
+            for stream in streams:
+                stream.cancel()
+
+    def Stat(self, request, context):
+        """ Combina las estadisticas de todos los shards.
+
+        Los contadores de peticiones son los del router: sumar los de los shards contaria una vez por
+        shard cada consulta por prefijo o scan. Las peticiones que un cliente envia directamente a los
+        shards (ShardedKVClient) solo aparecen en el Stat de cada shard.
+        """
+        calls = [stub.Stat.future(request) for stub in self.stubs]
+        responses = [self._result(call, context) for call in calls]
+        counters = self.counters.snapshot()
+        return merge_stats(responses, shards = len(self.stubs), **{name: counters[name] for name in REQUEST_COUNTERS})
+
+    def Profile(self, request, context):
+        """ Perfila todos los shards a la vez; cada pila lleva como raiz el shard del que procede """
+        calls = [stub.Profile.future(request) for stub in self.stubs]
+        responses = [self._result(call, context) for call in calls]
+        lines = []
+        for shard, response in enumerate(responses):
+            lines.extend(f"shard-{shard};{line}" for line in response.collapsed_stacks.splitlines())
+        return key_value_store_service_pb2.ProfileResponse(
+            collapsed_stacks = "\n".join(lines),
+            samples = sum(response.samples for response in responses),
+            seconds = max(response.seconds for response in responses)
+        )
+
+    def LatencyStats(self, request, context):
+        """ Combina los histogramas de latencia de todos los shards sumando sus cubetas """
+        calls = [stub.LatencyStats.future(request) for stub in self.stubs]
+        responses = [self._result(call, context) for call in calls]
+        by_name = {}
+        for response in responses:
+            for histogram in response.histograms:
+                by_name.setdefault(histogram.name, []).append(histogram)
+        return key_value_store_service_pb2.LatencyStatsResponse(
+            window_seconds = max(response.window_seconds for response in responses),
+            histograms = [histogram_response(name, merge_histograms(histograms)) for name, histograms in sorted(by_name.items())]
+        )
+
+
+def merge_stats(responses, **overrides):
+    """ Suma los contadores de varias StatResponse; maximos, medias ponderadas por registros y textos del primero """
+    merged = key_value_store_service_pb2.StatResponse()
+    records = sum(r.commit_records for r in responses) or 1
+    for field in key_value_store_service_pb2.StatResponse.DESCRIPTOR.fields:
+        name = field.name
+        values = [getattr(r, name) for r in responses]
+        if field.message_type is not None and field.message_type.GetOptions().map_entry:
+            # Mapas de contadores (errores por RPC): se suma cada entrada
+            for counts in values:
+                for key, count in counts.items():
+                    getattr(merged, name)[key] += count
+            continue
+        if name in MAX_FIELDS:
+            value = max(values)
+        elif name in AVG_FIELDS:
+            value = sum(getattr(r, name) * r.commit_records for r in responses) / records
+        elif field.type == field.TYPE_BOOL:
+            value = all(values)
+        elif field.type == field.TYPE_STRING:
+            # Las fechas ISO se comparan como texto: nos quedamos con la mas reciente
+            value = max(values) if name in ("last_fsync", "last_snapshot") else values[0]
+        else:
+            value = sum(values)
+        setattr(merged, name, value)
+    for name, value in overrides.items():
+        setattr(merged, name, value)
+    return merged
+
+
+def _response_items(response):
+    """ Pares (clave, valor) de una respuesta; el valor es None si la respuesta solo trae claves """
+    if len(response.values) == len(response.keys):
+        return zip(response.keys, response.values)
+    return ((key, None) for key in response.keys)
+
+
+def _stream_items(stream):
+    for response in stream:
+        yield from _response_items(response)
+
+
+def _take(items, limit, truncated):
+    """ Toma como maximo limit pares y calcula el token de la siguiente pagina """
+    keys = []
+    values = []
+    for key, value in items:
+        if limit and len(keys) == limit:
+            truncated = True
+            break
+        keys.append(key)
+        if value is not None:
+            values.append(value)
+    next_page_token = encode_page_token(keys[-1]) if limit and truncated and keys else ""
+    return keys, values, next_page_token
+
+
+def _batches(items, limit, context):
+    """ Agrupa los pares en lotes de tamaño acotado; el ultimo lote se marca con 'limit' o 'end' """
+    keys = []
+    values = []
+    batch_bytes = 0
+    returned = 0
+    for key, value in items:
+        if limit and returned == limit:
+            yield keys, values, "limit"
+            return
+        size = len(key) + (len(value) if value is not None else 0)
+        if keys and batch_bytes + size > STREAM_BATCH_BYTES:
+            if not context.is_active():
+                return
+            yield keys, values, None
+            keys = []
+            values = []
+            batch_bytes = 0
+        keys.append(key)
+        if value is not None:
+            values.append(value)
+        batch_bytes += size
+        returned += 1
+    if keys:
+        yield keys, values, "end"
+
+
+class BytesShardRouter(key_value_store_service_pb2_grpc.KeyValueStoreBytesServicer):
+    """ Servicio KeyValueStoreBytes del proceso frontal: reenvia cada clave a su shard por los canales de ShardRouter """
+
+    def __init__(self, router):
+        self.router = router
+        self.stubs = [key_value_store_service_pb2_grpc.KeyValueStoreBytesStub(channel) for channel in router.channels]
+
+    def _stub_for_key(self, key):
+        return self.stubs[shard_for_key(key, len(self.stubs))]
+
+    def Get(self, request, context):
+        response = self.router._forward(self._stub_for_key(request.key).Get, request, context)
+        self.router._count("get")
+        return response
+
+    def Set(self, request, context):
+        response = self.router._forward(self._stub_for_key(request.key).Set, request, context)
+        self.router._count("set")
+        return response
+
+    def MultiGet(self, request, context):
+        results = self.router._multi_get(self.stubs, list(request.keys), context)
+        return key_value_store_service_pb2.MultiGetBytesResponse(results = results)
+
+    def MultiSet(self, request, context):
+        status = self.router._multi_set(self.stubs, list(request.entries), key_value_store_service_pb2.MultiSetBytesRequest, context)
+        return key_value_store_service_pb2.MultiSetResponse(status = status)
+
+    def SetStream(self, request_iterator, context):
+        """ Reenvia el stream de bloques al shard de la clave, que llega en el primer mensaje """
+        first = next(request_iterator, None)
+        if first is None or not first.key:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "El primer mensaje debe llevar la clave y el tamaño del valor")
+        response = self.router._forward(self._stub_for_key(first.key).SetStream, itertools.chain([first], request_iterator), context)
+        self.router._count("set")
+        return response
+
+    def GetStream(self, request, context):
+        try:
+            chunks = self._stub_for_key(request.key).GetStream(request)
+            # El primer mensaje solo llega si la clave existe (si no, el shard responde NOT_FOUND)
+            first = next(chunks, None)
+            if first is not None:
+                self.router._count("get")
+                yield first
+            yield from chunks
+        except grpc.RpcError as e:
+            context.abort(e.code(), e.details())
@@ -0,0 +1,236 @@
+import os
+import struct
+import threading
+import zlib
+
+from commit_log import BLOB_POINTER, fsync_dir
+
+# Formato del snapshot:
+#   MAGIC
+#   cabecera: segmento desde el que hay que reproducir el log y numero de segmentos sellados
+#   por cada segmento sellado: numero, generacion y bytes muertos
+#   filtro de Bloom de las claves serializado (longitud y datos; longitud 0 si no hay filtro)
+#   por cada clave: longitudes, ubicacion en el log, clave y valor (o la ubicacion de su blob)
+#   pie: END_MARK, numero de claves y CRC32 de todo lo anterior
+MAGIC = b"KVSNAP03"
+# Los snapshots anteriores no tienen filtro de Bloom; los anteriores a los blobs nunca contienen BLOB_VALUE
+OLD_MAGICS = (b"KVSNAP01", b"KVSNAP02")
+END_MARK = b"END!"
+HEADER = struct.Struct(">QI")
+SEGMENT = struct.Struct(">QHQ")
+BLOOM = struct.Struct(">Q")
+ENTRY = struct.Struct(">IIQQI")
+FOOTER = struct.Struct(">QI")
+
+# Longitud de valor que indica que el snapshot no guarda el valor de la clave
+NO_VALUE = 0xFFFFFFFF
+
+# Longitud de valor que indica que el valor esta en el log de blobs: tras la clave va su ubicacion (BLOB_POINTER)
+BLOB_VALUE = 0xFFFFFFFE
+
+# Numero de snapshots que se conservan en disco
+SNAPSHOTS_TO_KEEP = 2
+
+
+def snapshot_filename(replay_from):
+    return f"snapshot.{replay_from:06d}.snap"
+
+
+def list_snapshots(data_dir):
+    """ Devuelve los snapshots del directorio ordenados del mas reciente al mas antiguo """
+    found = []
+    for name in os.listdir(data_dir):
+        parts = name.split(".")
+        if len(parts) == 3 and parts[0] == "snapshot" and parts[2] == "snap" and parts[1].isdigit():
+            found.append((int(parts[1]), os.path.join(data_dir, name)))
+    return [path for _, path in sorted(found, reverse=True)]
+
+
+class Snapshot:
+    """ Contenido de un snapshot cargado de disco """
+
+    def __init__(self, replay_from, segments, locations, data, blob_pointers, bloom):
+        # Numero del primer segmento que no esta incluido en el snapshot
+        self.replay_from = replay_from
+        # Segmentos sellados anteriores: numero -> (generacion, bytes muertos)
+        self.segments = segments
+        self.locations = locations
+        self.data = data
+        # Ubicacion del puntero en el log -> ubicacion del valor en el log de blobs
+        self.blob_pointers = blob_pointers
+        # Filtro de Bloom serializado (BloomFilter.to_bytes) o None
+        self.bloom = bloom
+
+
+def write_snapshot(data_dir, replay_from, segments, locations, data=None, blob_pointers=None, bloom=None):
+    """ Escribe un snapshot de forma atomica (archivo temporal + fsync + renombrado).
+
+    Si data es None solo se guardan las ubicaciones de las claves en el log. De las claves cuya
+    ubicacion esta en blob_pointers se guarda la ubicacion del blob en lugar del valor. bloom es
+    el filtro de Bloom serializado; puede contener claves de mas, pero no de menos.
+    """
+    blob_pointers = blob_pointers or {}
+    path = os.path.join(data_dir, snapshot_filename(replay_from))
+    tmp_path = path + ".tmp"
+
+    crc = 0
+    with open(tmp_path, "wb", buffering=1024 * 1024) as file:
+        def write(chunk):
+            nonlocal crc
+            crc = zlib.crc32(chunk, crc)
+            file.write(chunk)
+
+        write(MAGIC)
+        write(HEADER.pack(replay_from, len(segments)))
+        for number, (gen, dead) in sorted(segments.items()):
+            write(SEGMENT.pack(number, gen, dead))
+        write(BLOOM.pack(len(bloom or b"")))
+        if bloom:
+            write(bloom)
+
+        count = 0
+        for key, (segment, offset, size) in locations.items():
+            key_bytes = key.encode("utf-8")
+            blob = blob_pointers.get((segment, offset, size))
+            value = data.get(key) if data is not None and blob is None else None
+            if blob is not None:
+                write(ENTRY.pack(len(key_bytes), BLOB_VALUE, segment, offset, size) + key_bytes)
+                write(BLOB_POINTER.pack(*blob))
+            elif value is None:
+                write(ENTRY.pack(len(key_bytes), NO_VALUE, segment, offset, size) + key_bytes)
+            else:
+                write(ENTRY.pack(len(key_bytes), len(value), segment, offset, size) + key_bytes)
+                write(value)
+            count += 1
+
+        write(END_MARK)
+        file.write(FOOTER.pack(count, crc))
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.rename(tmp_path, path)
+    fsync_dir(data_dir)
+
+    # Borramos los snapshots antiguos
+    for old_path in list_snapshots(data_dir)[SNAPSHOTS_TO_KEEP:]:
+        os.remove(old_path)
+    return path
+
+
+def _read_exact(file, size, crc):
+    chunk = file.read(size)
+    if len(chunk) < size:
+        raise ValueError("Snapshot incompleto")
+    return chunk, zlib.crc32(chunk, crc)
+
+
+def read_snapshot(path):
+    """ Lee un snapshot completo y verifica su CRC; lanza ValueError si esta dañado """
+    locations = {}
+    data = {}
+    blob_pointers = {}
+    with open(path, "rb", buffering=1024 * 1024) as file:
+        magic, crc = _read_exact(file, len(MAGIC), 0)
+        if magic != MAGIC and magic not in OLD_MAGICS:
+            raise ValueError("No es un snapshot")
+
+        chunk, crc = _read_exact(file, HEADER.size, crc)
+        replay_from, segment_count = HEADER.unpack(chunk)
+        segments = {}
+        for _ in range(segment_count):
+            chunk, crc = _read_exact(file, SEGMENT.size, crc)
+            number, gen, dead = SEGMENT.unpack(chunk)
+            segments[number] = (gen, dead)
+
+        bloom = None
+        if magic == MAGIC:
+            chunk, crc = _read_exact(file, BLOOM.size, crc)
+            bloom_len, = BLOOM.unpack(chunk)
+            if bloom_len:
+                bloom, crc = _read_exact(file, bloom_len, crc)
+
+        count = 0
+        while True:
+            # Cada entrada empieza por la longitud de la clave; el pie empieza por END_MARK
+            # (ninguna clave puede tener una longitud que coincida con esos 4 bytes)
+            mark, crc = _read_exact(file, len(END_MARK), crc)
+            if mark == END_MARK:
+                break
+            chunk, crc = _read_exact(file, ENTRY.size - len(END_MARK), crc)
+            key_len, value_len, segment, offset, size = ENTRY.unpack(mark + chunk)
+            key, crc = _read_exact(file, key_len, crc)
+            key = key.decode()
+            locations[key] = (segment, offset, size)
+            if value_len == BLOB_VALUE:
+                chunk, crc = _read_exact(file, BLOB_POINTER.size, crc)
+                blob_pointers[(segment, offset, size)] = BLOB_POINTER.unpack(chunk)
+            elif value_len != NO_VALUE:
+                value, crc = _read_exact(file, value_len, crc)
+                data[key] = value
+            count += 1
+
+        chunk = file.read(FOOTER.size)
+        if len(chunk) < FOOTER.size:
+            raise ValueError("Snapshot incompleto")
+        expected_count, expected_crc = FOOTER.unpack(chunk)
+        if expected_count != count or expected_crc != crc:
+            raise ValueError("Snapshot dañado")
+
+    return Snapshot(replay_from, segments, locations, data, blob_pointers, bloom)
+
+
+def load_latest_snapshot(data_dir, current_segments):
+    """ Carga el snapshot valido mas reciente.
+
+    Un snapshot solo es valido si los segmentos anteriores a su punto de reproduccion siguen
+    siendo los mismos (misma generacion); si el compactador reescribio alguno despues, las
+    ubicaciones que guarda ya no sirven. current_segments es numero -> generacion.
+    """
+    for path in list_snapshots(data_dir):
+        try:
+            snapshot = read_snapshot(path)
+        except (ValueError, OSError, UnicodeDecodeError) as e:
+            print(f"Snapshot {os.path.basename(path)} descartado: {e}")
+            continue
+
+        older = {n: g for n, g in current_segments.items() if n < snapshot.replay_from}
+        if older != {n: g for n, (g, _) in snapshot.segments.items()}:
+            print(f"Snapshot {os.path.basename(path)} descartado: los segmentos cambiaron")
+            continue
+        return snapshot
+    return None
+
+
+class Checkpointer:
+    """ Hilo de fondo que crea snapshots periodicos llamando a la funcion del servidor """
+
+    def __init__(self, checkpoint, interval=60.0):
+        self.checkpoint = checkpoint
+        self.interval = interval
+
+        self._requested = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="checkpointer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def request(self):
+        """ Pide un snapshot sin esperar al siguiente periodo """
+        self._requested.set()
+
+    def stop(self):
+        self._stop.set()
+        self._requested.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            self._requested.wait(self.interval)
+            self._requested.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.checkpoint()
+            except OSError as e:
+                print(f"Error al crear el snapshot: {e}")
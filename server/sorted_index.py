@@ -0,0 +1,157 @@
+from bisect import bisect_left, bisect_right
+from itertools import islice
+import threading
+
+
+class SortedKeyIndex:
+    """ Indice ordenado de claves para consultas por prefijo sin recorrer todo el diccionario.
+
+    Las claves se guardan en una lista de bloques ordenados (cada uno de hasta 2 * LOAD claves)
+    y en la lista de maximos de cada bloque, asi que insertar una clave nueva solo desplaza
+    un bloque pequeño y buscar es O(log N). Una consulta por prefijo cuesta O(log N + coincidencias).
+    """
+
+    LOAD = 512
+
+    def __init__(self, keys=()):
+        self._lock = threading.Lock()
+        keys = sorted(set(keys))
+        self._chunks = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(keys)
+
+    def __len__(self):
+        return self._len
+
+    def add(self, key):
+        """ Inserta la clave si no estaba; devuelve True si era nueva """
+        with self._lock:
+            if not self._chunks:
+                self._chunks.append([key])
+                self._maxes.append(key)
+                self._len = 1
+                return True
+
+            i = bisect_left(self._maxes, key)
+            if i == len(self._maxes):
+                # Mayor que todas las claves: va al final del ultimo bloque
+                i -= 1
+                chunk = self._chunks[i]
+                chunk.append(key)
+                self._maxes[i] = key
+            else:
+                chunk = self._chunks[i]
+                j = bisect_left(chunk, key)
+                if chunk[j] == key:
+                    return False
+                chunk.insert(j, key)
+
+            self._len += 1
+            # Partimos los bloques que crecen demasiado para que las inserciones sigan siendo baratas
+            if len(chunk) > 2 * self.LOAD:
+                self._chunks[i:i + 1] = [chunk[:self.LOAD], chunk[self.LOAD:]]
+                self._maxes[i:i + 1] = [chunk[self.LOAD - 1], chunk[-1]]
+            return True
+
+    def _iter_from(self, start, exclusive=False):
+        """ Recorre en orden las claves mayores o iguales que start (mayores si exclusive) con el lock tomado """
+        search = bisect_right if exclusive else bisect_left
+        i = search(self._maxes, start)
+        if i == len(self._maxes):
+            return
+        chunk = self._chunks[i]
+        yield from chunk[search(chunk, start):]
+        for k in range(i + 1, len(self._chunks)):
+            yield from self._chunks[k]
+
+    def prefix(self, prefix):
+        """ Devuelve en orden las claves que empiezan por el prefijo """
+        keys = []
+        with self._lock:
+            for key in self._iter_from(prefix):
+                if not key.startswith(prefix):
+                    break
+                keys.append(key)
+        return keys
+
+    def prefix_batches(self, prefix, batch_size=256, start_after=None):
+        """ Recorre en orden las claves con el prefijo en bloques de batch_size.
+
+        Si se indica start_after, solo se devuelven las claves posteriores a ella. El lock solo se
+        toma mientras se extrae cada bloque, asi que las inserciones concurrentes no esperan a que
+        el consumidor termine de procesar la consulta.
+        """
+        if start_after is not None and start_after >= prefix:
+            start, exclusive = start_after, True
+        else:
+            start, exclusive = prefix, False
+        while True:
+            with self._lock:
+                keys = list(islice(self._iter_from(start, exclusive), batch_size))
+            matched = [key for key in keys if key.startswith(prefix)]
+            if matched:
+                yield matched
+            if len(matched) < batch_size:
+                return
+            start, exclusive = keys[-1], True
+
+    def _iter_before(self, end):
+        """ Recorre en orden descendente las claves menores que end (todas si end es vacio) con el lock tomado """
+        if not self._chunks:
+            return
+        i = bisect_left(self._maxes, end) if end else len(self._maxes)
+        if i < len(self._chunks):
+            chunk = self._chunks[i]
+            yield from reversed(chunk[:bisect_left(chunk, end)])
+        for k in range(min(i, len(self._chunks)) - 1, -1, -1):
+            yield from reversed(self._chunks[k])
+
+    def range_batches(self, start, end, reverse=False, batch_size=256):
+        """ Recorre las claves del intervalo [start, end) en orden (descendente si reverse) en bloques de batch_size.
+
+        Un end vacio significa sin limite superior. Como en prefix_batches, el lock solo se toma
+        mientras se extrae cada bloque y el siguiente continua desde la ultima clave devuelta.
+        """
+        exclusive = False
+        while True:
+            with self._lock:
+                if reverse:
+                    keys = list(islice(self._iter_before(end), batch_size))
+                else:
+                    keys = list(islice(self._iter_from(start, exclusive), batch_size))
+            if reverse:
+                matched = [key for key in keys if key >= start]
+            else:
+                matched = [key for key in keys if not end or key < end]
+            if matched:
+                yield matched
+            if len(matched) < batch_size:
+                return
+            if reverse:
+                end = keys[-1]
+            else:
+                start, exclusive = keys[-1], True
+
+    def range(self, start, end, reverse=False, limit=0):
+        """ Devuelve las claves del intervalo [start, end) en orden (descendente si reverse).
+
+        Un end vacio significa sin limite superior. Todas las claves se extraen con una sola toma
+        del lock, asi que la lista corresponde a un unico instante del indice.
+        """
+        keys = []
+        with self._lock:
+            if reverse:
+                for key in self._iter_before(end):
+                    if key < start:
+                        break
+                    keys.append(key)
+                    if limit and len(keys) == limit:
+                        break
+            else:
+                for key in self._iter_from(start):
+                    if end and key >= end:
+                        break
+                    keys.append(key)
+                    if limit and len(keys) == limit:
+                        break
+        return keys
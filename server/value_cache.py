@@ -0,0 +1,181 @@
+from collections import OrderedDict, deque
+import threading
+
+# Frecuencia maxima que se cuenta de cada entrada (2 bits, como en S3-FIFO)
+MAX_FREQ = 3
+
+# Fraccion del presupuesto de cada particion que ocupa la cola pequeña
+SMALL_FRACTION = 0.1
+
+
+class _Entry:
+    __slots__ = ("key", "value", "size", "freq", "in_main", "removed")
+
+    def __init__(self, key, value, size):
+        self.key = key
+        self.value = value
+        self.size = size
+        self.freq = 0
+        self.in_main = False
+        self.removed = False
+
+
+class _S3FIFO:
+    """ Una particion del cache con la politica S3-FIFO.
+
+    Las entradas nuevas entran en una cola FIFO pequeña (SMALL_FRACTION del presupuesto). Al salir
+    de ella pasan a la cola principal si se leyeron al menos una vez; si no, se descartan y su clave
+    queda en la cola fantasma, de modo que las lecturas de una sola vez (un recorrido completo del
+    keyspace) no desplazan a las claves calientes. La cola principal es un FIFO con reinsercion:
+    una entrada leida vuelve al principio con su frecuencia reducida en uno. Una clave que se
+    vuelve a insertar mientras esta en la cola fantasma entra directamente en la cola principal.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.small_capacity = max(1, int(capacity * SMALL_FRACTION))
+        self.lock = threading.Lock()
+        self.entries = {}
+        # Las colas guardan las entradas; las invalidadas se marcan y se descartan al salir
+        self.small = deque()
+        self.main = deque()
+        self.ghost = OrderedDict()
+        self.small_bytes = 0
+        self.main_bytes = 0
+        self.removed = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if entry.freq < MAX_FREQ:
+                entry.freq += 1
+            return entry.value
+
+    def put(self, key, value, is_current):
+        size = len(key) + len(value)
+        if size > self.capacity:
+            return
+        with self.lock:
+            # Se comprueba con el lock de la particion tomado para que una invalidacion posterior no se pierda
+            if not is_current():
+                return
+            self._remove(key)
+            entry = _Entry(key, value, size)
+            if key in self.ghost:
+                del self.ghost[key]
+                entry.in_main = True
+                self.main.append(entry)
+                self.main_bytes += size
+            else:
+                self.small.append(entry)
+                self.small_bytes += size
+            self.entries[key] = entry
+            while self.small_bytes + self.main_bytes > self.capacity:
+                if self.small_bytes >= self.small_capacity or not self.main_bytes:
+                    self._evict_small()
+                else:
+                    self._evict_main()
+
+    def invalidate(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        entry.removed = True
+        entry.value = None
+        if entry.in_main:
+            self.main_bytes -= entry.size
+        else:
+            self.small_bytes -= entry.size
+        # Si no hay expulsiones las entradas invalidadas no salen de las colas: se limpian cuando
+        # ya son mas que las vigentes, asi que el coste se reparte entre las invalidaciones
+        self.removed += 1
+        if self.removed > len(self.entries) + 64:
+            self.small = deque(entry for entry in self.small if not entry.removed)
+            self.main = deque(entry for entry in self.main if not entry.removed)
+            self.removed = 0
+
+    def _evict_small(self):
+        while self.small:
+            entry = self.small.popleft()
+            if entry.removed:
+                self.removed -= 1
+                continue
+            self.small_bytes -= entry.size
+            if entry.freq > 0:
+                entry.freq = 0
+                entry.in_main = True
+                self.main.append(entry)
+                self.main_bytes += entry.size
+                return
+            del self.entries[entry.key]
+            self.evictions += 1
+            # La cola fantasma recuerda tantas claves como entradas tiene la particion
+            self.ghost[entry.key] = None
+            while len(self.ghost) > max(len(self.entries), 1):
+                self.ghost.popitem(last = False)
+            return
+
+    def _evict_main(self):
+        while self.main:
+            entry = self.main.popleft()
+            if entry.removed:
+                self.removed -= 1
+                continue
+            if entry.freq > 0:
+                entry.freq -= 1
+                self.main.append(entry)
+                continue
+            self.main_bytes -= entry.size
+            del self.entries[entry.key]
+            self.evictions += 1
+            return
+
+
+class ValueCache:
+    """ Cache de valores leidos del log en modo 'disk', con un presupuesto de bytes.
+
+    Se reparte en tantas particiones como locks de claves tiene el servidor, con la misma funcion
+    hash, asi que las lecturas de claves de distintas particiones no compiten por el mismo lock.
+    Cada particion tiene su parte del presupuesto y aplica S3-FIFO por separado.
+    """
+
+    def __init__(self, capacity_bytes, num_shards):
+        self.capacity_bytes = capacity_bytes
+        self.num_shards = num_shards
+        self.shards = [_S3FIFO(capacity_bytes // num_shards) for _ in range(num_shards)]
+
+    def _shard(self, key):
+        return self.shards[hash(key) % self.num_shards]
+
+    def get(self, key):
+        """ Devuelve el valor guardado de la clave o None """
+        return self._shard(key).get(key)
+
+    def put(self, key, value, is_current):
+        """ Guarda el valor leido del log si is_current() sigue siendo cierto con el lock de la particion tomado """
+        self._shard(key).put(key, value, is_current)
+
+    def invalidate(self, key):
+        """ Descarta el valor guardado de la clave (se llama despues de publicar su nueva ubicacion) """
+        self._shard(key).invalidate(key)
+
+    def stats(self):
+        """ Devuelve (aciertos, fallos, expulsiones, bytes ocupados) sumando todas las particiones """
+        hits = misses = evictions = used = 0
+        for shard in self.shards:
+            hits += shard.hits
+            misses += shard.misses
+            evictions += shard.evictions
+            used += shard.small_bytes + shard.main_bytes
+        return hits, misses, evictions, used